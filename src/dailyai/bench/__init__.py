@@ -0,0 +1,18 @@
+"""Benchmarks for dailyai pipelines and frame processors.
+
+Run the pipeline scenarios, with fake AI services, with
+
+    python -m dailyai.bench
+
+The fake services are in dailyai.bench.fakes, and can be used in tests too.
+Other modules in this package are microbenchmarks that run on their own, eg.
+
+    python -m dailyai.bench.processor_overhead
+    python -m dailyai.bench.frame_allocation
+    python -m dailyai.bench.frame_codec
+    python -m dailyai.bench.thread_bridge
+    python -m dailyai.bench.vad_batching
+    python -m dailyai.bench.vad_backends
+    python -m dailyai.bench.vad_gate
+    python -m dailyai.bench.audio_fanout
+"""
@@ -0,0 +1,154 @@
+"""Run the pipeline benchmark scenarios.
+
+    python -m dailyai.bench                      # every scenario
+    python -m dailyai.bench single-turn --turns 50 --json before.json
+    python -m dailyai.bench --json after.json --compare before.json
+
+For each scenario this reports frames per second reaching the output, the
+time from the end of the user's speech to the first audio of the response
+(50th, 90th and 99th percentiles), and peak Python memory use. Use
+--time-scale 0 to take the fake services' delays out and measure only the
+pipeline's overhead.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from typing import Dict
+
+from dailyai.bench.scenarios import SCENARIOS, ScenarioConfig, run_scenario
+from dailyai.pipeline.concurrent_pipeline import ConcurrentPipeline
+from dailyai.pipeline.pipeline import Pipeline
+
+# Bump this if the layout of the JSON results changes.
+RESULTS_FORMAT = 1
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _turn_latency(result: dict, percentile: str) -> float | None:
+    mic_write = result["hop_percentiles"].get("mic_write")
+    return mic_write[percentile] if mic_write else None
+
+
+def _format_ms(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def _format_mb(size: int | None) -> str:
+    return "-" if size is None else f"{size / 1e6:.1f}"
+
+
+def print_results(results: Dict[str, dict]):
+    print(
+        f"{'scenario':<20} {'frames/s':>10} {'p50 ms':>8} {'p90 ms':>8} "
+        f"{'p99 ms':>8} {'interrupted':>11} {'peak MB':>8}")
+    for name, result in results.items():
+        print(
+            f"{name:<20} {result['frames_per_second']:>10.0f} "
+            f"{_format_ms(_turn_latency(result, 'p50')):>8} "
+            f"{_format_ms(_turn_latency(result, 'p90')):>8} "
+            f"{_format_ms(_turn_latency(result, 'p99')):>8} "
+            f"{result['interrupted_turns']:>11} "
+            f"{_format_mb(result['peak_memory_bytes']):>8}")
+
+
+def print_comparison(results: Dict[str, dict], baseline: dict):
+    """Print how each scenario changed relative to a saved run, as the ratio
+    of the new number to the old one."""
+    print(f"\ncompared with {baseline.get('commit') or 'baseline'}:")
+    print(
+        f"{'scenario':<20} {'frames/s':>10} {'p50':>8} {'p99':>8} {'peak mem':>9}")
+
+    def ratio(new, old) -> str:
+        if new is None or not old:
+            return "-"
+        return f"{new / old:.2f}x"
+
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        print(
+            f"{name:<20} "
+            f"{ratio(result['frames_per_second'], old['frames_per_second']):>10} "
+            f"{ratio(_turn_latency(result, 'p50'), _turn_latency(old, 'p50')):>8} "
+            f"{ratio(_turn_latency(result, 'p99'), _turn_latency(old, 'p99')):>8} "
+            f"{ratio(result['peak_memory_bytes'], old['peak_memory_bytes']):>9}")
+
+
+async def main(args: argparse.Namespace) -> Dict[str, dict]:
+    config = ScenarioConfig(
+        turns=args.turns,
+        time_scale=args.time_scale,
+        seed=args.seed,
+        pipeline_class=ConcurrentPipeline if args.concurrent else Pipeline,
+        measure_memory=not args.no_memory,
+    )
+    results: Dict[str, dict] = {}
+    for name in args.scenarios or list(SCENARIOS):
+        results[name] = (await run_scenario(name, config)).to_dict()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="scenarios:\n" + "\n".join(
+            f"  {s.name:<20} {s.description}" for s in SCENARIOS.values()),
+    )
+    parser.add_argument("scenarios", nargs="*", metavar="scenario")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="multiply the fake services' delays by this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrent", action="store_true",
+                        help="use a ConcurrentPipeline")
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="don't trace memory use, which slows the run down")
+    parser.add_argument("--json", metavar="PATH",
+                        help="save the results to this file")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="compare the results with ones saved by --json")
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario: {name}")
+
+    results = asyncio.run(main(args))
+    print_results(results)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+    if args.json:
+        saved = {
+            "format": RESULTS_FORMAT,
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "argv": sys.argv[1:],
+            "config": {
+                "turns": args.turns,
+                "time_scale": args.time_scale,
+                "seed": args.seed,
+                "concurrent": args.concurrent,
+            },
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(saved, f, indent=2)
@@ -0,0 +1,135 @@
+"""Measure handing captured audio to several consumers: a queue per
+consumer, each getting a copy of every captured chunk and gathering them
+into the chunk size it wants, against one AudioInputRing they all read.
+
+A capture thread writes 20ms chunks of 16kHz audio as fast as it can, and
+each consumer reads at its own chunk size (20ms, 96ms for VAD, 1s, ...).
+This reports the capture thread's CPU time per second of audio, which is
+what each consumer adds to the capture side, and the CPU time of the whole
+process.
+
+    python -m dailyai.bench.audio_fanout --consumers 1 --consumers 4
+"""
+
+import argparse
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import List
+
+from dailyai.services.audio_input import AudioInputRing
+
+SAMPLE_RATE = 16000
+CAPTURE_FRAMES = SAMPLE_RATE // 50
+# Frames per read, for each consumer in turn.
+CONSUMER_FRAMES = [CAPTURE_FRAMES, 1536, SAMPLE_RATE, 512, 4000]
+
+MODES = ["queues", "ring"]
+
+
+@dataclass
+class FanoutResult:
+    # CPU seconds per second of audio.
+    capture_cpu: float
+    total_cpu: float
+
+
+def _run_queues(consumers: int, chunks: int, capture_cpu: List[float]):
+    queues: List[queue.Queue] = [queue.Queue() for _ in range(consumers)]
+
+    def capture():
+        start = time.thread_time()
+        chunk = bytes(CAPTURE_FRAMES * 2)
+        for _ in range(chunks):
+            for q in queues:
+                q.put(bytes(chunk))
+        for q in queues:
+            q.put(None)
+        capture_cpu.append(time.thread_time() - start)
+
+    def consume(q: queue.Queue, frames: int):
+        pending = bytearray()
+        while True:
+            data = q.get()
+            if data is None:
+                break
+            pending += data
+            while len(pending) >= frames * 2:
+                del pending[:frames * 2]
+
+    return capture, [
+        threading.Thread(
+            target=consume,
+            args=(q, CONSUMER_FRAMES[i % len(CONSUMER_FRAMES)]))
+        for i, q in enumerate(queues)]
+
+
+def _run_ring(consumers: int, chunks: int, capture_cpu: List[float]):
+    # Big enough that no consumer falls a whole ring behind.
+    ring = AudioInputRing((chunks + 1) * CAPTURE_FRAMES * 2)
+    readers = [ring.reader() for _ in range(consumers)]
+
+    def capture():
+        start = time.thread_time()
+        chunk = bytes(CAPTURE_FRAMES * 2)
+        for _ in range(chunks):
+            ring.write(chunk)
+        ring.close()
+        capture_cpu.append(time.thread_time() - start)
+
+    def consume(reader, frames: int):
+        while reader.read(frames) is not None:
+            pass
+
+    return capture, [
+        threading.Thread(
+            target=consume,
+            args=(reader, CONSUMER_FRAMES[i % len(CONSUMER_FRAMES)]))
+        for i, reader in enumerate(readers)]
+
+
+def measure(mode: str, consumers: int, seconds: float = 60) -> FanoutResult:
+    chunks = int(seconds * SAMPLE_RATE / CAPTURE_FRAMES)
+    capture_cpu: List[float] = []
+    run = _run_queues if mode == "queues" else _run_ring
+    capture, consumer_threads = run(consumers, chunks, capture_cpu)
+
+    start = time.process_time()
+    for thread in consumer_threads:
+        thread.start()
+    capture_thread = threading.Thread(target=capture)
+    capture_thread.start()
+    capture_thread.join()
+    for thread in consumer_threads:
+        thread.join()
+    total_cpu = time.process_time() - start
+
+    return FanoutResult(
+        capture_cpu=capture_cpu[0] / seconds,
+        total_cpu=total_cpu / seconds,
+    )
+
+
+def main(consumer_counts: List[int], seconds: float):
+    print(f"{'mode':<8} {'consumers':>9} {'capture us/s':>13} "
+          f"{'total us/s':>11}")
+    for consumers in consumer_counts:
+        for mode in MODES:
+            result = measure(mode, consumers, seconds)
+            print(
+                f"{mode:<8} {consumers:>9} {result.capture_cpu * 1e6:>13.0f} "
+                f"{result.total_cpu * 1e6:>11.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--consumers",
+        type=int,
+        action="append",
+        help="measure with this many consumers (can be repeated)")
+    parser.add_argument("--seconds", type=float, default=60,
+                        help="seconds of audio to capture")
+    args = parser.parse_args()
+    main(args.consumers or [1, 2, 4, 8], args.seconds)
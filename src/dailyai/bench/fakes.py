@@ -0,0 +1,230 @@
+"""Fake AI services for benchmarks and tests.
+
+The fakes behave like the real services as far as the pipeline can tell: they
+consume and produce the same frames, and take time to do it. Each has a
+FakeTiming that sets its time to first byte and how fast it produces output
+after that. Delays and output are drawn from a random generator seeded per
+service, so a run with the same settings is repeatable.
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import AsyncGenerator, BinaryIO, List
+
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    Frame,
+    LLMMessagesQueueFrame,
+    LLMResponseEndFrame,
+    LLMResponseStartFrame,
+    OpenAILLMContextFrame,
+    TextFrame,
+)
+from dailyai.services.ai_services import (
+    ImageGenService,
+    LLMService,
+    STTService,
+    TTSService,
+)
+
+_WORDS = (
+    "the a bot user pipeline frame audio voice quickly slowly turn answer "
+    "question weather today tomorrow sure thing great idea maybe later "
+    "here there again every little while"
+).split()
+
+
+@dataclass
+class FakeTiming:
+    """How long a fake service takes to respond. Delays are drawn from normal
+    distributions and clipped at zero.
+
+    `rate` is in units per second after the first byte: tokens for an LLM,
+    audio bytes for TTS and STT. A rate of 0 means no delay between units.
+    `rate_jitter` is the standard deviation of the rate, as a fraction of it.
+    """
+
+    ttfb_s: float = 0.0
+    ttfb_jitter_s: float = 0.0
+    rate: float = 0.0
+    rate_jitter: float = 0.0
+
+    def scaled(self, time_scale: float) -> "FakeTiming":
+        """A copy of this timing with every delay multiplied by `time_scale`.
+        0 makes the service answer immediately, which leaves only the
+        pipeline's own overhead to measure."""
+        if time_scale == 0:
+            return FakeTiming()
+        return replace(
+            self,
+            ttfb_s=self.ttfb_s * time_scale,
+            ttfb_jitter_s=self.ttfb_jitter_s * time_scale,
+            rate=self.rate / time_scale,
+        )
+
+    def first_byte_delay(self, rng: random.Random) -> float:
+        if not self.ttfb_s:
+            return 0.0
+        return max(0.0, rng.gauss(self.ttfb_s, self.ttfb_jitter_s))
+
+    def delay(self, rng: random.Random, units: float) -> float:
+        if not self.rate:
+            return 0.0
+        rate = rng.gauss(self.rate, self.rate * self.rate_jitter)
+        return units / rate if rate > 0 else 0.0
+
+
+class _Pacer:
+    """Sleeps until each unit of output is due, rather than for each unit's
+    delay, so the event loop's timer resolution (about a millisecond) doesn't
+    add up over thousands of tiny delays."""
+
+    def __init__(self):
+        self._due = time.perf_counter()
+
+    async def wait(self, delay: float):
+        self._due += delay
+        remaining = self._due - time.perf_counter()
+        await asyncio.sleep(remaining if remaining > 0.001 else 0)
+
+
+# Roughly what the real services do.
+LLM_TIMING = FakeTiming(
+    ttfb_s=0.35,
+    ttfb_jitter_s=0.1,
+    rate=50,
+    rate_jitter=0.2)
+# 16kHz 16-bit audio at five times real time.
+TTS_TIMING = FakeTiming(
+    ttfb_s=0.2,
+    ttfb_jitter_s=0.05,
+    rate=160000,
+    rate_jitter=0.2)
+# Ten times real time.
+STT_TIMING = FakeTiming(
+    ttfb_s=0.1,
+    ttfb_jitter_s=0.03,
+    rate=320000,
+    rate_jitter=0.2)
+IMAGE_GEN_TIMING = FakeTiming(ttfb_s=1.0, ttfb_jitter_s=0.3)
+
+
+class FakeLLMService(LLMService):
+    """Streams a made-up response of `response_words` words, in sentences of
+    about `sentence_words` words, for each context it's given."""
+
+    consumed_frame_types = (OpenAILLMContextFrame, LLMMessagesQueueFrame)
+
+    def __init__(
+        self,
+        timing: FakeTiming = LLM_TIMING,
+        response_words: int = 30,
+        sentence_words: int = 10,
+        seed: int = 0,
+    ):
+        super().__init__()
+        self._timing = timing
+        self._response_words = response_words
+        self._sentence_words = sentence_words
+        self._rng = random.Random(seed)
+
+    def _response(self) -> List[str]:
+        tokens = []
+        for i in range(self._response_words):
+            word = self._rng.choice(_WORDS)
+            last_word = i == self._response_words - 1
+            if last_word or (i + 1) % self._sentence_words == 0:
+                word += "."
+            tokens.append(word if i == 0 else f" {word}")
+        return tokens
+
+    async def process_frame(self, frame: Frame) -> AsyncGenerator[Frame, None]:
+        yield LLMResponseStartFrame()
+        pacer = _Pacer()
+        await pacer.wait(self._timing.first_byte_delay(self._rng))
+        for token in self._response():
+            yield TextFrame(token)
+            await pacer.wait(self._timing.delay(self._rng, 1))
+        yield LLMResponseEndFrame()
+
+
+class FakeTTSService(TTSService):
+    """Produces `bytes_per_char` bytes of silence per character of text, in
+    chunks of `chunk_size` bytes. The default is about 15 characters a second
+    of 16kHz 16-bit audio."""
+
+    def __init__(
+        self,
+        timing: FakeTiming = TTS_TIMING,
+        bytes_per_char: int = 2134,
+        chunk_size: int = 3200,
+        seed: int = 0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._timing = timing
+        self._bytes_per_char = bytes_per_char
+        self._chunk_size = chunk_size
+        self._rng = random.Random(seed)
+
+    async def run_tts(self, text) -> AsyncGenerator[bytes, None]:
+        pacer = _Pacer()
+        await pacer.wait(self._timing.first_byte_delay(self._rng))
+        remaining = len(text) * self._bytes_per_char
+        remaining -= remaining % 2
+        while remaining > 0:
+            chunk_size = min(remaining, self._chunk_size)
+            yield bytes(chunk_size)
+            remaining -= chunk_size
+            await pacer.wait(self._timing.delay(self._rng, chunk_size))
+
+
+class FakeSTTService(STTService):
+    """Transcribes each AudioFrame as a made-up sentence of `words` words,
+    taking time in proportion to the length of the audio."""
+
+    consumed_frame_types = (AudioFrame,)
+
+    def __init__(
+        self,
+        timing: FakeTiming = STT_TIMING,
+        words: int = 8,
+        seed: int = 0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._timing = timing
+        self._words = words
+        self._rng = random.Random(seed)
+
+    async def run_stt(self, audio: BinaryIO) -> str:
+        audio_bytes = len(audio.read())
+        await asyncio.sleep(
+            self._timing.first_byte_delay(self._rng)
+            + self._timing.delay(self._rng, audio_bytes))
+        words = [self._rng.choice(_WORDS) for _ in range(self._words)]
+        return " ".join(words).capitalize() + "?"
+
+
+class FakeImageGenService(ImageGenService):
+    """Generates a flat grey RGB image of `image_size` for each prompt."""
+
+    def __init__(
+        self,
+        image_size=(256, 256),
+        timing: FakeTiming = IMAGE_GEN_TIMING,
+        seed: int = 0,
+        **kwargs,
+    ):
+        super().__init__(image_size, **kwargs)
+        self._timing = timing
+        self._rng = random.Random(seed)
+        self._image = bytes([128]) * (image_size[0] * image_size[1] * 3)
+        self._count = 0
+
+    async def run_image_gen(self, sentence: str) -> tuple[str, bytes]:
+        await asyncio.sleep(self._timing.first_byte_delay(self._rng))
+        self._count += 1
+        return (f"fake://image/{self._count}", self._image)
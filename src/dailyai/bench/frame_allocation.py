@@ -0,0 +1,198 @@
+"""Measure the memory and garbage collection cost of frames in a streaming
+LLM to TTS turn.
+
+Each turn is an LLMResponseStartFrame, a TextFrame per token, and for each
+sentence a TextFrame with the whole sentence followed by its audio in
+AudioFrames, then an LLMResponseEndFrame. The frames go through a two stage
+pipeline into a sink that isn't read until the end, as happens when TTS runs
+faster than real time and audio queues up in front of the transport.
+
+The turns are run twice: with the frame classes as they are, slotted, and
+with subclasses that have an instance __dict__, which is how frames used to
+be laid out. Either way a new control frame is made every time, as the LLM
+services do.
+
+    python -m dailyai.bench.frame_allocation --turns 500
+"""
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, Type
+
+from dailyai.pipeline.frame_processor import FrameEmitter, PushFrameProcessor
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    EndFrame,
+    Frame,
+    LLMMessagesQueueFrame,
+    LLMResponseEndFrame,
+    LLMResponseStartFrame,
+    TextFrame,
+)
+from dailyai.pipeline.pipeline import Pipeline
+
+# 100ms of 16kHz 16-bit audio. The same buffer is used for every chunk, so
+# only the frames themselves are measured.
+_AUDIO_CHUNK = bytes(3200)
+
+
+@dataclass
+class FrameKinds:
+    """The frame constructors a simulated turn uses."""
+    text: Callable[[str], TextFrame]
+    audio: Callable[[bytes], AudioFrame]
+    response_start: Callable[[], Frame]
+    response_end: Callable[[], Frame]
+
+
+def _with_dict(cls: Type[Frame]) -> Type[Frame]:
+    # A subclass that doesn't declare __slots__ gets an instance __dict__.
+    return type(cls.__name__, (cls,), {})
+
+
+LAYOUTS: Dict[str, FrameKinds] = {
+    "slots": FrameKinds(
+        TextFrame,
+        AudioFrame,
+        LLMResponseStartFrame,
+        LLMResponseEndFrame),
+    "dict": FrameKinds(
+        _with_dict(TextFrame),
+        _with_dict(AudioFrame),
+        _with_dict(LLMResponseStartFrame),
+        _with_dict(LLMResponseEndFrame)),
+}
+
+
+class _StreamingLLM(PushFrameProcessor):
+    def __init__(self, kinds: FrameKinds, words: int, sentence_words: int):
+        self._kinds = kinds
+        self._tokens = [
+            " word." if (i + 1) % sentence_words == 0 else " word"
+            for i in range(words)
+        ]
+
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
+        if not isinstance(frame, LLMMessagesQueueFrame):
+            await emit(frame)
+            return
+
+        await emit(self._kinds.response_start())
+        for token in self._tokens:
+            await emit(self._kinds.text(token))
+        await emit(self._kinds.response_end())
+
+
+class _SentenceTTS(PushFrameProcessor):
+    def __init__(self, kinds: FrameKinds, chunks_per_sentence: int):
+        self._kinds = kinds
+        self._chunks_per_sentence = chunks_per_sentence
+        self._sentence = ""
+
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
+        await emit(frame)
+        if isinstance(frame, TextFrame):
+            self._sentence += frame.text
+            if self._sentence.endswith("."):
+                await emit(self._kinds.text(self._sentence))
+                for _ in range(self._chunks_per_sentence):
+                    await emit(self._kinds.audio(_AUDIO_CHUNK))
+                self._sentence = ""
+
+
+@dataclass
+class AllocationResult:
+    layout: str
+    frames: int
+    elapsed_s: float
+    # Garbage collections of each generation, and the time spent in them.
+    collections: tuple[int, int, int]
+    gc_time_s: float
+    peak_memory_bytes: int
+
+    @property
+    def bytes_per_frame(self) -> float:
+        return self.peak_memory_bytes / self.frames if self.frames else 0.0
+
+
+async def _run_turns(kinds: FrameKinds, turns: int) -> int:
+    pipeline = Pipeline([
+        _StreamingLLM(kinds, words=30, sentence_words=10),
+        # About three seconds of audio per sentence.
+        _SentenceTTS(kinds, chunks_per_sentence=30),
+    ])
+    for _ in range(turns):
+        await pipeline.source.put(LLMMessagesQueueFrame([]))
+    await pipeline.source.put(EndFrame())
+    await pipeline.run_pipeline()
+    return pipeline.sink.qsize()
+
+
+async def measure(layout: str, turns: int) -> AllocationResult:
+    """Run `turns` turns with the named frame layout. They're run once for
+    time and garbage collections and once more under tracemalloc, which is
+    too slow to time anything by, for peak memory."""
+    kinds = LAYOUTS[layout]
+    gc_time = 0.0
+    gc_start = 0.0
+
+    def on_gc(phase: str, info: dict):
+        nonlocal gc_time, gc_start
+        if phase == "start":
+            gc_start = time.perf_counter()
+        else:
+            gc_time += time.perf_counter() - gc_start
+
+    gc.collect()
+    before = [stats["collections"] for stats in gc.get_stats()]
+    gc.callbacks.append(on_gc)
+    try:
+        start = time.perf_counter()
+        frames = await _run_turns(kinds, turns)
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.callbacks.remove(on_gc)
+    after = [stats["collections"] for stats in gc.get_stats()]
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        await _run_turns(kinds, turns)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return AllocationResult(
+        layout=layout,
+        frames=frames,
+        elapsed_s=elapsed,
+        collections=(
+            after[0] - before[0], after[1] - before[1], after[2] - before[2]),
+        gc_time_s=gc_time,
+        peak_memory_bytes=peak,
+    )
+
+
+async def main(turns: int):
+    print(
+        f"{'layout':<8} {'frames':>8} {'µs/frame':>9} {'B/frame':>8} "
+        f"{'gen0':>6} {'gen1':>6} {'gen2':>6} {'gc ms':>8}")
+    for layout in LAYOUTS:
+        result = await measure(layout, turns)
+        print(
+            f"{layout:<8} {result.frames:>8} "
+            f"{result.elapsed_s / result.frames * 1e6:>9.2f} "
+            f"{result.bytes_per_frame:>8.0f} "
+            f"{result.collections[0]:>6} {result.collections[1]:>6} "
+            f"{result.collections[2]:>6} {result.gc_time_s * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns))
@@ -0,0 +1,105 @@
+"""Measure how fast the frame codec encodes and decodes typical frames,
+compared with pickle.
+
+For each frame this reports the encoded size, the time to encode and to
+decode one frame, and round-trip throughput. A 20ms audio frame is on the
+real-time path: a bot sending audio over a socket encodes fifty of them a
+second per direction.
+
+    python -m dailyai.bench.frame_codec --iterations 100000
+"""
+
+import argparse
+import pickle
+import time
+from typing import Callable, Dict, List, Tuple
+
+from dailyai.pipeline.codec import decode_frame, encode_frame
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    Frame,
+    ImageFrame,
+    LLMMessagesQueueFrame,
+    TextFrame,
+    TranscriptionQueueFrame,
+)
+
+Codec = Tuple[Callable[[Frame], bytes], Callable[[bytes], Frame]]
+
+CODECS: Dict[str, Codec] = {
+    "codec": (encode_frame, decode_frame),
+    "pickle": (
+        lambda frame: pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL),
+        pickle.loads,
+    ),
+}
+
+
+def sample_frames() -> Dict[str, Frame]:
+    messages = [
+        {"role": "user" if i % 2 else "assistant",
+         "content": "What's the weather like tomorrow? " * 3}
+        for i in range(10)
+    ]
+    return {
+        "audio 20ms 16k mono": AudioFrame(bytes(640), 16000),
+        "audio 20ms 48k stereo": AudioFrame(bytes(3840), 48000, 2),
+        "text token": TextFrame(" tomorrow"),
+        "transcription": TranscriptionQueueFrame(
+            "What's the weather like tomorrow?", "participant-id",
+            "2024-01-01T00:00:00Z"),
+        "10 llm messages": LLMMessagesQueueFrame(messages),
+        "image 256x256": ImageFrame(None, bytes(256 * 256 * 3)),
+    }
+
+
+def _time_per_call(fn: Callable, arg, iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn(arg)
+    return (time.perf_counter_ns() - start) / iterations / 1e9
+
+
+def measure(codec: Codec, frame: Frame,
+            iterations: int) -> Tuple[int, float, float]:
+    """Returns the encoded size, and the seconds taken to encode and to
+    decode the frame."""
+    encode, decode = codec
+    encoded = encode(frame)
+    if decode(encoded) != frame:
+        raise AssertionError(f"{frame} didn't survive a round trip")
+    return (
+        len(encoded),
+        _time_per_call(encode, frame, iterations),
+        _time_per_call(decode, encoded, iterations),
+    )
+
+
+def main(iterations: int, codecs: List[str]):
+    print(
+        f"{'frame':<22} {'codec':<7} {'bytes':>8} {'enc µs':>8} {'dec µs':>8} "
+        f"{'MB/s':>8}")
+    for name, frame in sample_frames().items():
+        # Big frames take longer; scale so each one takes about as long.
+        frame_iterations = max(iterations // 100, 100) if isinstance(
+            frame, ImageFrame) else iterations
+        for codec_name in codecs:
+            size, encode_s, decode_s = measure(
+                CODECS[codec_name], frame, frame_iterations)
+            throughput = size / (encode_s + decode_s) / 1e6
+            print(
+                f"{name:<22} {codec_name:<7} {size:>8} "
+                f"{encode_s * 1e6:>8.2f} {decode_s * 1e6:>8.2f} "
+                f"{throughput:>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument(
+        "--codec",
+        action="append",
+        choices=list(CODECS),
+        help="only measure this codec (can be repeated)")
+    args = parser.parse_args()
+    main(args.iterations, args.codec or list(CODECS))
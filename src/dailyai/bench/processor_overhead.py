@@ -0,0 +1,102 @@
+"""Compare the per-frame overhead of the two frame processor styles.
+
+For each pipeline depth this runs the same number of frames through a chain of
+pass-through processors and reports the average time per frame for each of
+these. All three read frames from the source queue and run them in the turn
+scope, so only the way frames get from one processor to the next differs.
+
+- recursive: the original driver, which nests one async generator per stage
+- generator: process_frame processors, pushed through on_frame's adapter
+- push: PushFrameProcessor processors, which emit without a generator
+"""
+
+import argparse
+import asyncio
+import time
+from typing import AsyncGenerator, List, Type
+
+from dailyai.pipeline.frame_processor import (
+    FrameEmitter,
+    FrameProcessor,
+    PushFrameProcessor,
+)
+from dailyai.pipeline.frames import EndFrame, EndPipeFrame, Frame, TextFrame
+from dailyai.pipeline.pipeline import Pipeline
+
+
+class GeneratorPassThrough(FrameProcessor):
+    async def process_frame(self, frame: Frame) -> AsyncGenerator[Frame, None]:
+        yield frame
+
+
+class PushPassThrough(PushFrameProcessor):
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
+        await emit(frame)
+
+
+async def _run_recursively(
+    frame: Frame, processors: List[FrameProcessor]
+) -> AsyncGenerator[Frame, None]:
+    if processors:
+        async for output_frame in processors[0].process_frame(frame):
+            async for final_frame in _run_recursively(output_frame, processors[1:]):
+                yield final_frame
+    else:
+        yield frame
+
+
+class RecursivePipeline(Pipeline):
+    """A Pipeline with the original recursive driver in place of the on_frame
+    chain. Frames still come from the source queue and are processed in the
+    turn scope, so the only difference is how they're passed along."""
+
+    async def run_pipeline(self):
+        while True:
+            initial_frame = await self.source.get()
+            async with self.turn_scope.enter():
+                async for frame in _run_recursively(initial_frame, self.processors):
+                    await self.sink.put(frame)
+
+            if isinstance(initial_frame, (EndFrame, EndPipeFrame)):
+                break
+
+
+async def time_pipeline(
+    pipeline_class: Type[Pipeline],
+    processors: List[FrameProcessor],
+    frames: List[Frame],
+) -> float:
+    pipeline = pipeline_class(processors)
+    await pipeline.queue_frames(frames)
+    start = time.perf_counter()
+    await pipeline.run_pipeline()
+    return time.perf_counter() - start
+
+
+async def main(frame_count: int, max_depth: int):
+    frames: List[Frame] = [TextFrame("token") for _ in range(frame_count)]
+    frames.append(EndFrame())
+
+    print(f"{'depth':>5} {'recursive':>12} {'generator':>12} {'push':>12}  (µs/frame)")
+    for depth in range(1, max_depth + 1):
+        recursive = await time_pipeline(
+            RecursivePipeline,
+            [GeneratorPassThrough() for _ in range(depth)], frames)
+        generator = await time_pipeline(
+            Pipeline, [GeneratorPassThrough() for _ in range(depth)], frames)
+        push = await time_pipeline(
+            Pipeline, [PushPassThrough() for _ in range(depth)], frames)
+        print(
+            f"{depth:>5} "
+            f"{recursive / len(frames) * 1e6:>12.2f} "
+            f"{generator / len(frames) * 1e6:>12.2f} "
+            f"{push / len(frames) * 1e6:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--max-depth", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.frames, args.max_depth))
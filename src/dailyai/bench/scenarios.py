@@ -0,0 +1,259 @@
+"""Canned pipelines for benchmarking, driven the way a transport would drive
+them: user speech goes in, and the response is played out, one turn at a
+time."""
+
+import asyncio
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Type
+
+from dailyai.bench.fakes import (
+    IMAGE_GEN_TIMING,
+    LLM_TIMING,
+    STT_TIMING,
+    TTS_TIMING,
+    FakeImageGenService,
+    FakeLLMService,
+    FakeSTTService,
+    FakeTTSService,
+)
+from dailyai.pipeline.aggregators import (
+    LLMUserContextAggregator,
+    ParallelPipeline,
+    SentenceAggregator,
+    StreamingParallelPipeline,
+)
+from dailyai.pipeline.frame_processor import FrameProcessor
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    EndFrame,
+    Frame,
+    LLMMessagesQueueFrame,
+    LLMResponseEndFrame,
+    TextFrame,
+    TranscriptionQueueFrame,
+)
+from dailyai.pipeline.pipeline import Pipeline
+from dailyai.pipeline.tracing import TurnHop, TurnTracer
+
+# One and a half seconds of 16kHz 16-bit audio.
+_USER_SPEECH = bytes(48000)
+
+
+@dataclass
+class ScenarioConfig:
+    turns: int = 20
+    # Multiplies every fake service delay; 0 measures only pipeline overhead.
+    time_scale: float = 1.0
+    seed: int = 0
+    pipeline_class: Type[Pipeline] = Pipeline
+    measure_memory: bool = True
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    turns: int
+    interrupted_turns: int
+    frames: int
+    elapsed_s: float
+    # Percentiles (p50, p90, p99) of the time from the end of the user's
+    # speech to each hop, in seconds.
+    hop_percentiles: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    peak_memory_bytes: int | None = None
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed_s if self.elapsed_s else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "turns": self.turns,
+            "interrupted_turns": self.interrupted_turns,
+            "frames": self.frames,
+            "elapsed_s": self.elapsed_s,
+            "frames_per_second": self.frames_per_second,
+            "hop_percentiles": self.hop_percentiles,
+            "peak_memory_bytes": self.peak_memory_bytes,
+        }
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    build: Callable[[ScenarioConfig, TurnTracer], List[FrameProcessor]]
+    # The chance that the user interrupts a turn once the response has
+    # started playing.
+    interrupt_probability: float = 0.0
+
+
+def _conversation(
+    config: ScenarioConfig, tracer: TurnTracer
+) -> List[FrameProcessor]:
+    scale = config.time_scale
+    return [
+        FakeSTTService(STT_TIMING.scaled(scale), seed=config.seed),
+        tracer.tap(TurnHop.TRANSCRIPTION, (TranscriptionQueueFrame,)),
+        LLMUserContextAggregator([]),
+        tracer.tap(TurnHop.AGGREGATOR, (LLMMessagesQueueFrame,)),
+        FakeLLMService(LLM_TIMING.scaled(scale), seed=config.seed),
+        tracer.tap(TurnHop.LLM_FIRST_TOKEN, (TextFrame,)),
+    ]
+
+
+def single_turn(
+        config: ScenarioConfig,
+        tracer: TurnTracer) -> List[FrameProcessor]:
+    tts_timing = TTS_TIMING.scaled(config.time_scale)
+    return _conversation(config, tracer) + [
+        FakeTTSService(tts_timing, seed=config.seed),
+        tracer.tap(TurnHop.TTS_FIRST_BYTE, (AudioFrame,)),
+    ]
+
+
+def _parallel(
+    parallel_class: Type[FrameProcessor],
+) -> Callable[[ScenarioConfig, TurnTracer], List[FrameProcessor]]:
+    def build(
+            config: ScenarioConfig,
+            tracer: TurnTracer) -> List[FrameProcessor]:
+        scale = config.time_scale
+        tts_timing = TTS_TIMING.scaled(scale)
+        image_timing = IMAGE_GEN_TIMING.scaled(scale)
+        return _conversation(config, tracer) + [
+            SentenceAggregator(),
+            tracer.tap(TurnHop.FIRST_SENTENCE, (TextFrame,)),
+            parallel_class([
+                [FakeTTSService(tts_timing, seed=config.seed)],
+                [FakeImageGenService(timing=image_timing, seed=config.seed)],
+            ]),
+            tracer.tap(TurnHop.TTS_FIRST_BYTE, (AudioFrame,)),
+        ]
+
+    return build
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario for scenario in [
+        Scenario(
+            "single-turn",
+            "STT, LLM and TTS, each turn played out in full",
+            single_turn),
+        Scenario(
+            "interruptions",
+            "as single-turn, but the user interrupts most responses",
+            single_turn,
+            interrupt_probability=0.8),
+        Scenario(
+            "parallel",
+            "STT and LLM, then TTS and image generation in a ParallelPipeline",
+            _parallel(ParallelPipeline)),
+        Scenario(
+            "streaming-parallel",
+            "as parallel, with a StreamingParallelPipeline",
+            _parallel(StreamingParallelPipeline)),
+    ]
+}
+
+
+class _Playout:
+    """Stands in for a transport's output: takes frames off the pipeline's
+    sink, and marks the first audio of each response as written."""
+
+    def __init__(self, sink: asyncio.Queue, tracer: TurnTracer):
+        self.sink = sink
+        self.tracer = tracer
+        self.frames = 0
+        self.audio_started = asyncio.Event()
+        self.response_done = asyncio.Event()
+
+    def new_turn(self):
+        self.audio_started.clear()
+        self.response_done.clear()
+
+    def discard_queued(self):
+        while not self.sink.empty():
+            self.sink.get_nowait()
+
+    async def run(self):
+        while True:
+            frame: Frame = await self.sink.get()
+            self.frames += 1
+            if isinstance(frame, AudioFrame):
+                if not self.audio_started.is_set():
+                    self.tracer.mark(TurnHop.MIC_WRITE)
+                    self.audio_started.set()
+            elif isinstance(frame, LLMResponseEndFrame):
+                self.response_done.set()
+            elif isinstance(frame, EndFrame):
+                break
+
+
+async def _drive(scenario: Scenario, config: ScenarioConfig) -> ScenarioResult:
+    tracer = TurnTracer(max_turns=config.turns)
+    pipeline = config.pipeline_class(scenario.build(config, tracer))
+    playout = _Playout(pipeline.sink, tracer)
+    rng = random.Random(config.seed)
+    interrupted_turns = 0
+
+    start = time.perf_counter()
+    tasks = [
+        asyncio.create_task(pipeline.run_pipeline()),
+        asyncio.create_task(playout.run()),
+    ]
+    for _ in range(config.turns):
+        playout.new_turn()
+        tracer.mark(TurnHop.VAD_STOP)
+        await pipeline.source.put(AudioFrame(_USER_SPEECH))
+
+        if rng.random() < scenario.interrupt_probability:
+            await playout.audio_started.wait()
+            # Let the response play for a moment, as a user would.
+            await asyncio.sleep(rng.uniform(0, 0.5) * config.time_scale)
+            if not playout.response_done.is_set():
+                await pipeline.interrupt()
+                # Frames already queued for playout belong to the old turn.
+                playout.discard_queued()
+                interrupted_turns += 1
+                continue
+
+        await playout.response_done.wait()
+
+    await pipeline.source.put(EndFrame())
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    return ScenarioResult(
+        name=scenario.name,
+        turns=config.turns,
+        interrupted_turns=interrupted_turns,
+        frames=playout.frames,
+        elapsed_s=elapsed,
+        hop_percentiles={
+            hop.value: {
+                "p50": histogram.percentile(50),
+                "p90": histogram.percentile(90),
+                "p99": histogram.percentile(99),
+            }
+            for hop, histogram in tracer.histograms().items()
+        },
+    )
+
+
+async def run_scenario(name: str, config: ScenarioConfig) -> ScenarioResult:
+    """Run the named scenario, measuring peak Python memory use (with
+    tracemalloc, which slows things down) if the config asks for it."""
+    scenario = SCENARIOS[name]
+    if not config.measure_memory:
+        return await _drive(scenario, config)
+
+    tracemalloc.start()
+    try:
+        result = await _drive(scenario, config)
+        result.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result
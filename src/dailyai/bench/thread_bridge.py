@@ -0,0 +1,129 @@
+"""Measure handing frames from threads to the event loop, with a
+LoopFrameBridge and with asyncio.run_coroutine_threadsafe.
+
+Transport threads (audio input, VAD, the frame consumer, and the Daily
+client's callbacks) hand every frame they produce to an asyncio queue. This
+reports how many frames a second get across, and how late a coroutine that
+wakes up every millisecond runs while they do: the loop lag that every other
+task on the loop, like the pipeline, sees.
+
+    python -m dailyai.bench.thread_bridge --threads 4 --frames 20000
+    python -m dailyai.bench.thread_bridge --interval-ms 1   # paced, not a burst
+"""
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from dailyai.pipeline.frames import AudioFrame, Frame
+from dailyai.pipeline.queues import FrameQueue, LoopFrameBridge
+
+Put = Callable[[Frame], None]
+
+
+def _run_coroutine_threadsafe(
+        loop: asyncio.AbstractEventLoop, queue: asyncio.Queue) -> Put:
+    return lambda frame: asyncio.run_coroutine_threadsafe(
+        queue.put(frame), loop)
+
+
+def _bridge(loop: asyncio.AbstractEventLoop, queue: asyncio.Queue) -> Put:
+    return LoopFrameBridge(loop, queue).put
+
+
+MODES: Dict[str, Callable[[asyncio.AbstractEventLoop, asyncio.Queue], Put]] = {
+    "run_coroutine_threadsafe": _run_coroutine_threadsafe,
+    "bridge": _bridge,
+}
+
+
+@dataclass
+class BridgeResult:
+    frames_per_second: float
+    lag_p50_s: float
+    lag_p99_s: float
+    lag_max_s: float
+
+
+async def measure(
+    mode: str,
+    threads: int,
+    frames: int,
+    interval_s: float = 0.0,
+) -> BridgeResult:
+    """Have `threads` threads each put `frames` frames, `interval_s` apart,
+    and wait for all of them to reach the queue."""
+    loop = asyncio.get_running_loop()
+    queue = FrameQueue()
+    put = MODES[mode](loop, queue)
+    frame = AudioFrame(bytes(640))
+    lags: List[float] = []
+    done = asyncio.Event()
+
+    async def tick():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    def produce():
+        for _ in range(frames):
+            put(frame)
+            if interval_s:
+                time.sleep(interval_s)
+
+    ticker = asyncio.create_task(tick())
+    producers = [threading.Thread(target=produce) for _ in range(threads)]
+    start = time.perf_counter()
+    for producer in producers:
+        producer.start()
+    for _ in range(threads * frames):
+        await queue.get()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker
+    for producer in producers:
+        producer.join()
+
+    lags.sort()
+    if not lags:
+        lags = [0.0]
+    return BridgeResult(
+        frames_per_second=threads * frames / elapsed,
+        lag_p50_s=statistics.median(lags),
+        lag_p99_s=lags[min(int(len(lags) * 0.99), len(lags) - 1)],
+        lag_max_s=lags[-1],
+    )
+
+
+async def main(threads: int, frames: int, interval_s: float, modes: List[str]):
+    print(
+        f"{'mode':<26} {'frames/s':>10} {'lag p50 ms':>11} {'lag p99 ms':>11} "
+        f"{'lag max ms':>11}")
+    for mode in modes:
+        result = await measure(mode, threads, frames, interval_s)
+        print(
+            f"{mode:<26} {result.frames_per_second:>10.0f} "
+            f"{result.lag_p50_s * 1000:>11.2f} {result.lag_p99_s * 1000:>11.2f} "
+            f"{result.lag_max_s * 1000:>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=20000,
+                        help="frames put by each thread")
+    parser.add_argument("--interval-ms", type=float, default=0.0,
+                        help="time each thread waits between frames")
+    parser.add_argument(
+        "--mode",
+        action="append",
+        choices=list(MODES),
+        help="only measure this mode (can be repeated)")
+    args = parser.parse_args()
+    asyncio.run(main(args.threads, args.frames,
+                args.interval_ms / 1000, args.mode or list(MODES)))
@@ -0,0 +1,138 @@
+"""Measure what each VAD backend costs: how long the transport module takes
+to import, how long the backend takes to load and how much memory that
+adds, and how long it takes to run on one 96ms chunk.
+
+Each backend is measured in a fresh interpreter, so one backend's imports
+don't count towards another's. The ONNX backend needs a local copy of
+silero_vad.onnx; backends whose dependencies aren't installed are reported
+as unavailable.
+
+    python -m dailyai.bench.vad_backends --onnx-path silero_vad.onnx
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import List
+
+CHUNK_SAMPLES = 1536
+
+BACKENDS = ["energy", "silero", "silero-onnx"]
+
+
+@dataclass
+class VADBackendResult:
+    import_s: float
+    load_s: float
+    memory_mb: float
+    chunk_s: float
+
+
+def _make_model(backend: str, onnx_path: str | None):
+    from dailyai.services import vad
+    if backend == "energy":
+        return vad.EnergyVADModel()
+    if backend == "silero":
+        return vad.SileroVADModel()
+    if not onnx_path:
+        raise ValueError("silero-onnx needs --onnx-path")
+    return vad.SileroOnnxVADModel(onnx_path)
+
+
+def _max_rss_mb() -> float:
+    # Kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure_here(
+    backend: str, onnx_path: str | None, chunks: int
+) -> VADBackendResult:
+    start = time.perf_counter()
+    import dailyai.services.base_transport_service  # noqa: F401
+    import_s = time.perf_counter() - start
+
+    import numpy as np
+    rss = _max_rss_mb()
+    model = _make_model(backend, onnx_path)
+    start = time.perf_counter()
+    model.load()
+    load_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal((chunks, 1, CHUNK_SAMPLES)) * 0.1).astype(
+        np.float32)
+    state = model.initial_state()[None]
+    # The first run can be slow while the backend warms up.
+    _, state = model(audio[0], state)
+    start = time.perf_counter()
+    for chunk in audio:
+        _, state = model(chunk, state)
+    chunk_s = (time.perf_counter() - start) / chunks
+
+    return VADBackendResult(
+        import_s=import_s,
+        load_s=load_s,
+        memory_mb=_max_rss_mb() - rss,
+        chunk_s=chunk_s,
+    )
+
+
+def measure(
+    backend: str, onnx_path: str | None = None, chunks: int = 200
+) -> VADBackendResult:
+    """Measure `backend` in a new interpreter. Raises RuntimeError if it
+    can't be loaded there."""
+    command = [
+        sys.executable, "-m", "dailyai.bench.vad_backends",
+        "--child", backend,
+        "--onnx-path", onnx_path or "",
+        "--chunks", str(chunks),
+    ]
+    # The new interpreter imports dailyai from wherever this one did.
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    process = subprocess.run(
+        command, capture_output=True, text=True, env=env)
+    if process.returncode:
+        error = process.stderr.strip().splitlines() or ["failed"]
+        raise RuntimeError(error[-1])
+    return VADBackendResult(**json.loads(process.stdout.splitlines()[-1]))
+
+
+def main(backends: List[str], onnx_path: str | None, chunks: int):
+    print(
+        f"{'backend':<12} {'import ms':>10} {'load ms':>10} {'+MB':>8} "
+        f"{'us/chunk':>10}")
+    for backend in backends:
+        try:
+            result = measure(backend, onnx_path, chunks)
+        except RuntimeError as e:
+            print(f"{backend:<12} unavailable: {e}")
+            continue
+        print(
+            f"{backend:<12} {result.import_s * 1000:>10.1f} "
+            f"{result.load_s * 1000:>10.1f} {result.memory_mb:>8.1f} "
+            f"{result.chunk_s * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=BACKENDS,
+        help="only measure this backend (can be repeated)")
+    parser.add_argument("--onnx-path", help="path to silero_vad.onnx")
+    parser.add_argument("--chunks", type=int, default=200,
+                        help="chunks to time each backend on")
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        result = _measure_here(args.child, args.onnx_path, args.chunks)
+        print(json.dumps(result.__dict__))
+    else:
+        main(args.backend or BACKENDS, args.onnx_path, args.chunks)
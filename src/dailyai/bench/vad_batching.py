@@ -0,0 +1,142 @@
+"""Measure running Silero VAD for many sessions in one process: a thread
+per session, each running the model on its own chunks (as transports do by
+default), against one BatchedVADEngine for all of them.
+
+Each session submits a 96ms chunk of audio at a time, as fast as its
+chunks are handled. This reports chunks per second across all sessions, and
+how long each chunk waits for its result. Needs torch.
+
+    python -m dailyai.bench.vad_batching --sessions 30 --chunks 100
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List
+
+import numpy as np
+
+from dailyai.services.vad import BatchedVADEngine, SileroVADModel
+
+CHUNK_SAMPLES = 1536
+
+MODES = ["threads", "engine"]
+
+
+@dataclass
+class VADBatchingResult:
+    chunks_per_second: float
+    latency_p50_s: float
+    latency_p99_s: float
+    mean_batch_size: float
+
+
+def _session_audio(chunks: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal((chunks, CHUNK_SAMPLES)) * 0.1).astype(
+        np.float32)
+
+
+def _run_threads(
+    model: Callable, audio: List[np.ndarray], latencies: List[float]
+):
+    lock = threading.Lock()
+
+    def session(chunks: np.ndarray):
+        state = model.initial_state()[None]
+        for chunk in chunks:
+            start = time.perf_counter()
+            with lock:
+                # The transports share one model, which isn't thread-safe.
+                _, state = model(chunk[None], state)
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(chunks,))
+               for chunks in audio]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def _run_engine(
+    engine: BatchedVADEngine, audio: List[np.ndarray], latencies: List[float]
+):
+    def session(chunks: np.ndarray):
+        done = threading.Event()
+        stream = engine.register(lambda probability: done.set())
+        for chunk in chunks:
+            start = time.perf_counter()
+            done.clear()
+            stream.submit(chunk)
+            done.wait()
+            latencies.append(time.perf_counter() - start)
+        stream.close()
+
+    threads = [threading.Thread(target=session, args=(chunks,))
+               for chunks in audio]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def measure(
+    mode: str,
+    sessions: int,
+    chunks: int,
+    model: Callable | None = None,
+) -> VADBatchingResult:
+    model = model or SileroVADModel()
+    audio = [_session_audio(chunks, seed) for seed in range(sessions)]
+    latencies: List[float] = []
+    engine = None
+    start = time.perf_counter()
+    if mode == "threads":
+        _run_threads(model, audio, latencies)
+    else:
+        engine = BatchedVADEngine(model)
+        _run_engine(engine, audio, latencies)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return VADBatchingResult(
+        chunks_per_second=sessions * chunks / elapsed,
+        latency_p50_s=statistics.median(latencies),
+        latency_p99_s=latencies[min(int(len(latencies) * 0.99),
+                                    len(latencies) - 1)],
+        mean_batch_size=engine.chunks / engine.batches if engine else 1.0,
+    )
+
+
+def main(sessions: int, chunks: int, modes: List[str]):
+    model = SileroVADModel()
+    # Load the model before timing anything.
+    model(np.zeros((1, CHUNK_SAMPLES), np.float32),
+          model.initial_state()[None])
+    print(
+        f"{'mode':<8} {'chunks/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'batch':>6}")
+    for mode in modes:
+        result = measure(mode, sessions, chunks, model)
+        print(
+            f"{mode:<8} {result.chunks_per_second:>10.0f} "
+            f"{result.latency_p50_s * 1000:>8.2f} "
+            f"{result.latency_p99_s * 1000:>8.2f} "
+            f"{result.mean_batch_size:>6.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--chunks", type=int, default=100,
+                        help="chunks of audio per session")
+    parser.add_argument(
+        "--mode",
+        action="append",
+        choices=MODES,
+        help="only measure this mode (can be repeated)")
+    args = parser.parse_args()
+    main(args.sessions, args.chunks, args.mode or MODES)
@@ -0,0 +1,201 @@
+"""Measure the VAD pre-gate: how much CPU a session costs while the user is
+silent, and when the user is heard to start and stop speaking, with the
+model run on every chunk against the model behind a GatedVADModel.
+
+The session is room noise with stretches of speech in it: by default a
+synthetic voice (a buzz at a pitch that wanders, in syllables), or with
+--speech, a 16kHz mono 16-bit wav of someone talking. Latencies are from
+the start or end of each stretch of speech to the chunk the state machine
+reports it on, with the transport's default vad_start_s and vad_stop_s.
+Needs torch, unless measure() is given another model.
+
+    python -m dailyai.bench.vad_gate --idle-seconds 60
+"""
+
+import argparse
+import statistics
+import time
+import wave
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+from dailyai.pipeline.frames import UserStartedSpeakingFrame
+from dailyai.services.vad import (
+    GatedVADModel,
+    SileroVADModel,
+    VADModel,
+    VADStateMachine,
+)
+
+SAMPLE_RATE = 16000
+CHUNK_SAMPLES = 1536
+START_FRAMES = 2
+STOP_FRAMES = 8
+
+MODES = ["ungated", "gated"]
+
+
+@dataclass
+class VADGateResult:
+    # CPU seconds per second of silent audio.
+    idle_cpu: float
+    # The fraction of silent chunks the model ran on.
+    idle_model_fraction: float
+    start_latency_s: float
+    stop_latency_s: float
+    missed: int
+
+
+def _noise(samples: int, level_db: float, rng) -> np.ndarray:
+    # Pinkish noise: white noise through a one-pole low-pass.
+    white = rng.standard_normal(samples)
+    pink = np.empty(samples)
+    pink[0] = white[0]
+    alpha = 0.9
+    pink[1:] = white[1:] * (1 - alpha)
+    for i in range(1, samples):
+        pink[i] += alpha * pink[i - 1]
+    pink *= 10 ** (level_db / 20) / np.sqrt(np.mean(pink ** 2))
+    return pink
+
+
+def _voice(samples: int, rng) -> np.ndarray:
+    t = np.arange(samples) / SAMPLE_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t + rng.uniform(0, 6))
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    buzz = sum(np.sin(h * phase) / h for h in range(1, 12))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t) + 0.3, 0, None)
+    voice = buzz * syllables
+    return voice * 10 ** (-20 / 20) / np.sqrt(np.mean(voice ** 2))
+
+
+def _read_speech(path: str) -> np.ndarray:
+    with wave.open(path) as f:
+        if (f.getframerate(), f.getnchannels(), f.getsampwidth()) != (
+                SAMPLE_RATE, 1, 2):
+            raise ValueError(f"{path} isn't 16kHz mono 16-bit audio")
+        data = f.readframes(f.getnframes())
+    return np.frombuffer(data, dtype=np.int16) / 32768
+
+
+def _session(
+    speech: np.ndarray | None, rng
+) -> Tuple[np.ndarray, List[Tuple[float, float]]]:
+    """Audio of noise with speech in it, and where the speech is."""
+    pieces = []
+    segments = []
+    position = 0
+    for silence_s, speech_s in [(3, 2), (3, 1.5), (3, 3), (3, 0)]:
+        pieces.append(np.zeros(int(silence_s * SAMPLE_RATE)))
+        position += len(pieces[-1])
+        if speech_s:
+            samples = int(speech_s * SAMPLE_RATE)
+            if speech is None:
+                pieces.append(_voice(samples, rng))
+            else:
+                start = rng.integers(0, max(len(speech) - samples, 1))
+                pieces.append(speech[start:start + samples])
+            segments.append((position / SAMPLE_RATE,
+                             (position + len(pieces[-1])) / SAMPLE_RATE))
+            position += len(pieces[-1])
+    audio = np.concatenate(pieces)
+    audio += _noise(len(audio), -55, rng)
+    return audio.astype(np.float32), segments
+
+
+def _chunks(audio: np.ndarray) -> np.ndarray:
+    count = len(audio) // CHUNK_SAMPLES
+    return audio[:count * CHUNK_SAMPLES].reshape(count, 1, CHUNK_SAMPLES)
+
+
+def _events(model: VADModel, audio: np.ndarray) -> List[Tuple[bool, float]]:
+    """Run the model a chunk at a time, as a transport's VAD thread does.
+    Returns (started, time) for each start and stop."""
+    machine = VADStateMachine(START_FRAMES, STOP_FRAMES)
+    state = model.initial_state()[None]
+    events = []
+    for i, chunk in enumerate(_chunks(audio)):
+        probabilities, state = model(chunk, state)
+        frame = machine.update(probabilities[0] > 0.5)
+        if frame:
+            events.append((isinstance(frame, UserStartedSpeakingFrame),
+                           (i + 1) * CHUNK_SAMPLES / SAMPLE_RATE))
+    return events
+
+
+def measure(
+    mode: str,
+    idle_seconds: float = 30,
+    model: VADModel | None = None,
+    speech: np.ndarray | None = None,
+) -> VADGateResult:
+    model = model or SileroVADModel()
+    model.load()
+    if mode == "gated":
+        model = GatedVADModel(model)
+    rng = np.random.default_rng(0)
+
+    idle = _noise(int(idle_seconds * SAMPLE_RATE), -55, rng).astype(
+        np.float32)
+    state = model.initial_state()[None]
+    start = time.process_time()
+    for chunk in _chunks(idle):
+        _, state = model(chunk, state)
+    idle_cpu = (time.process_time() - start) / idle_seconds
+    idle_model_fraction = (
+        model.model_chunks / model.chunks if mode == "gated" else 1.0)
+
+    audio, segments = _session(speech, rng)
+    events = _events(model, audio)
+    start_latencies = []
+    stop_latencies = []
+    missed = 0
+    for segment_start, segment_end in segments:
+        starts = [t for started, t in events
+                  if started and segment_start <= t <= segment_end]
+        stops = [t for started, t in events
+                 if not started and t >= segment_end]
+        if not starts or not stops:
+            missed += 1
+            continue
+        start_latencies.append(starts[0] - segment_start)
+        stop_latencies.append(stops[0] - segment_end)
+
+    return VADGateResult(
+        idle_cpu=idle_cpu,
+        idle_model_fraction=idle_model_fraction,
+        start_latency_s=statistics.mean(start_latencies or [float("nan")]),
+        stop_latency_s=statistics.mean(stop_latencies or [float("nan")]),
+        missed=missed,
+    )
+
+
+def main(modes: List[str], idle_seconds: float, speech_path: str | None):
+    speech = _read_speech(speech_path) if speech_path else None
+    model = SileroVADModel()
+    print(
+        f"{'mode':<8} {'idle CPU %':>10} {'model %':>8} {'start ms':>9} "
+        f"{'stop ms':>8} {'missed':>6}")
+    for mode in modes:
+        result = measure(mode, idle_seconds, model, speech)
+        print(
+            f"{mode:<8} {result.idle_cpu * 100:>10.3f} "
+            f"{result.idle_model_fraction * 100:>8.1f} "
+            f"{result.start_latency_s * 1000:>9.0f} "
+            f"{result.stop_latency_s * 1000:>8.0f} {result.missed:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--idle-seconds", type=float, default=30,
+                        help="seconds of silence to measure CPU on")
+    parser.add_argument("--speech", help="a 16kHz mono wav of speech")
+    parser.add_argument(
+        "--mode",
+        action="append",
+        choices=MODES,
+        help="only measure this mode (can be repeated)")
+    args = parser.parse_args()
+    main(args.mode or MODES, args.idle_seconds, args.speech)
@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import re
 
 from dailyai.pipeline.frame_processor import FrameProcessor
@@ -20,7 +21,7 @@ from dailyai.pipeline.frames import (
 from dailyai.pipeline.pipeline import Pipeline
 from dailyai.services.ai_services import AIService
 
-from typing import AsyncGenerator, Callable, Coroutine, List
+from typing import AsyncGenerator, Callable, Coroutine, Dict, List, Tuple, Type
 
 from dailyai.services.openai_llm_context import OpenAILLMContext
 
@@ -94,6 +95,8 @@ class UserResponseAggregator(ResponseAggregator):
 
 
 class LLMContextAggregator(AIService):
+    consumed_frame_types = (TextFrame,)
+
     def __init__(
         self,
         messages: list[dict],
@@ -192,6 +195,8 @@ class SentenceAggregator(FrameProcessor):
     Hello, world.
     """
 
+    consumed_frame_types = (TextFrame, EndFrame)
+
     def __init__(self):
         self.aggregation = ""
 
@@ -248,6 +253,8 @@ class LLMFullResponseAggregator(FrameProcessor):
     LLMResponseEndFrame
     """
 
+    consumed_frame_types = (TextFrame, LLMResponseEndFrame)
+
     def __init__(self):
         self.aggregation = ""
 
@@ -274,6 +281,8 @@ class StatelessTextTransformer(FrameProcessor):
     HELLO
     """
 
+    consumed_frame_types = (TextFrame,)
+
     def __init__(self, transform_fn):
         self.transform_fn = transform_fn
 
@@ -344,6 +353,216 @@ class ParallelPipeline(FrameProcessor):
                 yield frame
 
 
+class _BranchDone:
+    """Put on a StreamingParallelPipeline's sink by a branch once it has
+    finished with a frame. Carries the exception if processing failed."""
+
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+
+
+class StreamingParallelPipeline(FrameProcessor):
+    """Run multiple pipelines in parallel, streaming their output.
+
+    Like ParallelPipeline, each frame is sent to every sub-pipeline and the
+    output of all of them is merged, with no ordering guarantees between
+    sub-pipelines. Unlike ParallelPipeline:
+
+    - the sub-pipelines run in long-lived tasks, started on the first frame,
+      instead of being run to completion for every frame. They don't get an
+      EndPipeFrame after each frame, so stateful processors (eg. a
+      SentenceAggregator) keep their state from one frame to the next.
+    - frames are yielded as soon as any sub-pipeline produces them, so a fast
+      sub-pipeline's output isn't held back by a slow one. The next frame is
+      sent to the sub-pipelines once all of them have finished the current
+      one.
+
+    Since frame handlers pass through unhandled frames by convention, the
+    frame being processed is yielded only the first time a sub-pipeline
+    passes it through. Only that one frame is tracked, so de-duping costs
+    the same no matter how long the pipeline runs.
+
+    The sub-pipelines are stopped after an EndFrame or EndPipeFrame has been
+    processed, or when the pipeline is interrupted, and started again by the
+    next frame.
+    """
+
+    def __init__(self, pipeline_definitions: List[List[FrameProcessor]]):
+        self.sources = [asyncio.Queue() for _ in pipeline_definitions]
+        self.sink: asyncio.Queue[Frame | _BranchDone] = asyncio.Queue()
+        self.pipelines: list[Pipeline] = [
+            Pipeline(
+                pipeline_definition,
+                source,
+                self.sink,
+            )
+            for source, pipeline_definition in zip(self.sources, pipeline_definitions)
+        ]
+        self._branch_tasks: list[asyncio.Task] = []
+        self._all_branches = list(range(len(self.pipelines)))
+
+    async def process_frame(self, frame: Frame) -> AsyncGenerator[Frame, None]:
+        if not self._branch_tasks:
+            self._branch_tasks = [
+                asyncio.create_task(self._run_branch(pipeline))
+                for pipeline in self.pipelines
+            ]
+
+        branches = self._select_branches(frame)
+        if not branches:
+            yield frame
+            return
+
+        for branch in branches:
+            await self.sources[branch].put(frame)
+
+        pending_branches = len(branches)
+        passed_through = False
+        while pending_branches:
+            output = await self.sink.get()
+            if isinstance(output, _BranchDone):
+                if output.error:
+                    await self._stop_branches()
+                    raise output.error
+                pending_branches -= 1
+                continue
+
+            if output is frame:
+                if passed_through:
+                    continue
+                passed_through = True
+
+            yield output
+
+        if isinstance(frame, EndFrame) or isinstance(frame, EndPipeFrame):
+            await self._stop_branches()
+
+    def _select_branches(self, frame: Frame) -> List[int]:
+        """Returns the indexes of the sub-pipelines a frame is sent to."""
+        return self._all_branches
+
+    async def interrupted(self) -> None:
+        await self._stop_branches()
+        for source in self.sources:
+            while not source.empty():
+                source.get_nowait()
+        while not self.sink.empty():
+            self.sink.get_nowait()
+        for pipeline in self.pipelines:
+            for processor in pipeline.processors:
+                await processor.interrupted()
+
+    async def _run_branch(self, pipeline: Pipeline):
+        push_frame = pipeline._build_emitter_chain()
+        while True:
+            frame = await pipeline.source.get()
+            try:
+                await push_frame(frame)
+            except Exception as e:
+                await self.sink.put(_BranchDone(e))
+                break
+            await self.sink.put(_BranchDone())
+
+    async def _stop_branches(self):
+        for task in self._branch_tasks:
+            task.cancel()
+        await asyncio.gather(*self._branch_tasks, return_exceptions=True)
+        self._branch_tasks = []
+
+
+class FrameRouter(StreamingParallelPipeline):
+    """Send each frame only to the sub-pipelines that want it.
+
+    Each route is a frame matcher and a list of frame processors. A matcher
+    is a Frame class, a tuple of Frame classes, or a function that takes a
+    frame and returns a bool. A frame goes to the first route that matches
+    it, or to every matching route if `route_to_all_matches` is set. Frames
+    that match no route are yielded unchanged, without visiting any
+    sub-pipeline. EndFrames and EndPipeFrames go to every route, so all the
+    sub-pipelines can finish up.
+
+    Output is merged as it's produced, as with StreamingParallelPipeline.
+    When the sub-pipelines handle mostly different frame types (eg. audio,
+    images and text), this avoids doing the work of every sub-pipeline for
+    every frame, and de-duping the results.
+
+    >>> async def print_frames(router, frames):
+    ...     for frame in frames:
+    ...         async for frame in router.process_frame(frame):
+    ...             print(frame)
+
+    >>> router = FrameRouter([
+    ...     (lambda f: isinstance(f, TextFrame) and f.text.endswith("!"),
+    ...      [StatelessTextTransformer(lambda x: x.upper())]),
+    ...     (TextFrame, [StatelessTextTransformer(lambda x: x.lower())]),
+    ... ])
+    >>> asyncio.run(print_frames(router, [
+    ...     TextFrame("Hello!"),
+    ...     TextFrame("Quiet"),
+    ...     ImageFrame(url=None, image=bytes([])),
+    ...     EndFrame(),
+    ... ]))
+    TextFrame: "HELLO!"
+    TextFrame: "quiet"
+    ImageFrame, url: None, image size: 0 B
+    EndFrame
+    """
+
+    def __init__(
+        self,
+        routes: List[
+            Tuple[
+                Type[Frame] | Tuple[Type[Frame], ...] | Callable[[Frame], bool],
+                List[FrameProcessor],
+            ]
+        ],
+        route_to_all_matches: bool = False,
+    ):
+        super().__init__([processors for _, processors in routes])
+        self._route_to_all_matches = route_to_all_matches
+        self._matchers: List[Callable[[Frame], bool]] = []
+        type_routes_only = True
+        for matcher, _ in routes:
+            if isinstance(matcher, (type, tuple)):
+                self._matchers.append(
+                    functools.partial(_is_instance, frame_types=matcher))
+            else:
+                self._matchers.append(matcher)
+                type_routes_only = False
+
+        # With only type-based routes, the branches depend on nothing but the
+        # frame's class, so we can remember them.
+        self._branches_by_type: Dict[Type[Frame], List[int]] | None = (
+            {} if type_routes_only else None
+        )
+
+    def _select_branches(self, frame: Frame) -> List[int]:
+        if isinstance(frame, EndFrame) or isinstance(frame, EndPipeFrame):
+            return self._all_branches
+
+        if self._branches_by_type is not None:
+            branches = self._branches_by_type.get(frame.__class__)
+            if branches is None:
+                branches = self._match(frame)
+                self._branches_by_type[frame.__class__] = branches
+            return branches
+
+        return self._match(frame)
+
+    def _match(self, frame: Frame) -> List[int]:
+        branches = []
+        for branch, matcher in enumerate(self._matchers):
+            if matcher(frame):
+                branches.append(branch)
+                if not self._route_to_all_matches:
+                    break
+        return branches
+
+
+def _is_instance(frame: Frame, frame_types) -> bool:
+    return isinstance(frame, frame_types)
+
+
 class GatedAggregator(FrameProcessor):
     """Accumulate frames, with custom functions to start and stop accumulation.
     Yields gate-opening frame before any accumulated frames, then ensuing frames
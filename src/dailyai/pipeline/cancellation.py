@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class TurnScope:
+    """Tracks the work being done for the current turn of a conversation, so an
+    interruption can cancel that work without tearing down the tasks doing it.
+
+    Code that works on a turn does so inside `async with scope.enter():`. A
+    call to cancel() cancels every task that's inside the scope at that moment;
+    the CancelledError unwinds whatever the task was awaiting (an LLM stream, an
+    HTTP request, a thread job) and is swallowed when it reaches the `async
+    with`, so the task carries on with the next frame. Cancellation that
+    comes from anywhere else propagates as usual.
+
+    >>> import asyncio
+    >>> async def main():
+    ...     scope = TurnScope()
+    ...     async def turn():
+    ...         async with scope.enter():
+    ...             await asyncio.sleep(10)
+    ...         return "still running"
+    ...     task = asyncio.create_task(turn())
+    ...     await asyncio.sleep(0)
+    ...     scope.cancel()
+    ...     print(await task)
+    >>> asyncio.run(main())
+    still running
+    """
+
+    def __init__(self):
+        self._active: Dict[asyncio.Task, "_TurnScopeEntry"] = {}
+
+    def enter(self) -> "_TurnScopeEntry":
+        """Return an async context manager that runs its body as part of the
+        current turn."""
+        return _TurnScopeEntry(self)
+
+    def cancel(self) -> int:
+        """Cancel the work for the current turn, and return how many tasks were
+        cancelled. The calling task is never cancelled, even if it's inside the
+        scope, so a processor can end its own turn."""
+        current_task = asyncio.current_task()
+        cancelled = 0
+        for task, entry in list(self._active.items()):
+            if task is current_task or task.done() or entry.cancelled:
+                continue
+            entry.cancelled = True
+            task.cancel()
+            cancelled += 1
+        return cancelled
+
+
+class _TurnScopeEntry:
+    def __init__(self, scope: TurnScope):
+        self._scope = scope
+        self._task: asyncio.Task | None = None
+        self.cancelled = False
+
+    async def __aenter__(self):
+        task = asyncio.current_task()
+        if task is None or task in self._scope._active:
+            # Nested entries in the same task belong to the outer one.
+            return self
+        self._task = task
+        self._scope._active[task] = self
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        if self._task is None:
+            return False
+        del self._scope._active[self._task]
+        if not self.cancelled:
+            return False
+
+        # Take back our own cancel request. If something else also cancelled
+        # the task, let the CancelledError through.
+        uncancel = getattr(self._task, "uncancel", None)
+        remaining = uncancel() if uncancel else 0
+        return exc_type is asyncio.CancelledError and remaining == 0
+
+
+async def to_thread_cancellable(
+    func: Callable[..., T], *args: Any, **kwargs: Any
+) -> T:
+    """Like asyncio.to_thread, but `func` is also passed a `cancelled` keyword
+    argument: a threading.Event that's set if the awaiting task is cancelled.
+    A thread can't be interrupted, so long-running jobs should check it and
+    return early, rather than keep burning CPU on a turn nobody's waiting
+    for."""
+    cancelled = threading.Event()
+    try:
+        return await asyncio.to_thread(func, *args, cancelled=cancelled, **kwargs)
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
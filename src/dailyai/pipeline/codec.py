@@ -0,0 +1,400 @@
+"""A compact binary encoding for frames, for sending them between processes
+or hosts and for storing them.
+
+An encoded frame is a version byte, a 16-bit frame type id and the frame's
+payload. The encoding doesn't include its own length, so messages need to be
+delimited by whatever carries them.
+
+Each frame class is registered with a type id. Most frames are encoded field
+by field, with a small tagged format for the values: None, bools, ints,
+floats, strings, bytes, and lists and dicts of those. A list or dict that
+holds only JSON values (eg. LLM messages) is stored as JSON, which is much
+quicker to encode and decode; as in JSON, its dict keys become strings and
+tuples become lists. An AudioFrame is
+encoded as its format followed by the raw samples, and decoding one doesn't
+copy the samples: the frame's data is a view of the buffer passed to
+decode(), so don't reuse that buffer afterwards.
+
+Frame classes defined by an app have to be registered before they can be
+encoded, with an id of FIRST_APP_TYPE_ID or higher, eg.
+
+    register_frame_type(StoryPageFrame, FIRST_APP_TYPE_ID)
+
+A subclass of a dataclass frame that adds no data (like StoryPageFrame, a
+TextFrame) or that is a dataclass itself is encoded like any other; for
+anything else, pass `encode` and `decode` functions.
+"""
+
+import dataclasses
+import json
+import struct
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple, Type
+
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    EndFrame,
+    EndPipeFrame,
+    Frame,
+    ImageFrame,
+    LLMFunctionCallFrame,
+    LLMFunctionStartFrame,
+    LLMMessagesQueueFrame,
+    LLMResponseEndFrame,
+    LLMResponseStartFrame,
+    OpenAILLMContextFrame,
+    PipelineStartedFrame,
+    ReceivedAppMessageFrame,
+    SendAppMessageFrame,
+    SpriteFrame,
+    StartFrame,
+    TextFrame,
+    TranscriptionQueueFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from dailyai.services.openai_llm_context import OpenAILLMContext
+
+# Bump this when the encoding of any frame changes.
+FORMAT_VERSION = 1
+# Type ids below this are reserved for the frames in dailyai.
+FIRST_APP_TYPE_ID = 1024
+
+_AUDIO_TYPE_ID = 16
+_OPENAI_CONTEXT_TYPE_ID = 22
+
+_HEADER = struct.Struct("<BH")
+# The version and type id again, so an AudioFrame is packed in one go.
+_AUDIO_HEADER = struct.Struct("<BHIBB")
+_AUDIO_FORMAT = struct.Struct("<IBB")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+
+_NONE = 0
+_FALSE = 1
+_TRUE = 2
+_INT = 3
+_FLOAT = 4
+_STR = 5
+_BYTES = 6
+_LIST = 7
+_DICT = 8
+_JSON = 9
+
+_json_encoder = json.JSONEncoder(
+    ensure_ascii=False, check_circular=False, separators=(",", ":"))
+
+FrameEncoder = Callable[[Frame], bytes]
+FrameDecoder = Callable[[memoryview], Frame]
+
+
+class FrameCodecError(Exception):
+    pass
+
+
+def _write_value(out: bytearray, value: Any) -> None:
+    if value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, int):
+        out.append(_INT)
+        try:
+            out += _I64.pack(value)
+        except struct.error:
+            raise FrameCodecError(f"Integer out of range: {value}")
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += _F64.pack(value)
+    elif isinstance(value, str):
+        encoded = value.encode()
+        out.append(_STR)
+        out += _U32.pack(len(encoded))
+        out += encoded
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        out.append(_BYTES)
+        out += _U32.pack(len(value))
+        out += value
+    elif isinstance(value, (list, tuple, dict)) and _write_json(out, value):
+        pass
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        out += _U32.pack(len(value))
+        for item in value:
+            _write_value(out, item)
+    elif isinstance(value, dict):
+        out.append(_DICT)
+        out += _U32.pack(len(value))
+        for key, item in value.items():
+            _write_value(out, key)
+            _write_value(out, item)
+    else:
+        raise FrameCodecError(
+            f"Can't encode a value of type {value.__class__.__name__}")
+
+
+def _write_json(out: bytearray, value: Any) -> bool:
+    try:
+        encoded = _json_encoder.encode(value).encode()
+    except (TypeError, ValueError):
+        # Bytes, or something else JSON can't hold.
+        return False
+    out.append(_JSON)
+    out += _U32.pack(len(encoded))
+    out += encoded
+    return True
+
+
+def _read_value(data: memoryview, offset: int) -> Tuple[Any, int]:
+    try:
+        tag = data[offset]
+        offset += 1
+        if tag == _NONE:
+            return (None, offset)
+        if tag == _TRUE:
+            return (True, offset)
+        if tag == _FALSE:
+            return (False, offset)
+        if tag == _INT:
+            return (_I64.unpack_from(data, offset)[0], offset + _I64.size)
+        if tag == _FLOAT:
+            return (_F64.unpack_from(data, offset)[0], offset + _F64.size)
+        if tag in (_STR, _BYTES, _JSON):
+            (length,) = _U32.unpack_from(data, offset)
+            offset += _U32.size
+            end = offset + length
+            if end > len(data):
+                raise FrameCodecError("Encoded frame is truncated")
+            raw = bytes(data[offset:end])
+            if tag == _BYTES:
+                return (raw, end)
+            if tag == _STR:
+                return (raw.decode(), end)
+            return (json.loads(raw), end)
+        if tag == _LIST:
+            (count,) = _U32.unpack_from(data, offset)
+            offset += _U32.size
+            items = []
+            for _ in range(count):
+                item, offset = _read_value(data, offset)
+                items.append(item)
+            return (items, offset)
+        if tag == _DICT:
+            (count,) = _U32.unpack_from(data, offset)
+            offset += _U32.size
+            mapping = {}
+            for _ in range(count):
+                key, offset = _read_value(data, offset)
+                mapping[key], offset = _read_value(data, offset)
+            return (mapping, offset)
+    except (IndexError, struct.error):
+        raise FrameCodecError("Encoded frame is truncated")
+    raise FrameCodecError(f"Unknown value tag {tag}")
+
+
+def _encode_values(values: List[Any]) -> bytes:
+    out = bytearray()
+    for value in values:
+        _write_value(out, value)
+    return bytes(out)
+
+
+def _decode_values(data: memoryview, count: int) -> List[Any]:
+    values = []
+    offset = 0
+    for _ in range(count):
+        value, offset = _read_value(data, offset)
+        values.append(value)
+    if offset != len(data):
+        raise FrameCodecError("Unexpected data after the end of the frame")
+    return values
+
+
+def _field_codec(
+        frame_type: Type[Frame]) -> Tuple[FrameEncoder, FrameDecoder]:
+    """Encode a frame's fields in order. Frames that aren't dataclasses have
+    no fields."""
+    if dataclasses.is_dataclass(frame_type):
+        fields = [f for f in dataclasses.fields(frame_type) if f.init]
+    else:
+        fields = []
+    names = [f.name for f in fields]
+    positional = not any(f.kw_only for f in fields)
+
+    def encode(frame: Frame) -> bytes:
+        return _encode_values([getattr(frame, name) for name in names])
+
+    def decode(payload: memoryview) -> Frame:
+        values = _decode_values(payload, len(names))
+        if positional:
+            return frame_type(*values)
+        return frame_type(**dict(zip(names, values)))
+
+    return (encode, decode)
+
+
+def _encode_audio(frame: AudioFrame) -> bytes:
+    return _AUDIO_FORMAT.pack(
+        frame.sample_rate, frame.channels, frame.sample_width) + frame.data
+
+
+def _decode_audio(payload: memoryview) -> AudioFrame:
+    try:
+        sample_rate, channels, sample_width = _AUDIO_FORMAT.unpack_from(
+            payload)
+    except struct.error:
+        raise FrameCodecError("Encoded frame is truncated")
+    return AudioFrame(
+        payload[_AUDIO_FORMAT.size:], sample_rate, channels, sample_width)
+
+
+def _encode_context(frame: OpenAILLMContextFrame) -> bytes:
+    context = frame.context
+    return _encode_values([
+        context.messages,
+        context.tools if isinstance(context.tools, list) else None,
+        context.tool_choice if isinstance(
+            context.tool_choice, (str, dict)) else None,
+    ])
+
+
+def _decode_context(payload: memoryview) -> OpenAILLMContextFrame:
+    messages, tools, tool_choice = _decode_values(payload, 3)
+    context = OpenAILLMContext(messages)
+    if tools is not None:
+        context.set_tools(tools)
+    if tool_choice is not None:
+        context.set_tool_choice(tool_choice)
+    return OpenAILLMContextFrame(context)
+
+
+class _Registration(NamedTuple):
+    frame_type: Type[Frame]
+    type_id: int
+    encode: FrameEncoder
+    decode: FrameDecoder
+
+
+class FrameCodec:
+    """Encodes and decodes frames of the registered types. A new codec knows
+    every frame type in dailyai.pipeline.frames."""
+
+    def __init__(self):
+        self._by_type: Dict[Type[Frame], _Registration] = {}
+        self._by_id: Dict[int, _Registration] = {}
+        for type_id, frame_type in _BUILTIN_TYPES.items():
+            self._register(frame_type, type_id)
+        self._register(
+            AudioFrame, _AUDIO_TYPE_ID, _encode_audio, _decode_audio)
+        self._register(
+            OpenAILLMContextFrame, _OPENAI_CONTEXT_TYPE_ID,
+            _encode_context, _decode_context)
+
+    def register(
+        self,
+        frame_type: Type[Frame],
+        type_id: int,
+        encode: FrameEncoder | None = None,
+        decode: FrameDecoder | None = None,
+    ) -> None:
+        """Register an app's frame type. `encode` returns the frame's payload
+        as bytes and `decode` makes a frame from it; without them, a
+        dataclass frame's fields are encoded in order."""
+        if not FIRST_APP_TYPE_ID <= type_id <= 0xFFFF:
+            raise ValueError(
+                f"App frame type ids must be from {FIRST_APP_TYPE_ID} to 65535")
+        if (encode is None) != (decode is None):
+            raise ValueError("Pass both encode and decode, or neither")
+        self._register(frame_type, type_id, encode, decode)
+
+    def _register(self, frame_type, type_id, encode=None, decode=None):
+        registered = self._by_id.get(type_id)
+        if registered and registered.frame_type is not frame_type:
+            raise ValueError(
+                f"Type id {type_id} is already used by "
+                f"{registered.frame_type.__name__}")
+        if encode is None or decode is None:
+            encode, decode = _field_codec(frame_type)
+        registration = _Registration(frame_type, type_id, encode, decode)
+        self._by_type[frame_type] = registration
+        self._by_id[type_id] = registration
+
+    def encode(self, frame: Frame) -> bytes:
+        if frame.__class__ is AudioFrame:
+            # The real-time path, so skip the registry.
+            return _AUDIO_HEADER.pack(
+                FORMAT_VERSION,
+                _AUDIO_TYPE_ID,
+                frame.sample_rate,
+                frame.channels,
+                frame.sample_width) + frame.data
+        registration = self._by_type.get(frame.__class__)
+        if registration is None:
+            raise FrameCodecError(
+                f"{frame.__class__.__name__} isn't registered with the codec")
+        return _HEADER.pack(
+            FORMAT_VERSION, registration.type_id) + registration.encode(frame)
+
+    def decode(self, data: bytes | bytearray | memoryview) -> Frame:
+        view = memoryview(data)
+        try:
+            version, type_id = _HEADER.unpack_from(view)
+        except struct.error:
+            raise FrameCodecError("Encoded frame is truncated")
+        if version != FORMAT_VERSION:
+            raise FrameCodecError(f"Unsupported frame codec version {version}")
+        if type_id == _AUDIO_TYPE_ID:
+            return _decode_audio(view[_HEADER.size:])
+        registration = self._by_id.get(type_id)
+        if registration is None:
+            raise FrameCodecError(f"Unknown frame type id {type_id}")
+        return registration.decode(view[_HEADER.size:])
+
+
+# Never change or reuse these ids. AudioFrame is 16 and OpenAILLMContextFrame
+# is 22; they have codecs of their own.
+_BUILTIN_TYPES: Dict[int, Type[Frame]] = {
+    1: StartFrame,
+    2: EndFrame,
+    3: EndPipeFrame,
+    4: PipelineStartedFrame,
+    5: LLMResponseStartFrame,
+    6: LLMResponseEndFrame,
+    17: ImageFrame,
+    18: SpriteFrame,
+    19: TextFrame,
+    20: TranscriptionQueueFrame,
+    21: LLMMessagesQueueFrame,
+    23: ReceivedAppMessageFrame,
+    24: SendAppMessageFrame,
+    25: UserStartedSpeakingFrame,
+    26: UserStoppedSpeakingFrame,
+    27: BotStartedSpeakingFrame,
+    28: BotStoppedSpeakingFrame,
+    29: LLMFunctionStartFrame,
+    30: LLMFunctionCallFrame,
+}
+
+default_codec = FrameCodec()
+
+
+def register_frame_type(
+    frame_type: Type[Frame],
+    type_id: int,
+    encode: FrameEncoder | None = None,
+    decode: FrameDecoder | None = None,
+) -> None:
+    """Register an app's frame type with the default codec."""
+    default_codec.register(frame_type, type_id, encode, decode)
+
+
+def encode_frame(frame: Frame) -> bytes:
+    return default_codec.encode(frame)
+
+
+def decode_frame(data: bytes | bytearray | memoryview) -> Frame:
+    return default_codec.decode(data)
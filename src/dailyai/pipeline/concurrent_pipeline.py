@@ -0,0 +1,203 @@
+import asyncio
+import collections
+import time
+from typing import Deque, Dict, List, Tuple, Type
+
+from dailyai.pipeline.frame_processor import FrameEmitter, FrameProcessor
+from dailyai.pipeline.frames import EndFrame, EndPipeFrame, Frame
+from dailyai.pipeline.instrumentation import PipelineMetrics
+from dailyai.pipeline.pipeline import Pipeline
+from dailyai.pipeline.queues import OverflowPolicy
+
+
+class _StageDone:
+    """Internal marker that tells a stage its upstream has finished. It never
+    leaves the pipeline, so processors don't have to know about it."""
+    pass
+
+
+class ConcurrentPipeline(Pipeline):
+    """
+    A Pipeline that runs each FrameProcessor in its own asyncio task. Stages are
+    connected by bounded queues, so a slow stage (eg. a TTS service waiting on
+    an HTTP response) doesn't stop the stages before it from pulling more frames
+    (eg. an LLM reading its token stream).
+
+    Frames leave each stage in the order that stage yielded them, so ordering
+    is the same as with a Pipeline; only the timing is different. The
+    `stage_queue_size` parameter caps how many frames can be waiting in front
+    of each stage, which keeps a fast producer from getting arbitrarily far
+    ahead of a slow consumer.
+
+    This class can be used anywhere a Pipeline is used, including with a
+    transport's run_pipeline and run_interruptible_pipeline methods.
+    """
+
+    def __init__(
+        self,
+        processors: List[FrameProcessor],
+        source: asyncio.Queue | None = None,
+        sink: asyncio.Queue[Frame] | None = None,
+        stage_queue_size: int = 32,
+        queue_size: int = 0,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        priority_frame_types: Tuple[Type[Frame], ...] | None = None,
+        metrics: PipelineMetrics | None = None,
+    ):
+        super().__init__(
+            processors,
+            source,
+            sink,
+            queue_size,
+            overflow_policy,
+            priority_frame_types,
+            metrics)
+        self._stage_queue_size = stage_queue_size
+        self._stage_queues: List[asyncio.Queue] = []
+        # With metrics on, when each frame in each stage queue was put there,
+        # keyed by id(frame) since frames aren't hashable.
+        self._enqueue_times: List[Dict[int, Deque[int]]] = []
+
+    async def run_pipeline(self):
+        """Run the pipeline. The source queue is read by its own task, and each
+        frame_processor reads from the queue in front of it and writes to the
+        queue behind it. The last frame_processor writes to the sink.
+
+        As with Pipeline, this method exits after an EndFrame or EndPipeFrame
+        taken from the source queue has been processed by every stage.
+        """
+        queues: List[asyncio.Queue] = [
+            self._create_queue(self._stage_queue_size, OverflowPolicy.BLOCK)
+            for _ in self.processors
+        ]
+        outputs: List[asyncio.Queue] = queues[1:] + [self.sink]
+
+        if not self.processors:
+            queues = [self.sink]
+        self._stage_queues = queues[:len(self.processors)]
+        self._enqueue_times = [{} for _ in self._stage_queues]
+
+        tasks = [asyncio.create_task(self._read_source(queues[0]))]
+        tasks += [
+            asyncio.create_task(self._run_stage(index, input, output))
+            for index, input, output in zip(range(len(self.processors)), queues, outputs)
+        ]
+
+        try:
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            # this means there's been an interruption, do any cleanup necessary
+            # here.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for processor in self.processors:
+                await processor.interrupted()
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def interrupt(self):
+        """Stop the work being done for the current turn. As well as the work in
+        progress in each stage, this drops the frames waiting between stages,
+        since they belong to the interrupted turn. End frames are kept, so the
+        pipeline still shuts down when it's told to."""
+        self.turn_scope.cancel()
+        for queue in self._stage_queues:
+            kept = []
+            while not queue.empty():
+                frame = queue.get_nowait()
+                if isinstance(frame, (EndFrame, EndPipeFrame, _StageDone)):
+                    kept.append(frame)
+            for frame in kept:
+                queue.put_nowait(frame)
+        for enqueue_times in self._enqueue_times:
+            enqueue_times.clear()
+        for processor in self.processors:
+            await processor.interrupted()
+
+    async def _read_source(self, output: asyncio.Queue):
+        put = self._stage_put(0, output)
+        while True:
+            frame = await self.source.get()
+            if isinstance(frame, EndFrame) or isinstance(frame, EndPipeFrame):
+                await put(frame)
+                if self.processors:
+                    await output.put(_StageDone())
+                break
+
+            # Waiting for room in the first stage's queue is part of the turn,
+            # so a frame from a turn that's interrupted meanwhile is dropped,
+            # like the frames interrupt() takes off the stage queues.
+            async with self.turn_scope.enter():
+                await put(frame)
+
+    def _stage_put(self, index: int, queue: asyncio.Queue) -> FrameEmitter:
+        """The function that puts frames on the queue in front of the stage at
+        `index`. With metrics on, it notes when each frame was put there."""
+        if self.metrics is None or index >= len(self._enqueue_times):
+            return queue.put
+        enqueue_times = self._enqueue_times[index]
+        clock = time.perf_counter_ns
+
+        def put(frame: Frame):
+            times = enqueue_times.get(id(frame))
+            if times is None:
+                times = enqueue_times[id(frame)] = collections.deque()
+            times.append(clock())
+            return queue.put(frame)
+
+        return put
+
+    def _record_queue_wait(self, index: int, frame: Frame, consumed: bool):
+        enqueue_times = self._enqueue_times[index]
+        times = enqueue_times.get(id(frame))
+        if not times:
+            return
+        wait = time.perf_counter_ns() - times.popleft()
+        if not times:
+            del enqueue_times[id(frame)]
+        if not consumed:
+            # Frames that skip the processor aren't counted against it.
+            return
+        metrics = self.metrics.for_processor(index, self.processors[index])
+        metrics.for_frame_type(frame.__class__).queue_wait.record(wait)
+
+    async def _run_stage(
+        self,
+        index: int,
+        input: asyncio.Queue,
+        output: asyncio.Queue,
+    ):
+        processor = self.processors[index]
+        dispatch = self._dispatch[index]
+        is_last_stage = output is self.sink
+        put = self._stage_put(index + 1, output)
+        handle_frame = self._link(index, processor, put)
+        timed = self.metrics is not None
+        while True:
+            # Everything in a stage queue belongs to the current turn, so the
+            # wait for the next frame is part of the turn too. That way an
+            # interruption can't slip in between taking a frame and
+            # processing it.
+            async with self.turn_scope.enter():
+                frame = await input.get()
+                if isinstance(frame, _StageDone):
+                    break
+
+                # Frames this processor doesn't consume skip it, but stay in
+                # order with the frames it does.
+                target = dispatch.get(frame.__class__)
+                if target is None:
+                    target = self._next_consumer(index, frame.__class__)
+                if timed:
+                    self._record_queue_wait(index, frame, target == index)
+                if target == index:
+                    await handle_frame(frame)
+                else:
+                    await put(frame)
+
+        if not is_last_stage:
+            await output.put(frame)
@@ -1,8 +1,12 @@
 from abc import abstractmethod
-from typing import AsyncGenerator
+from contextlib import aclosing
+from typing import AsyncGenerator, Awaitable, Callable, List, Tuple, Type
 
 from dailyai.pipeline.frames import ControlFrame, Frame
 
+# The callable a push-style frame processor hands its output frames to.
+FrameEmitter = Callable[[Frame], Awaitable[None]]
+
 
 class FrameProcessor:
     """This is the base class for all frame processors. Frame processors consume a frame
@@ -16,8 +20,37 @@ class FrameProcessor:
     output, eg. yielding an unfinished sentence if they're aggregating LLM output to full
     sentences. EndStreamQueueFrame is also a chance to clean up any services that need to
     be closed, del'd, etc.
+
+    FrameProcessors that only handle a few types of frames can list them in
+    `consumed_frame_types`. Pipelines pass any other frame straight to the next
+    processor that wants it, without calling this processor at all. The default
+    of None means the processor sees every frame. A subclass that overrides
+    process_frame or on_frame without declaring its own `consumed_frame_types`
+    also sees every frame, so it can't silently miss frames it now handles.
     """
 
+    consumed_frame_types: Tuple[Type[Frame], ...] | None = None
+
+    def consumes_frame_type(self, frame_type: Type[Frame]) -> bool:
+        """Whether this processor wants frames of the given type. Pipelines
+        call this once per frame type and cache the answer."""
+        frame_types = self._get_consumed_frame_types()
+        return frame_types is None or issubclass(frame_type, frame_types)
+
+    def _get_consumed_frame_types(self) -> Tuple[Type[Frame], ...] | None:
+        if "consumed_frame_types" in vars(self):
+            return self.consumed_frame_types
+
+        for cls in type(self).__mro__:
+            if "consumed_frame_types" in vars(cls):
+                return vars(cls)["consumed_frame_types"]
+            if ("process_frame" in vars(cls) and cls is not PushFrameProcessor) or (
+                    "on_frame" in vars(cls) and cls is not FrameProcessor):
+                # The frame handler was overridden below the declaration.
+                return None
+
+        return None
+
     @abstractmethod
     async def process_frame(
         self, frame: Frame
@@ -27,7 +60,52 @@ class FrameProcessor:
             yield frame
         yield frame
 
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
+        """Process a single frame and pass each resulting frame to `emit`,
+        which hands it straight to the next stage of the pipeline.
+
+        This is the entry point pipelines use. By default it adapts
+        process_frame, so generator-based frame processors work unchanged.
+        Subclass PushFrameProcessor to implement this directly and skip the
+        per-frame async generator.
+
+        The generator is closed as soon as this returns or is cancelled, so
+        an interrupted processor's finally blocks and context managers (eg.
+        an open HTTP response) run right away rather than whenever the
+        generator is garbage collected."""
+        async with aclosing(self.process_frame(frame)) as output_frames:
+            async for output_frame in output_frames:
+                await emit(output_frame)
+
     @abstractmethod
     async def interrupted(self) -> None:
         """Handle any cleanup if the pipeline was interrupted."""
         pass
+
+
+class PushFrameProcessor(FrameProcessor):
+    """Base class for frame processors that push their output instead of
+    yielding it. Subclasses implement on_frame and call `await emit(frame)` for
+    each frame they produce; as with process_frame, frames that aren't handled
+    should be emitted unchanged.
+
+    process_frame still works for callers that iterate over a processor's
+    output, but it collects everything on_frame emits before yielding, so it
+    doesn't stream.
+    """
+
+    @abstractmethod
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
+        await emit(frame)
+
+    async def process_frame(
+        self, frame: Frame
+    ) -> AsyncGenerator[Frame, None]:
+        frames: List[Frame] = []
+
+        async def collect(output_frame: Frame):
+            frames.append(output_frame)
+
+        await self.on_frame(frame, collect)
+        for output_frame in frames:
+            yield output_frame
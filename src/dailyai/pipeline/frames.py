@@ -1,10 +1,18 @@
-from dataclasses import dataclass
-from typing import Any, List
+from dataclasses import dataclass, field
+from typing import Any, List, Sequence
+
+import numpy as np
 
 from dailyai.services.openai_llm_context import OpenAILLMContext
 
 
 class Frame:
+    # Frames are created for every token and chunk of audio, so they use slots
+    # rather than an instance __dict__. Subclasses should declare __slots__ (or
+    # use @dataclass(slots=True)) too; one that doesn't still works, but its
+    # instances get a __dict__ again.
+    __slots__ = ()
+
     def __str__(self):
         return f"{self.__class__.__name__}"
 
@@ -12,29 +20,46 @@ class Frame:
 class ControlFrame(Frame):
     # Control frames should contain no instance data, so
     # equality is based solely on the class.
+    __slots__ = ()
+
     def __eq__(self, other):
         return isinstance(other, self.__class__)
 
+    @classmethod
+    def shared(cls):
+        """Return an instance of this class that is shared by everyone who
+        asks for one, instead of allocating a new frame each time. Since a
+        control frame has no data, the shared instance is equal to (and
+        interchangeable with) any other, but code that tells frames apart by
+        identity will see every use of it as the same frame."""
+        frame = _shared_control_frames.get(cls)
+        if frame is None:
+            frame = _shared_control_frames[cls] = cls()
+        return frame
+
+
+_shared_control_frames: dict[type, ControlFrame] = {}
+
 
 class StartFrame(ControlFrame):
     """Used (but not required) to start a pipeline, and is also used to
     indicate that an interruption has ended and the transport should start
     processing frames again."""
-    pass
+    __slots__ = ()
 
 
 class EndFrame(ControlFrame):
     """Indicates that a pipeline has ended and frame processors and pipelines
     should be shut down. If the transport receives this frame, it will stop
     sending frames to its output channel(s) and close all its threads."""
-    pass
+    __slots__ = ()
 
 
 class EndPipeFrame(ControlFrame):
     """Indicates that a pipeline has ended but that the transport should
     continue processing. This frame is used in parallel pipelines and other
     sub-pipelines."""
-    pass
+    __slots__ = ()
 
 
 class PipelineStartedFrame(ControlFrame):
@@ -43,54 +68,170 @@ class PipelineStartedFrame(ControlFrame):
     (or restarting). It should be the first frame your app receives when it
     starts, or when an interruptible pipeline has been interrupted.
     """
-
-    pass
+    __slots__ = ()
 
 
 class LLMResponseStartFrame(ControlFrame):
     """Used to indicate the beginning of an LLM response. Following TextFrames
     are part of the LLM response until an LLMResponseEndFrame"""
-    pass
+    __slots__ = ()
 
 
 class LLMResponseEndFrame(ControlFrame):
     """Indicates the end of an LLM response."""
-    pass
+    __slots__ = ()
 
 
-@dataclass()
+@dataclass(slots=True)
 class AudioFrame(Frame):
     """A chunk of audio. Will be played by the transport if the transport's mic
-    has been enabled."""
-    data: bytes
+    has been enabled.
+
+    `data` is PCM audio in any buffer: bytes, a bytearray, a memoryview or a
+    numpy array. It's interleaved if there's more than one channel, and
+    `sample_width` is the size of one sample in bytes. The frame doesn't copy
+    the buffer, and neither do slice() and as_int16(), so don't change a
+    buffer once you've made a frame from it."""
+    data: bytes | bytearray | memoryview
+    sample_rate: int = 16000
+    channels: int = 1
+    sample_width: int = 2
+    _int16: np.ndarray | None = field(
+        default=None, init=False, repr=False, compare=False)
+    _float32: np.ndarray | None = field(
+        default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Keep len(data) a length in bytes, whatever the buffer is.
+        if not isinstance(self.data, (bytes, bytearray)):
+            view = memoryview(self.data)
+            if view.format != "B" or view.ndim != 1:
+                self.data = view.cast("B")
 
     def __str__(self):
         return f"{self.__class__.__name__}, size: {len(self.data)} B"
 
-
-@dataclass()
+    def __getstate__(self):
+        return (self.tobytes(), self.sample_rate,
+                self.channels, self.sample_width)
+
+    def __setstate__(self, state):
+        (self.data, self.sample_rate,
+         self.channels, self.sample_width) = state
+        self._int16 = None
+        self._float32 = None
+
+    @property
+    def frame_size(self) -> int:
+        """The size in bytes of one sample for every channel."""
+        return self.channels * self.sample_width
+
+    @property
+    def num_frames(self) -> int:
+        """The number of samples in each channel."""
+        return len(self.data) // self.frame_size
+
+    @property
+    def duration_s(self) -> float:
+        return self.num_frames / self.sample_rate
+
+    def same_format(self, other: "AudioFrame") -> bool:
+        return (
+            self.sample_rate == other.sample_rate
+            and self.channels == other.channels
+            and self.sample_width == other.sample_width
+        )
+
+    def slice(self, start: int, stop: int | None = None) -> "AudioFrame":
+        """A frame with this frame's audio from sample `start` up to `stop`
+        (in samples per channel), sharing this frame's buffer. A `stop` of
+        None or past the end takes the rest of the buffer."""
+        if stop is None or stop >= self.num_frames:
+            stop_byte = len(self.data)
+        else:
+            stop_byte = stop * self.frame_size
+        return AudioFrame(
+            memoryview(self.data)[start * self.frame_size:stop_byte],
+            self.sample_rate,
+            self.channels,
+            self.sample_width,
+        )
+
+    @classmethod
+    def concat(cls, frames: Sequence["AudioFrame"]) -> "AudioFrame":
+        """Join frames of the same format into one. A single frame is returned
+        as it is; otherwise the audio is copied once, into a new buffer."""
+        if len(frames) == 1:
+            return frames[0]
+        first = frames[0]
+        if not all(first.same_format(frame) for frame in frames):
+            raise ValueError("Can't join audio frames of different formats")
+        return cls(
+            b"".join(frame.data for frame in frames),
+            first.sample_rate,
+            first.channels,
+            first.sample_width,
+        )
+
+    def tobytes(self) -> bytes:
+        """The audio as bytes, which is the buffer itself if it's bytes
+        already."""
+        return self.data if isinstance(self.data, bytes) else bytes(self.data)
+
+    def as_int16(self) -> np.ndarray:
+        """The samples as a read-only numpy array of int16, interleaved if
+        there's more than one channel. This is a view of the frame's buffer,
+        made on the first call."""
+        if self._int16 is None:
+            if self.sample_width != 2:
+                raise ValueError(
+                    f"{self.sample_width * 8}-bit audio isn't int16")
+            samples = np.frombuffer(self.data, dtype=np.int16)
+            samples.flags.writeable = False
+            self._int16 = samples
+        return self._int16
+
+    def as_float32(self) -> np.ndarray:
+        """The samples as a read-only numpy array of float32, scaled to
+        [-1.0, 1.0). Converted on the first call and kept."""
+        if self._float32 is None:
+            samples = self.as_int16().astype(np.float32)
+            samples *= 1 / 32768
+            samples.flags.writeable = False
+            self._float32 = samples
+        return self._float32
+
+
+@dataclass(slots=True)
 class ImageFrame(Frame):
     """An image. Will be shown by the transport if the transport's camera is
-    enabled."""
+    enabled, once the audio sent before it has been played.
+
+    `pts` (presentation timestamp) places the change at a point on the
+    transport's audio clock instead: the number of seconds of audio the
+    transport has sent to the mic since it started."""
     url: str | None
     image: bytes
+    pts: float | None = field(default=None, kw_only=True)
 
     def __str__(self):
         return f"{self.__class__.__name__}, url: {self.url}, image size: {len(self.image)} B"
 
 
-@dataclass()
+@dataclass(slots=True)
 class SpriteFrame(Frame):
     """An animated sprite. Will be shown by the transport if the transport's
     camera is enabled. Will play at the framerate specified in the transport's
-    `fps` constructor parameter."""
+    `fps` constructor parameter. Like an ImageFrame, it's shown once the audio
+    before it has been played, or at `pts` on the audio clock if that's set."""
     images: list[bytes]
+    pts: float | None = field(default=None, kw_only=True)
 
     def __str__(self):
         return f"{self.__class__.__name__}, list size: {len(self.images)}"
 
 
-@dataclass()
+@dataclass(slots=True)
 class TextFrame(Frame):
     """A chunk of text. Emitted by LLM services, consumed by TTS services, can
     be used to send text through pipelines."""
@@ -100,7 +241,7 @@ class TextFrame(Frame):
         return f'{self.__class__.__name__}: "{self.text}"'
 
 
-@dataclass()
+@dataclass(slots=True)
 class TranscriptionQueueFrame(TextFrame):
     """A text frame with transcription-specific data. Will be placed in the
     transport's receive queue when a participant speaks."""
@@ -108,7 +249,7 @@ class TranscriptionQueueFrame(TextFrame):
     timestamp: str
 
 
-@dataclass()
+@dataclass(slots=True)
 class LLMMessagesQueueFrame(Frame):
     """A frame containing a list of LLM messages. Used to signal that an LLM
     service should run a chat completion and emit an LLMStartFrames, TextFrames
@@ -118,7 +259,7 @@ class LLMMessagesQueueFrame(Frame):
     messages: List[dict]
 
 
-@dataclass()
+@dataclass(slots=True)
 class OpenAILLMContextFrame(Frame):
     """Like an LLMMessagesQueueFrame, but with extra context specific to the
     OpenAI API. The context in this message is also mutable, and will be
@@ -126,7 +267,7 @@ class OpenAILLMContextFrame(Frame):
     context: OpenAILLMContext
 
 
-@dataclass()
+@dataclass(slots=True)
 class ReceivedAppMessageFrame(Frame):
     message: Any
     sender: str
@@ -135,7 +276,7 @@ class ReceivedAppMessageFrame(Frame):
         return f"ReceivedAppMessageFrame: sender: {self.sender}, message: {self.message}"
 
 
-@dataclass()
+@dataclass(slots=True)
 class SendAppMessageFrame(Frame):
     message: Any
     participantId: str | None
@@ -149,23 +290,23 @@ class UserStartedSpeakingFrame(Frame):
     This can be used for interruptions or other times when detecting that
     someone is speaking is more important than knowing what they're saying
     (as you will with a TranscriptionFrame)"""
-    pass
+    __slots__ = ()
 
 
 class UserStoppedSpeakingFrame(Frame):
     """Emitted by the VAD to indicate that a user stopped speaking."""
-    pass
+    __slots__ = ()
 
 
 class BotStartedSpeakingFrame(Frame):
-    pass
+    __slots__ = ()
 
 
 class BotStoppedSpeakingFrame(Frame):
-    pass
+    __slots__ = ()
 
 
-@dataclass()
+@dataclass(slots=True)
 class LLMFunctionStartFrame(Frame):
     """Emitted when the LLM receives the beginning of a function call
     completion. A frame processor can use this frame to indicate that it should
@@ -174,7 +315,7 @@ class LLMFunctionStartFrame(Frame):
     function_name: str
 
 
-@dataclass()
+@dataclass(slots=True)
 class LLMFunctionCallFrame(Frame):
     """Emitted when the LLM has received an entire function call completion."""
     function_name: str
@@ -0,0 +1,231 @@
+import math
+from typing import Dict, Iterator, List, Tuple, Type
+
+from dailyai.pipeline.frame_processor import FrameProcessor
+from dailyai.pipeline.frames import Frame
+
+
+class LatencyHistogram:
+    """A histogram of durations, bucketed in the style of HdrHistogram: exact
+    below 128ns, then log-linear buckets with 64 sub-buckets per power of two,
+    so any recorded value is reported to within about 1.6%. Recording is a few
+    integer operations and a dict update, and memory use grows with the range
+    of values seen, not with how many are recorded.
+
+    Values are recorded in integer nanoseconds (eg. from time.perf_counter_ns)
+    and reported in seconds.
+
+    >>> h = LatencyHistogram()
+    >>> for ms in range(1, 101):
+    ...     h.record(ms * 1_000_000)
+    >>> h.count
+    100
+    >>> round(h.percentile(50), 3), round(h.percentile(99), 3)
+    (0.05, 0.099)
+    """
+
+    SUB_BUCKET_BITS = 7
+    _SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    _SUB_BUCKET_HALF = _SUB_BUCKET_COUNT >> 1
+
+    def __init__(self):
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self._total_ns = 0
+        self._min_ns = 0
+        self._max_ns = 0
+
+    def record(self, value_ns: int) -> None:
+        if value_ns < 0:
+            value_ns = 0
+        if value_ns < self._SUB_BUCKET_COUNT:
+            index = value_ns
+        else:
+            shift = value_ns.bit_length() - self.SUB_BUCKET_BITS
+            index = shift * self._SUB_BUCKET_HALF + (value_ns >> shift)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        if not self.count or value_ns < self._min_ns:
+            self._min_ns = value_ns
+        if value_ns > self._max_ns:
+            self._max_ns = value_ns
+        self.count += 1
+        self._total_ns += value_ns
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the values recorded in another histogram to this one."""
+        if not other.count:
+            return
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        if not self.count or other._min_ns < self._min_ns:
+            self._min_ns = other._min_ns
+        self._max_ns = max(self._max_ns, other._max_ns)
+        self.count += other.count
+        self._total_ns += other._total_ns
+
+    def reset(self) -> None:
+        self.__init__()
+
+    @property
+    def sum(self) -> float:
+        return self._total_ns / 1e9
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def min(self) -> float:
+        return self._min_ns / 1e9
+
+    @property
+    def max(self) -> float:
+        return self._max_ns / 1e9
+
+    def percentile(self, percentile: float) -> float:
+        """The value (in seconds) at or below which `percentile` percent of
+        the recorded values fall. Returns 0 if nothing's been recorded."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percentile / 100))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                low, high = self._bucket_range(index)
+                value = min(max((low + high) // 2, self._min_ns), self._max_ns)
+                return value / 1e9
+        return self.max
+
+    def _bucket_range(self, index: int) -> Tuple[int, int]:
+        if index < self._SUB_BUCKET_COUNT:
+            return (index, index)
+        shift = index // self._SUB_BUCKET_HALF - 1
+        sub_bucket = index - shift * self._SUB_BUCKET_HALF
+        return (sub_bucket << shift, ((sub_bucket + 1) << shift) - 1)
+
+
+class FrameTypeMetrics:
+    """What a frame processor did with one type of frame. frames_in, the
+    histograms and queue wait are counted against the type of the frame the
+    processor was given; frames_out against the type of the frames it
+    emitted."""
+
+    def __init__(self):
+        self.frames_in = 0
+        self.frames_out = 0
+        # Time spent in the processor for each frame, not counting the time
+        # spent downstream while it waits for the frames it emits to be taken.
+        self.process_time = LatencyHistogram()
+        # Time from receiving the frame (or emitting the previous frame) to
+        # emitting the next one; eg. the time between LLM tokens.
+        self.yield_gap = LatencyHistogram()
+        # Time the frame spent waiting in the queue in front of the processor.
+        # Only a ConcurrentPipeline has queues between its processors.
+        self.queue_wait = LatencyHistogram()
+
+
+class ProcessorMetrics:
+    def __init__(self, position: int, name: str):
+        self.position = position
+        self.name = name
+        self.frame_types: Dict[Type[Frame], FrameTypeMetrics] = {}
+
+    def for_frame_type(self, frame_type: Type[Frame]) -> FrameTypeMetrics:
+        metrics = self.frame_types.get(frame_type)
+        if metrics is None:
+            metrics = self.frame_types[frame_type] = FrameTypeMetrics()
+        return metrics
+
+
+class PipelineMetrics:
+    """Latency and throughput numbers for each frame processor in a pipeline,
+    broken down by frame type. Pass one to a Pipeline to turn instrumentation
+    on; without one, a pipeline does no timing at all.
+
+    The same PipelineMetrics can be shared by several pipelines (eg. one per
+    session) running the same processors, in which case their numbers are
+    combined.
+    """
+
+    def __init__(self, namespace: str = "dailyai"):
+        self.namespace = namespace
+        self.processors: Dict[Tuple[int, str], ProcessorMetrics] = {}
+
+    def for_processor(
+        self, position: int, processor: FrameProcessor
+    ) -> ProcessorMetrics:
+        key = (position, processor.__class__.__name__)
+        metrics = self.processors.get(key)
+        if metrics is None:
+            metrics = self.processors[key] = ProcessorMetrics(*key)
+        return metrics
+
+    def get(
+        self, position: int, frame_type: Type[Frame]
+    ) -> FrameTypeMetrics | None:
+        """The metrics for one frame type at one position in the pipeline,
+        or None if no frames of that type have been seen there."""
+        for (processor_position, _), metrics in self.processors.items():
+            if processor_position == position:
+                return metrics.frame_types.get(frame_type)
+        return None
+
+    def reset(self) -> None:
+        self.processors.clear()
+
+    def __iter__(
+            self) -> Iterator[Tuple[ProcessorMetrics, Type[Frame], FrameTypeMetrics]]:
+        for key in sorted(self.processors):
+            processor = self.processors[key]
+            for frame_type, metrics in processor.frame_types.items():
+                yield (processor, frame_type, metrics)
+
+    def to_prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format:
+        counters for frames in and out, and summaries (with the 50th, 90th
+        and 99th percentiles) for the timings."""
+        lines: List[str] = []
+        rows = list(self)
+
+        def labels(
+                processor: ProcessorMetrics,
+                frame_type: Type[Frame]) -> str:
+            return (
+                f'position="{processor.position}",'
+                f'processor="{processor.name}",'
+                f'frame_type="{frame_type.__name__}"')
+
+        for field, help_text in (
+            ("frames_in", "Frames passed to a frame processor."),
+            ("frames_out", "Frames emitted by a frame processor."),
+        ):
+            name = f"{self.namespace}_processor_{field}_total"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for processor, frame_type, metrics in rows:
+                lines.append(
+                    f"{name}{{{labels(processor, frame_type)}}} "
+                    f"{getattr(metrics, field)}")
+
+        for field, help_text in (
+            ("process_time", "Time spent processing a frame, excluding downstream processors."),
+            ("yield_gap", "Time between frames emitted by a frame processor."),
+            ("queue_wait", "Time a frame waited in the queue in front of a frame processor."),
+        ):
+            name = f"{self.namespace}_processor_{field}_seconds"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} summary")
+            for processor, frame_type, metrics in rows:
+                histogram: LatencyHistogram = getattr(metrics, field)
+                if not histogram.count:
+                    continue
+                label_text = labels(processor, frame_type)
+                for quantile in (0.5, 0.9, 0.99):
+                    lines.append(
+                        f'{name}{{{label_text},quantile="{quantile}"}} '
+                        f"{histogram.percentile(quantile * 100):.9f}")
+                lines.append(f"{name}_sum{{{label_text}}} {histogram.sum:.9f}")
+                lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
@@ -1,8 +1,12 @@
 import asyncio
-from typing import AsyncGenerator, AsyncIterable, Iterable, List
-from dailyai.pipeline.frame_processor import FrameProcessor
+import time
+from typing import AsyncGenerator, AsyncIterable, Awaitable, Dict, Iterable, List, Tuple, Type
+from dailyai.pipeline.cancellation import TurnScope
+from dailyai.pipeline.frame_processor import FrameEmitter, FrameProcessor
 
 from dailyai.pipeline.frames import EndPipeFrame, EndFrame, Frame
+from dailyai.pipeline.instrumentation import PipelineMetrics
+from dailyai.pipeline.queues import FrameQueue, OverflowPolicy, PriorityFrameQueue
 
 
 class Pipeline:
@@ -17,17 +21,58 @@ class Pipeline:
         self,
         processors: List[FrameProcessor],
         source: asyncio.Queue | None = None,
-        sink: asyncio.Queue[Frame] | None = None
+        sink: asyncio.Queue[Frame] | None = None,
+        queue_size: int = 0,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        priority_frame_types: Tuple[Type[Frame], ...] | None = None,
+        metrics: PipelineMetrics | None = None,
     ):
         """Create a new pipeline. By default we create the sink and source queues
         if they're not provided, but these can be overridden to point to other
         queues. If this pipeline is run by a transport, its sink and source queues
         will be overridden.
+
+        Queues created here hold at most `queue_size` frames (0 means no limit),
+        and `overflow_policy` decides what happens when one is full. If
+        `priority_frame_types` is given, frames of those types jump ahead of
+        any others waiting in those queues. Only use it for frames whose
+        order relative to other frames doesn't matter, such as
+        UserStartedSpeakingFrame.
+
+        To see where time goes in the pipeline, pass a PipelineMetrics as
+        `metrics`; the pipeline then records frame counts and timings for
+        each frame processor there. Without it, nothing is measured.
         """
         self.processors: List[FrameProcessor] = processors
-
-        self.source: asyncio.Queue[Frame] = source or asyncio.Queue()
-        self.sink: asyncio.Queue[Frame] = sink or asyncio.Queue()
+        self._priority_frame_types = priority_frame_types
+        self.metrics = metrics
+
+        # The work done on frames taken from the source queue; see interrupt().
+        self.turn_scope = TurnScope()
+
+        self.source: asyncio.Queue[Frame] = source or self._create_queue(
+            queue_size, overflow_policy)
+        self.sink: asyncio.Queue[Frame] = sink or self._create_queue(
+            queue_size, overflow_policy)
+
+        # For each position in the pipeline, maps a frame type to the index of
+        # the next processor that consumes it (or len(processors) for the
+        # sink). Filled in here for the frame types we know about, and on
+        # first sight for any others.
+        self._dispatch: List[Dict[Type[Frame], int]] = [
+            {} for _ in range(len(processors) + 1)
+        ]
+        for frame_type in _all_frame_types():
+            for index in range(len(processors)):
+                self._next_consumer(index, frame_type)
+
+    def _create_queue(
+        self, maxsize: int, overflow_policy: OverflowPolicy
+    ) -> FrameQueue:
+        if self._priority_frame_types:
+            return PriorityFrameQueue(
+                maxsize, overflow_policy, self._priority_frame_types)
+        return FrameQueue(maxsize, overflow_policy)
 
     def set_source(self, source: asyncio.Queue[Frame]):
         """Set the source queue for this pipeline. Frames from this queue
@@ -71,18 +116,19 @@ class Pipeline:
 
         The source and sink queues must be set before calling this method.
 
-        This method will exit when an EndStreamQueueFrame is placed on the sink queue.
-        No more frames will be placed on the sink queue after an EndStreamQueueFrame, even
-        if it's not the last frame yielded by the last frame_processor in the pipeline..
+        This method will exit once it has taken an EndFrame or an EndPipeFrame
+        from the source queue and pushed it through the processors, which pass
+        it on to the sink queue. Frames left on the source queue after it
+        aren't read. If the task running this method is cancelled, each
+        processor's interrupted() method is called before it exits.
         """
 
+        push_frame = self._build_emitter_chain()
         try:
             while True:
                 initial_frame = await self.source.get()
-                async for frame in self._run_pipeline_recursively(
-                    initial_frame, self.processors
-                ):
-                    await self.sink.put(frame)
+                async with self.turn_scope.enter():
+                    await push_frame(initial_frame)
 
                 if isinstance(initial_frame, EndFrame) or isinstance(
                     initial_frame, EndPipeFrame
@@ -95,16 +141,108 @@ class Pipeline:
                 await processor.interrupted()
             pass
 
-    async def _run_pipeline_recursively(
-        self, initial_frame: Frame, processors: List[FrameProcessor]
-    ) -> AsyncGenerator[Frame, None]:
-        """Internal function to add frames to the pipeline as they're yielded
-        by each processor."""
-        if processors:
-            async for frame in processors[0].process_frame(initial_frame):
-                async for final_frame in self._run_pipeline_recursively(
-                    frame, processors[1:]
-                ):
-                    yield final_frame
-        else:
-            yield initial_frame
+    async def interrupt(self):
+        """Stop the work being done for the current turn, eg. because the user
+        started speaking. The LLM stream, TTS requests and anything else
+        the processors are awaiting for the frame in progress are cancelled,
+        then each processor's interrupted() method is called. Unlike cancelling
+        the task running run_pipeline, the pipeline keeps running, and goes on
+        to the next frame from the source queue."""
+        self.turn_scope.cancel()
+        for processor in self.processors:
+            await processor.interrupted()
+
+    def _build_emitter_chain(self) -> FrameEmitter:
+        """Internal function to link each processor's on_frame to the next
+        processor that consumes the frame's type, ending at the sink. Frames
+        emitted by a processor are handed directly to that processor, without
+        an intermediate generator."""
+        processor_count = len(self.processors)
+        deliver: List[FrameEmitter] = [self.sink.put] * (processor_count + 1)
+        emit_from: List[FrameEmitter] = [self.sink.put] * (processor_count + 1)
+        for index in reversed(range(processor_count)):
+            deliver[index] = self._link(
+                index, self.processors[index], emit_from[index + 1])
+            emit_from[index] = self._dispatcher(index, deliver)
+        return emit_from[0]
+
+    def _dispatcher(
+            self,
+            index: int,
+            deliver: List[FrameEmitter]) -> FrameEmitter:
+        if all(p._get_consumed_frame_types() is None
+               for p in self.processors[index:]):
+            # Every remaining processor sees every frame, skip the lookup.
+            return deliver[index]
+
+        dispatch = self._dispatch[index]
+
+        def push_frame(frame: Frame) -> Awaitable[None]:
+            target = dispatch.get(frame.__class__)
+            if target is None:
+                target = self._next_consumer(index, frame.__class__)
+            return deliver[target](frame)
+
+        return push_frame
+
+    def _next_consumer(self, index: int, frame_type: Type[Frame]) -> int:
+        target = self._dispatch[index].get(frame_type)
+        if target is None:
+            target = index
+            while target < len(self.processors) and not self.processors[
+                target
+            ].consumes_frame_type(frame_type):
+                target += 1
+            self._dispatch[index][frame_type] = target
+        return target
+
+    def _link(
+        self, index: int, processor: FrameProcessor, emit: FrameEmitter
+    ) -> FrameEmitter:
+        if self.metrics is not None:
+            return self._instrumented_link(index, processor, emit)
+
+        def push_frame(frame: Frame) -> Awaitable[None]:
+            return processor.on_frame(frame, emit)
+
+        return push_frame
+
+    def _instrumented_link(
+        self, index: int, processor: FrameProcessor, emit: FrameEmitter
+    ) -> FrameEmitter:
+        """Like _link, but records what the processor does in self.metrics.
+        Time spent in `emit` is downstream of this processor, so it's taken
+        out of this processor's numbers."""
+        processor_metrics = self.metrics.for_processor(index, processor)
+        clock = time.perf_counter_ns
+
+        async def push_frame(frame: Frame) -> None:
+            frame_metrics = processor_metrics.for_frame_type(frame.__class__)
+            frame_metrics.frames_in += 1
+            start = last = clock()
+            emitting = 0
+
+            async def timed_emit(output_frame: Frame) -> None:
+                nonlocal last, emitting
+                emit_start = clock()
+                frame_metrics.yield_gap.record(emit_start - last)
+                processor_metrics.for_frame_type(
+                    output_frame.__class__).frames_out += 1
+                await emit(output_frame)
+                last = clock()
+                emitting += last - emit_start
+
+            await processor.on_frame(frame, timed_emit)
+            frame_metrics.process_time.record(clock() - start - emitting)
+
+        return push_frame
+
+
+def _all_frame_types() -> List[Type[Frame]]:
+    frame_types: List[Type[Frame]] = []
+    pending: List[Type[Frame]] = [Frame]
+    while pending:
+        frame_type = pending.pop()
+        frame_types.append(frame_type)
+        pending.extend(frame_type.__subclasses__())
+    return frame_types
@@ -0,0 +1,212 @@
+import asyncio
+import collections
+import threading
+from enum import Enum
+from typing import Any, List, Tuple, Type
+
+from dailyai.pipeline.frames import AudioFrame, ControlFrame, Frame
+
+
+class OverflowPolicy(Enum):
+    """What a bounded FrameQueue does when a frame is put on it while it's full."""
+
+    # Wait for room, like asyncio.Queue. put_nowait raises asyncio.QueueFull.
+    BLOCK = 1
+    # Make room by discarding the oldest queued frame that isn't a
+    # ControlFrame.
+    DROP_OLDEST = 2
+    # Append an AudioFrame's audio to an AudioFrame of the same format at the
+    # back of the queue. Anything that can't be coalesced waits for room, as
+    # with BLOCK.
+    COALESCE_AUDIO = 3
+
+
+class FrameQueue(asyncio.Queue):
+    """An asyncio.Queue for frames, with a choice of what happens when a
+    bounded queue fills up. A maxsize of 0 means the queue is unbounded, in
+    which case the overflow policy never applies.
+
+    Dropped frames are marked as done, so join() doesn't wait for them.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+    ):
+        super().__init__(maxsize)
+        self._overflow_policy = overflow_policy
+
+    async def put(self, item: Any) -> None:
+        if self.full() and self._absorb(item):
+            return
+        await super().put(item)
+
+    def put_nowait(self, item: Any) -> None:
+        if self.full() and self._absorb(item):
+            return
+        super().put_nowait(item)
+
+    def _absorb(self, item: Any) -> bool:
+        """Apply the overflow policy to an item that doesn't fit. Returns True
+        if the item has been queued (or merged into a queued item)."""
+        if self._overflow_policy == OverflowPolicy.DROP_OLDEST:
+            for index, queued in enumerate(self._queue):
+                if not isinstance(queued, ControlFrame):
+                    del self._queue[index]
+                    self.task_done()
+                    super().put_nowait(item)
+                    return True
+        elif self._overflow_policy == OverflowPolicy.COALESCE_AUDIO:
+            # Only plain AudioFrames; subclasses may carry more than audio.
+            if (
+                item.__class__ is AudioFrame
+                and self._queue
+                and self._queue[-1].__class__ is AudioFrame
+                and self._queue[-1].same_format(item)
+            ):
+                # Build a new frame rather than extending the queued one, in
+                # case someone else holds a reference to it.
+                self._queue[-1] = AudioFrame.concat([self._queue[-1], item])
+                return True
+
+        return False
+
+
+class PriorityFrameQueue(FrameQueue):
+    """A FrameQueue with two lanes. Frames that are instances of
+    `priority_frame_types` go in the priority lane and are returned before
+    anything in the bulk lane; everything else goes in the bulk lane. Order is
+    kept within each lane.
+
+    Priority frames are never held up by a full queue or subject to the
+    overflow policy, since the point is to get them through a backlog of bulk
+    frames. They do count towards the queue's size.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        priority_frame_types: Tuple[Type[Frame], ...] = (ControlFrame,),
+    ):
+        super().__init__(maxsize, overflow_policy)
+        self._priority_frame_types = priority_frame_types
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self._priority_queue: collections.deque = collections.deque()
+
+    def _get(self):
+        if self._priority_queue:
+            return self._priority_queue.popleft()
+        return super()._get()
+
+    def qsize(self) -> int:
+        return len(self._queue) + len(self._priority_queue)
+
+    def empty(self) -> bool:
+        return not self._queue and not self._priority_queue
+
+    async def put(self, item: Any) -> None:
+        if isinstance(item, self._priority_frame_types):
+            self.put_priority_nowait(item)
+        else:
+            await super().put(item)
+
+    def put_nowait(self, item: Any) -> None:
+        if isinstance(item, self._priority_frame_types):
+            self.put_priority_nowait(item)
+        else:
+            super().put_nowait(item)
+
+    def put_priority_nowait(self, item: Any) -> None:
+        """Put an item in the priority lane, whatever its type."""
+        self._priority_queue.append(item)
+        self._unfinished_tasks += 1
+        self._finished.clear()
+        self._wakeup_next(self._getters)
+
+    def discard_bulk(self) -> List[Any]:
+        """Remove everything in the bulk lane except ControlFrames, and return
+        what was removed. The removed items are marked as done."""
+        discarded = [i for i in self._queue if not isinstance(i, ControlFrame)]
+        if discarded:
+            kept = [i for i in self._queue if isinstance(i, ControlFrame)]
+            self._queue.clear()
+            self._queue.extend(kept)
+            for _ in discarded:
+                self.task_done()
+                self._wakeup_next(self._putters)
+        return discarded
+
+
+class LoopFrameBridge:
+    """Hands frames from other threads to an asyncio queue.
+
+    put() can be called from any thread. Frames are appended to a buffer, and
+    the first frame of a batch schedules a single callback on the event loop,
+    which moves everything in the buffer to the queue. A thread putting many
+    frames between two turns of the loop wakes it once, and no coroutine or
+    Future is made for each frame, as there is with
+    `asyncio.run_coroutine_threadsafe(queue.put(frame), loop)`.
+
+    Frames reach the queue in the order they were put. If the queue is full,
+    frames wait in the bridge for room; frames that jump the queue (those in
+    a PriorityFrameQueue's priority lane) don't wait behind them.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, target: asyncio.Queue):
+        self._loop = loop
+        self._target = target
+        # Guards _pending and _scheduled. It's only held to append a frame or
+        # to swap the buffer out.
+        self._lock = threading.Lock()
+        self._pending: collections.deque = collections.deque()
+        self._scheduled = False
+        # Frames waiting for room in the target queue. Only used on the loop.
+        self._blocked: collections.deque = collections.deque()
+        self._blocked_task: asyncio.Task | None = None
+
+    def put(self, frame: Frame) -> None:
+        with self._lock:
+            self._pending.append(frame)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._loop.call_soon_threadsafe(self._deliver)
+
+    def __len__(self) -> int:
+        """How many frames are in the bridge, on their way to the queue."""
+        return len(self._pending) + len(self._blocked)
+
+    def _jumps_queue(self, frame: Frame) -> bool:
+        return isinstance(self._target, PriorityFrameQueue) and isinstance(
+            frame, self._target._priority_frame_types)
+
+    def _deliver(self):
+        with self._lock:
+            frames = self._pending
+            self._pending = collections.deque()
+            self._scheduled = False
+
+        for frame in frames:
+            if self._blocked and not self._jumps_queue(frame):
+                self._blocked.append(frame)
+                continue
+            try:
+                self._target.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._blocked.append(frame)
+
+        if self._blocked and self._blocked_task is None:
+            self._blocked_task = self._loop.create_task(
+                self._deliver_blocked())
+
+    async def _deliver_blocked(self):
+        try:
+            while self._blocked:
+                await self._target.put(self._blocked[0])
+                self._blocked.popleft()
+        finally:
+            self._blocked_task = None
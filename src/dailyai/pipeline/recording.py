@@ -0,0 +1,156 @@
+"""Record the frames going through a pipeline to a file, and play them back.
+
+A frame log is append-only: a short header, then one record per frame, each
+a timestamp, a length and the encoded frame. Timestamps are from a monotonic
+clock, so a replay can reproduce the original timing.
+
+Frames are stored with the frame codec (see dailyai.pipeline.codec), so an
+app's own frame types have to be registered with it to be recorded.
+"""
+
+import asyncio
+import logging
+import os
+import struct
+import time
+from typing import AsyncGenerator, BinaryIO, Iterator, Tuple, Type
+
+from dailyai.pipeline.codec import decode_frame, encode_frame
+from dailyai.pipeline.frame_processor import FrameEmitter, PushFrameProcessor
+from dailyai.pipeline.frames import EndFrame, EndPipeFrame, Frame
+from dailyai.pipeline.pipeline import Pipeline
+
+MAGIC = b"DAIFRLOG"
+# Version 1 logs held pickled frames.
+VERSION = 2
+_HEADER = struct.Struct("<8sH")
+# Timestamp in nanoseconds, then the length of the encoded frame.
+_RECORD = struct.Struct("<QI")
+
+logger = logging.getLogger("dailyai")
+
+
+class FrameLogError(Exception):
+    pass
+
+
+def _open_for_append(path: str) -> BinaryIO:
+    file = open(path, "ab")
+    if file.tell() == 0:
+        file.write(_HEADER.pack(MAGIC, VERSION))
+    else:
+        with open(path, "rb") as existing:
+            _read_header(existing)
+    return file
+
+
+def _read_header(file: BinaryIO) -> int:
+    header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise FrameLogError("Not a frame log: file is too short")
+    magic, version = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise FrameLogError("Not a frame log")
+    if version != VERSION:
+        raise FrameLogError(f"Unsupported frame log version {version}")
+    return version
+
+
+def read_frame_log(path: str) -> Iterator[Tuple[int, Frame]]:
+    """Yield (timestamp in ns, frame) for each frame in a frame log. A record
+    cut short at the end of the file, eg. because the recording process died,
+    is ignored."""
+    with open(path, "rb") as file:
+        _read_header(file)
+        while True:
+            record = file.read(_RECORD.size)
+            if len(record) < _RECORD.size:
+                return
+            timestamp_ns, length = _RECORD.unpack(record)
+            payload = file.read(length)
+            if len(payload) < length:
+                return
+            yield (timestamp_ns, decode_frame(payload))
+
+
+class FrameRecorder(PushFrameProcessor):
+    """Appends each frame that passes through it to a frame log, then passes
+    it on unchanged. Put one at the start of a pipeline to record its input,
+    or anywhere else to record what crosses that point.
+
+    `frame_types` limits recording to frames of those types; other frames
+    skip the recorder altogether. Writes are buffered; the log is flushed
+    when an EndFrame or EndPipeFrame goes through, and on close().
+    """
+
+    def __init__(
+        self,
+        path: str,
+        frame_types: Tuple[Type[Frame], ...] | None = None,
+    ):
+        self._path = path
+        self._file: BinaryIO | None = None
+        if frame_types is not None:
+            self.consumed_frame_types = frame_types
+
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
+        self.record(frame)
+        await emit(frame)
+
+    def record(self, frame: Frame) -> None:
+        try:
+            payload = encode_frame(frame)
+        except Exception as e:
+            logger.warning(f"Not recording {frame}: {e}")
+        else:
+            if not self._file:
+                self._file = _open_for_append(self._path)
+            self._file.write(_RECORD.pack(time.monotonic_ns(), len(payload)))
+            self._file.write(payload)
+
+        if isinstance(frame, (EndFrame, EndPipeFrame)) and self._file:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    async def interrupted(self) -> None:
+        pass
+
+
+class FrameReplayer:
+    """Plays the frames in a frame log back into a pipeline.
+
+    With `realtime` set, frames are spaced out as they were when they were
+    recorded, divided by `speed`. Otherwise they're queued as fast as the
+    pipeline takes them, which is what you want when profiling.
+    """
+
+    def __init__(self, path: str, realtime: bool = True, speed: float = 1.0):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self._path = path
+        self._realtime = realtime
+        self._speed = speed
+
+    async def frames(self) -> AsyncGenerator[Frame, None]:
+        start_ns = time.monotonic_ns()
+        first_timestamp_ns: int | None = None
+        for timestamp_ns, frame in read_frame_log(self._path):
+            if self._realtime:
+                if first_timestamp_ns is None:
+                    first_timestamp_ns = timestamp_ns
+                due_ns = start_ns + \
+                    (timestamp_ns - first_timestamp_ns) / self._speed
+                delay_ns = due_ns - time.monotonic_ns()
+                if delay_ns > 0:
+                    await asyncio.sleep(delay_ns / 1e9)
+            yield frame
+
+    async def replay(self, pipeline: Pipeline) -> None:
+        """Queue the recorded frames on the pipeline's source queue. This
+        returns once every frame has been queued; run the pipeline as usual to
+        process them."""
+        await pipeline.queue_frames(self.frames())
@@ -0,0 +1,463 @@
+"""Run frame processors in another process, or on another host.
+
+A RemoteProcessorServer hosts frame processors and serves them over TCP or
+a Unix socket. In the bot, a RemoteProcessor stands in for a hosted
+processor: put it in a pipeline where the real processor would go, and it
+sends each frame to the server and emits whatever the hosted processor
+produces.
+
+    # On the worker
+    server = RemoteProcessorServer({"whisper": WhisperSTTService})
+    await server.serve_tcp("0.0.0.0", 9000)
+
+    # In the bot
+    connection = await RemoteConnection.open_tcp("worker", 9000)
+    pipeline = Pipeline([connection.processor("whisper"), ...])
+
+Every RemoteProcessor gets its own session on the server, with its own
+instance of the hosted processor, and any number of sessions can share one
+connection. Frames are encoded with the frame codec, so an app's own frame
+types must be registered with it on both sides.
+
+Flow control: a RemoteProcessor sends one frame at a time and waits until
+the hosted processor has finished with it, and the server sends at most
+`window` frames for a session before the RemoteProcessor has taken some of
+them, so a slow pipeline holds up only its own session.
+
+Cancellation: if the pipeline is interrupted, the hosted processor's work
+on the current frame is cancelled too, and its interrupted() method is
+called.
+"""
+
+import asyncio
+import itertools
+import logging
+import struct
+from typing import Callable, Dict, Tuple, Type
+
+from dailyai.pipeline.codec import FrameCodec, default_codec
+from dailyai.pipeline.frame_processor import (
+    FrameEmitter,
+    FrameProcessor,
+    PushFrameProcessor,
+)
+from dailyai.pipeline.frames import Frame
+
+logger = logging.getLogger("dailyai")
+
+# Every message is a header, then `length` bytes of body.
+_HEADER = struct.Struct("<IBII")  # length, type, session id, sequence number
+_COUNT = struct.Struct("<I")
+_MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+# Client to server. The body of OPEN is the name of the processor to host.
+_OPEN = 1
+_CANCEL = 2
+_INTERRUPT = 3
+_CLOSE = 4
+# The body of CREDIT is how many more frames the server may send.
+_CREDIT = 5
+# Both ways. The body is an encoded frame.
+_FRAME = 6
+# Server to client: the hosted processor has finished with a frame, or
+# failed on it (the body of ERROR is the error message). An ERROR with
+# sequence number 0 means the session couldn't be opened.
+_DONE = 7
+_ERROR = 8
+
+DEFAULT_WINDOW = 32
+
+
+class RemoteProcessorError(Exception):
+    pass
+
+
+class _Connection:
+    """Reading and writing messages on one stream."""
+
+    def __init__(self, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def send_nowait(
+        self,
+        message_type: int,
+        session_id: int,
+        sequence: int = 0,
+        body: bytes = b"",
+    ) -> None:
+        if self.writer.is_closing():
+            return
+        self.writer.writelines([
+            _HEADER.pack(len(body), message_type, session_id, sequence),
+            body,
+        ])
+
+    async def send(
+        self,
+        message_type: int,
+        session_id: int,
+        sequence: int = 0,
+        body: bytes = b"",
+    ) -> None:
+        self.send_nowait(message_type, session_id, sequence, body)
+        await self.writer.drain()
+
+    async def receive(self) -> Tuple[int, int, int, bytes] | None:
+        """The next message as (type, session id, sequence, body), or None
+        once the other end has closed the connection."""
+        try:
+            header = await self.reader.readexactly(_HEADER.size)
+            length, message_type, session_id, sequence = _HEADER.unpack(
+                header)
+            if length > _MAX_MESSAGE_SIZE:
+                raise RemoteProcessorError(
+                    f"Message of {length} bytes is too big")
+            body = await self.reader.readexactly(length)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        return (message_type, session_id, sequence, body)
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class RemoteConnection:
+    """The bot's end of a connection to a RemoteProcessorServer. Make
+    RemoteProcessors for the pipeline with processor()."""
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        codec: FrameCodec = default_codec,
+        window: int = DEFAULT_WINDOW,
+    ):
+        self._connection = _Connection(reader, writer)
+        self.codec = codec
+        self.window = window
+        self._session_ids = itertools.count(1)
+        self._sessions: Dict[int, RemoteProcessor] = {}
+        self._reader_task = asyncio.create_task(self._read_messages())
+
+    @classmethod
+    async def open_tcp(cls, host: str, port: int,
+                       **kwargs) -> "RemoteConnection":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, **kwargs)
+
+    @classmethod
+    async def open_unix(cls, path: str, **kwargs) -> "RemoteConnection":
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer, **kwargs)
+
+    def processor(
+        self,
+        name: str,
+        consumed_frame_types: Tuple[Type[Frame], ...] | None = None,
+    ) -> "RemoteProcessor":
+        """A RemoteProcessor for a new session with the processor the server
+        hosts as `name`. If `consumed_frame_types` is given, other frames skip
+        the RemoteProcessor, and don't make the round trip to the server."""
+        return RemoteProcessor(self, name, consumed_frame_types)
+
+    async def close(self) -> None:
+        self._reader_task.cancel()
+        await self._connection.close()
+        self._closed()
+
+    def _closed(self):
+        for session in self._sessions.values():
+            session._inbox.put_nowait(None)
+        self._sessions.clear()
+
+    async def _read_messages(self):
+        # Frames are decoded by the RemoteProcessor they're for, so a frame
+        # that can't be decoded only fails that processor's frame. Anything
+        # that goes wrong here leaves the stream unreadable, so it closes
+        # every session.
+        try:
+            while True:
+                message = await self._connection.receive()
+                if message is None:
+                    break
+                message_type, session_id, sequence, body = message
+                session = self._sessions.get(session_id)
+                if session:
+                    session._inbox.put_nowait((message_type, sequence, body))
+        except RemoteProcessorError as e:
+            logger.error(f"Remote processor connection failed: {e}")
+        finally:
+            self._closed()
+
+
+class RemoteProcessor(PushFrameProcessor):
+    """Stands in for a frame processor hosted by a RemoteProcessorServer. Get
+    one from RemoteConnection.processor()."""
+
+    def __init__(
+        self,
+        connection: RemoteConnection,
+        name: str,
+        consumed_frame_types: Tuple[Type[Frame], ...] | None = None,
+    ):
+        self._connection = connection
+        self._name = name
+        self._session_id: int | None = None
+        # Set if the server couldn't open the session.
+        self._error: str | None = None
+        self._sequence = 0
+        # Frames received since we last gave the server more credit.
+        self._unacknowledged = 0
+        self._inbox: asyncio.Queue[Tuple[int,
+                                         int, bytes] | None] = asyncio.Queue()
+        self.consumed_frame_types = consumed_frame_types
+
+    def _open(self) -> int:
+        if self._session_id is None:
+            connection = self._connection
+            if connection._reader_task.done():
+                raise ConnectionError(
+                    "The remote processor connection is closed")
+            self._session_id = next(connection._session_ids)
+            connection._sessions[self._session_id] = self
+            connection._connection.send_nowait(
+                _OPEN, self._session_id, connection.window, self._name.encode())
+        return self._session_id
+
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
+        if self._error is not None:
+            raise RemoteProcessorError(self._error)
+        session_id = self._open()
+        connection = self._connection
+        self._sequence += 1
+        sequence = self._sequence
+        await connection._connection.send(
+            _FRAME, session_id, sequence, connection.codec.encode(frame))
+
+        finished = False
+        try:
+            while True:
+                message = await self._inbox.get()
+                if message is None:
+                    finished = True
+                    raise ConnectionError(
+                        "The remote processor connection was closed")
+                message_type, message_sequence, body = message
+                if message_type == _FRAME:
+                    self._acknowledge_frame()
+                elif message_type == _ERROR and message_sequence == 0:
+                    finished = True
+                    self._error = body.decode()
+                    raise RemoteProcessorError(self._error)
+                if message_sequence != sequence:
+                    # Left over from a frame we cancelled.
+                    continue
+                if message_type == _FRAME:
+                    try:
+                        output_frame = connection.codec.decode(body)
+                    except Exception as e:
+                        # Give up on this frame, and cancel the rest of its
+                        # output, but keep the session.
+                        raise RemoteProcessorError(
+                            f"Couldn't decode a frame from the server: "
+                            f"{e.__class__.__name__}: {e}") from e
+                    await emit(output_frame)
+                elif message_type == _DONE:
+                    finished = True
+                    return
+                elif message_type == _ERROR:
+                    finished = True
+                    raise RemoteProcessorError(body.decode())
+        finally:
+            if not finished:
+                connection._connection.send_nowait(
+                    _CANCEL, session_id, sequence)
+
+    def _acknowledge_frame(self):
+        self._unacknowledged += 1
+        if self._unacknowledged * 2 >= self._connection.window:
+            self._connection._connection.send_nowait(
+                _CREDIT, self._session_id, 0,
+                _COUNT.pack(self._unacknowledged))
+            self._unacknowledged = 0
+
+    async def interrupted(self) -> None:
+        if self._session_id is not None:
+            self._connection._connection.send_nowait(
+                _INTERRUPT, self._session_id)
+
+    async def close(self) -> None:
+        """End the session, and with it the hosted processor."""
+        if self._session_id is not None:
+            self._connection._connection.send_nowait(
+                _CLOSE, self._session_id)
+            self._connection._sessions.pop(self._session_id, None)
+            self._session_id = None
+
+
+class _Session:
+    """A hosted processor, and the frames waiting for it."""
+
+    def __init__(self, processor: FrameProcessor, credit: int):
+        self.processor = processor
+        self.credit = credit
+        self.credit_available = asyncio.Event()
+        self.credit_available.set()
+        self.inbox: asyncio.Queue[Tuple[int, Frame] | None] = asyncio.Queue()
+        self.sequence = 0
+        self.current: asyncio.Task | None = None
+        self.worker: asyncio.Task | None = None
+
+    def add_credit(self, count: int):
+        self.credit += count
+        self.credit_available.set()
+
+    async def take_credit(self):
+        while self.credit <= 0:
+            self.credit_available.clear()
+            await self.credit_available.wait()
+        self.credit -= 1
+
+
+class RemoteProcessorServer:
+    """Hosts frame processors for RemoteProcessors to use. `processors` maps
+    the name a RemoteProcessor asks for to a function that makes a new
+    processor; each session gets its own."""
+
+    def __init__(
+        self,
+        processors: Dict[str, Callable[[], FrameProcessor]],
+        codec: FrameCodec = default_codec,
+    ):
+        self._factories = processors
+        self.codec = codec
+
+    async def serve_tcp(self, host: str | None,
+                        port: int, **kwargs) -> asyncio.Server:
+        return await asyncio.start_server(
+            self.handle_connection, host, port, **kwargs)
+
+    async def serve_unix(self, path: str, **kwargs) -> asyncio.Server:
+        return await asyncio.start_unix_server(
+            self.handle_connection, path, **kwargs)
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = _Connection(reader, writer)
+        sessions: Dict[int, _Session] = {}
+        try:
+            while True:
+                message = await connection.receive()
+                if message is None:
+                    break
+                message_type, session_id, sequence, body = message
+                if message_type == _OPEN:
+                    session = self._open_session(
+                        connection, session_id, sequence, body.decode())
+                    if session:
+                        sessions[session_id] = session
+                    continue
+
+                session = sessions.get(session_id)
+                if session is None:
+                    continue
+                if message_type == _FRAME:
+                    try:
+                        frame = self.codec.decode(body)
+                    except Exception as e:
+                        # Only this frame fails; the session, and the others
+                        # on the connection, carry on.
+                        logger.warning(
+                            f"Couldn't decode a frame for session {session_id}: {e}")
+                        connection.send_nowait(
+                            _ERROR, session_id, sequence,
+                            f"{e.__class__.__name__}: {e}".encode())
+                        continue
+                    session.inbox.put_nowait((sequence, frame))
+                elif message_type == _CREDIT:
+                    session.add_credit(_COUNT.unpack(body)[0])
+                elif message_type == _CANCEL:
+                    if session.current and session.sequence == sequence:
+                        session.current.cancel()
+                elif message_type == _INTERRUPT:
+                    session.inbox.put_nowait(None)
+                elif message_type == _CLOSE:
+                    session.worker.cancel()
+                    del sessions[session_id]
+        finally:
+            for session in sessions.values():
+                session.worker.cancel()
+            await connection.close()
+
+    def _open_session(
+        self,
+        connection: _Connection,
+        session_id: int,
+        window: int,
+        name: str,
+    ) -> _Session | None:
+        factory = self._factories.get(name)
+        if factory is None:
+            connection.send_nowait(
+                _ERROR, session_id, 0,
+                f"No processor called {name!r} here".encode())
+            return None
+        session = _Session(factory(), window)
+        session.worker = asyncio.create_task(
+            self._run_session(connection, session_id, session))
+        return session
+
+    async def _run_session(
+        self, connection: _Connection, session_id: int, session: _Session
+    ):
+        while True:
+            item = await session.inbox.get()
+            if item is None:
+                await session.processor.interrupted()
+                continue
+
+            session.sequence, frame = item
+            session.current = asyncio.create_task(
+                self._process_frame(connection, session_id, session, frame))
+            try:
+                # Wait without taking on a cancellation of the frame's task,
+                # which just means the client has given up on the frame.
+                await asyncio.wait([session.current])
+            except asyncio.CancelledError:
+                session.current.cancel()
+                raise
+            finally:
+                session.current = None
+
+    async def _process_frame(
+        self,
+        connection: _Connection,
+        session_id: int,
+        session: _Session,
+        frame: Frame,
+    ):
+        sequence = session.sequence
+
+        async def emit(output_frame: Frame):
+            await session.take_credit()
+            await connection.send(
+                _FRAME, session_id, sequence, self.codec.encode(output_frame))
+
+        try:
+            await session.processor.on_frame(frame, emit)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(
+                f"Error in hosted processor for session {session_id}")
+            await connection.send(
+                _ERROR, session_id, sequence, f"{e.__class__.__name__}: {e}".encode())
+        else:
+            await connection.send(_DONE, session_id, sequence)
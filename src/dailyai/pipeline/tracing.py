@@ -0,0 +1,188 @@
+import collections
+import threading
+import time
+from enum import Enum
+from typing import Deque, Dict, List, Tuple, Type
+
+from dailyai.pipeline.frame_processor import FrameEmitter, PushFrameProcessor
+from dailyai.pipeline.frames import Frame
+from dailyai.pipeline.instrumentation import LatencyHistogram
+
+
+class TurnHop(Enum):
+    """The points a conversational turn passes through on its way from the
+    user to the bot's response, in the order they normally happen."""
+
+    # The transport's VAD decided the user stopped speaking.
+    VAD_STOP = "vad_stop"
+    # A transcription of what the user said arrived.
+    TRANSCRIPTION = "transcription"
+    # The user's words were added to the LLM context and sent to the LLM.
+    AGGREGATOR = "aggregator"
+    LLM_FIRST_TOKEN = "llm_first_token"
+    FIRST_SENTENCE = "first_sentence"
+    TTS_FIRST_BYTE = "tts_first_byte"
+    # The transport wrote the first audio of the response to its mic.
+    MIC_WRITE = "mic_write"
+
+
+_HOP_ORDER = {hop: order for order, hop in enumerate(TurnHop)}
+
+
+class Turn:
+    """When each hop of one turn happened, in perf_counter_ns time. Only the
+    first time a hop is reached counts."""
+
+    def __init__(self, number: int, first_hop: TurnHop):
+        self.number = number
+        self.first_hop = first_hop
+        self.marks: Dict[TurnHop, int] = {}
+
+    @property
+    def start_ns(self) -> int:
+        """When the user stopped speaking, or if that wasn't marked, the
+        earliest hop."""
+        if TurnHop.VAD_STOP in self.marks:
+            return self.marks[TurnHop.VAD_STOP]
+        return min(self.marks.values())
+
+    @property
+    def complete(self) -> bool:
+        return TurnHop.MIC_WRITE in self.marks
+
+    @property
+    def latency(self) -> float | None:
+        """Seconds from the start of the turn to the first audio of the
+        response, or None if the response never started."""
+        if not self.complete:
+            return None
+        return (self.marks[TurnHop.MIC_WRITE] - self.start_ns) / 1e9
+
+    def timeline(self) -> List[Tuple[TurnHop, float]]:
+        """Each hop reached, with the seconds since the start of the turn.
+        A transcription can arrive before the VAD notices the user has
+        stopped, so offsets can be negative."""
+        start = self.start_ns
+        return [(hop, (ns - start) / 1e9)
+                for hop, ns in sorted(self.marks.items(), key=lambda m: m[1])]
+
+
+class TurnTracer:
+    """Measures how long the bot takes to respond, from the user stopping
+    speaking to the first audio of the response being written out, and where
+    that time goes.
+
+    The transport marks the first and last hops: pass the tracer to it as
+    `turn_tracer`. The hops in between are marked by taps, which are frame
+    processors that note when the first frame of a given type goes past:
+
+        tracer = TurnTracer()
+        transport = DailyTransportService(..., turn_tracer=tracer)
+        pipeline = Pipeline([
+            user_context_aggregator,
+            tracer.tap(TurnHop.AGGREGATOR, (OpenAILLMContextFrame,)),
+            llm,
+            tracer.tap(TurnHop.LLM_FIRST_TOKEN, (TextFrame,)),
+            tts,
+            tracer.tap(TurnHop.TTS_FIRST_BYTE, (AudioFrame,)),
+        ])
+
+    A turn ends when its response starts to be written out. Its latency is
+    measured from VAD_STOP, or from the first hop if the transport doesn't
+    use VAD.
+    mark() is thread-safe, so it can be called from transport threads.
+    """
+
+    def __init__(self, max_turns: int = 1000):
+        self._lock = threading.Lock()
+        self._turns: Deque[Turn] = collections.deque(maxlen=max_turns)
+        self._current: Turn | None = None
+        self._turn_count = 0
+
+    def mark(self, hop: TurnHop, timestamp_ns: int | None = None) -> None:
+        """Record that the current turn reached `hop`.
+
+        Reaching the hop the current turn started with again (eg. VAD_STOP,
+        because the user spoke again) starts a new turn, as does reaching an
+        earlier hop once the current turn's response has started. Otherwise
+        only the first time the turn reaches each hop counts, so taps can
+        mark every frame they see."""
+        if timestamp_ns is None:
+            timestamp_ns = time.perf_counter_ns()
+        order = _HOP_ORDER[hop]
+        with self._lock:
+            current = self._current
+            if current is None or (
+                order <= _HOP_ORDER[current.first_hop]
+                and (hop == current.first_hop or current.complete)
+            ):
+                if hop == TurnHop.MIC_WRITE:
+                    # The rest of an earlier response being written out.
+                    return
+                self._turn_count += 1
+                current = self._current = Turn(self._turn_count, hop)
+                self._turns.append(current)
+            if hop not in current.marks and not current.complete:
+                current.marks[hop] = timestamp_ns
+
+    def tap(
+        self, hop: TurnHop, frame_types: Tuple[Type[Frame], ...]
+    ) -> "TurnTracerTap":
+        """A frame processor that marks `hop` when a frame of one of
+        `frame_types` passes through it."""
+        return TurnTracerTap(self, hop, frame_types)
+
+    @property
+    def turns(self) -> List[Turn]:
+        with self._lock:
+            return list(self._turns)
+
+    def histograms(self) -> Dict[TurnHop, LatencyHistogram]:
+        """For each hop, a histogram of the time from the start of the turn
+        to that hop, over the completed turns."""
+        histograms: Dict[TurnHop, LatencyHistogram] = {}
+        for turn in self.turns:
+            if not turn.complete:
+                continue
+            start = turn.start_ns
+            for hop, ns in turn.marks.items():
+                histograms.setdefault(
+                    hop, LatencyHistogram()).record(
+                    ns - start)
+        return {hop: histograms[hop] for hop in TurnHop if hop in histograms}
+
+    def report(self) -> str:
+        """A table of the 50th, 90th and 99th percentile time to each hop, in
+        milliseconds, across the completed turns."""
+        histograms = self.histograms()
+        completed = histograms[TurnHop.MIC_WRITE].count if histograms else 0
+        lines = [
+            f"{completed} completed turns of {len(self.turns)}",
+            f"{'hop':<16} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}",
+        ]
+        for hop, histogram in histograms.items():
+            lines.append(f"{hop.value:<16} {histogram.count:>6} " + " ".join(
+                f"{histogram.percentile(p) * 1000:>9.1f}" for p in (50, 90, 99)))
+        return "\n".join(lines)
+
+
+class TurnTracerTap(PushFrameProcessor):
+    """Passes every frame on unchanged, marking a TurnTracer hop on the way.
+    The pipeline only sends it frames of the types it's watching for."""
+
+    def __init__(
+        self,
+        tracer: TurnTracer,
+        hop: TurnHop,
+        frame_types: Tuple[Type[Frame], ...],
+    ):
+        self._tracer = tracer
+        self._hop = hop
+        self.consumed_frame_types = frame_types
+
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
+        self._tracer.mark(self._hop)
+        await emit(frame)
+
+    async def interrupted(self) -> None:
+        pass
@@ -3,7 +3,12 @@ import io
 import logging
 import time
 import wave
-from dailyai.pipeline.frame_processor import FrameProcessor
+from contextlib import aclosing
+from dailyai.pipeline.frame_processor import (
+    FrameEmitter,
+    FrameProcessor,
+    PushFrameProcessor,
+)
 
 from dailyai.pipeline.frames import (
     AudioFrame,
@@ -36,7 +41,9 @@ class LLMService(AIService):
         super().__init__()
 
 
-class TTSService(AIService):
+class TTSService(AIService, PushFrameProcessor):
+    consumed_frame_types = (TextFrame, EndFrame, EndPipeFrame)
+
     def __init__(self, aggregate_sentences=True):
         super().__init__()
         self.aggregate_sentences: bool = aggregate_sentences
@@ -53,15 +60,16 @@ class TTSService(AIService):
         # yield empty bytes here, so linting can infer what this method does
         yield bytes()
 
-    async def process_frame(self, frame: Frame) -> AsyncGenerator[Frame, None]:
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
         if isinstance(frame, EndFrame) or isinstance(frame, EndPipeFrame):
             if self.current_sentence:
-                async for audio_chunk in self.run_tts(self.current_sentence):
-                    yield AudioFrame(audio_chunk)
-                yield TextFrame(self.current_sentence)
+                async with aclosing(self.run_tts(self.current_sentence)) as chunks:
+                    async for audio_chunk in chunks:
+                        await emit(AudioFrame(audio_chunk, self.get_mic_sample_rate()))
+                await emit(TextFrame(self.current_sentence))
 
         if not isinstance(frame, TextFrame):
-            yield frame
+            await emit(frame)
             return
 
         text: str | None = None
@@ -74,15 +82,25 @@ class TTSService(AIService):
                 self.current_sentence = ""
 
         if text:
-            async for audio_chunk in self.run_tts(text):
-                yield AudioFrame(audio_chunk)
+            # If we're cancelled mid-sentence, close run_tts too, so any
+            # request it has in flight is aborted now rather than when it's
+            # collected.
+            async with aclosing(self.run_tts(text)) as chunks:
+                async for audio_chunk in chunks:
+                    await emit(AudioFrame(audio_chunk, self.get_mic_sample_rate()))
 
             # note we pass along the text frame *after* the audio, so the text
             # frame is completed after the audio is processed.
-            yield TextFrame(text)
+            await emit(TextFrame(text))
+
+    async def interrupted(self) -> None:
+        # The rest of an interrupted sentence won't be coming.
+        self.current_sentence = ""
 
 
 class ImageGenService(AIService):
+    consumed_frame_types = (TextFrame,)
+
     def __init__(self, image_size, **kwargs):
         super().__init__(**kwargs)
         self.image_size = image_size
@@ -101,7 +119,7 @@ class ImageGenService(AIService):
         yield ImageFrame(url, image_data)
 
 
-class STTService(AIService):
+class STTService(AIService, PushFrameProcessor):
     """STTService is a base class for speech-to-text services."""
 
     _frame_rate: int
@@ -115,33 +133,32 @@ class STTService(AIService):
         """Returns transcript as a string"""
         pass
 
-    async def process_frame(self, frame: Frame) -> AsyncGenerator[Frame, None]:
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
         """Processes a frame of audio data, either buffering or transcribing it."""
         if not isinstance(frame, AudioFrame):
             return
 
-        data = frame.data
         content = io.BufferedRandom(io.BytesIO())
-        ww = wave.open(self._content, "wb")
-        ww.setnchannels(1)
-        ww.setsampwidth(2)
-        ww.setframerate(self._frame_rate)
-        ww.writeframesraw(data)
+        ww = wave.open(content, "wb")
+        ww.setnchannels(frame.channels)
+        ww.setsampwidth(frame.sample_width)
+        ww.setframerate(frame.sample_rate)
+        ww.writeframesraw(frame.data)
         ww.close()
         content.seek(0)
         text = await self.run_stt(content)
-        yield TranscriptionQueueFrame(text, "", str(time.time()))
+        await emit(TranscriptionQueueFrame(text, "", str(time.time())))
 
 
-class FrameLogger(AIService):
+class FrameLogger(AIService, PushFrameProcessor):
     def __init__(self, prefix="Frame", **kwargs):
         super().__init__(**kwargs)
         self.prefix = prefix
 
-    async def process_frame(self, frame: Frame) -> AsyncGenerator[Frame, None]:
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
         if isinstance(frame, (AudioFrame, ImageFrame)):
             self.logger.info(f"{self.prefix}: {type(frame)}")
         else:
             print(f"{self.prefix}: {frame}")
 
-        yield frame
+        await emit(frame)
@@ -34,6 +34,10 @@ class AnthropicLLMService(LLMService):
             model=self.model,
             stream=True,
         )
-        async for event in stream:
-            if event.type == "content_block_delta":
-                yield TextFrame(event.delta.text)
+        try:
+            async for event in stream:
+                if event.type == "content_block_delta":
+                    yield TextFrame(event.delta.text)
+        finally:
+            # Drop the connection if we're interrupted mid-response.
+            await stream.close()
@@ -0,0 +1,118 @@
+import threading
+
+from dailyai.pipeline.frames import AudioFrame
+
+
+class AudioInputRing:
+    """The audio a transport captures, read by any number of consumers (VAD,
+    STT, recording, level meters) at their own pace and chunk sizes.
+
+    One capture thread writes the audio once; each consumer gets an
+    AudioInputReader from reader(). Writing never waits for the readers, and
+    costs the same however many there are.
+
+    The ring holds `capacity` bytes, stored twice over, one copy after the
+    other, so any stretch of up to `capacity` bytes is contiguous in memory:
+    readers get memoryviews of the ring, not copies. A view stays valid until
+    the writer comes round to it again, `capacity` bytes later, so a reader
+    that keeps audio for longer, or hands it to another thread that might,
+    has to copy it.
+    """
+
+    def __init__(self, capacity: int, frame_size: int = 2):
+        # Whole audio frames only, so reads never straddle a sample.
+        self.capacity = capacity - capacity % frame_size
+        self.frame_size = frame_size
+        self._buffer = bytearray(2 * self.capacity)
+        self._view = memoryview(self._buffer)
+        # Counts every byte ever written, so it grows past the end of the
+        # buffer; `position % capacity` is where a byte lives.
+        self.write_position = 0
+        self.closed = False
+        self._changed = threading.Condition()
+
+    def reader(self) -> "AudioInputReader":
+        """A new reader, which gets the audio written from now on."""
+        return AudioInputReader(self)
+
+    def write(self, data: bytes | memoryview) -> None:
+        data = memoryview(data).cast("B")
+        skipped = 0
+        if len(data) > self.capacity:
+            # Only the newest audio fits.
+            skipped = len(data) - self.capacity
+            data = data[skipped:]
+        count = len(data)
+        start = (self.write_position + skipped) % self.capacity
+        first = min(count, self.capacity - start)
+        for offset in (0, self.capacity):
+            self._buffer[offset + start:offset + start + first] = data[:first]
+            if count > first:
+                self._buffer[offset:offset + count - first] = data[first:]
+        with self._changed:
+            self.write_position += skipped + count
+            self._changed.notify_all()
+
+    def close(self) -> None:
+        """No more audio is coming. Readers still get what's been written, a
+        whole read at a time, and then None."""
+        with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+
+class AudioInputReader:
+    """One consumer's place in an AudioInputRing. Get one from
+    AudioInputRing.reader(), and read from one thread at a time."""
+
+    def __init__(self, ring: AudioInputRing):
+        self._ring = ring
+        self.position = ring.write_position
+        # Bytes of audio that were overwritten before this reader got to
+        # them.
+        self.overrun_bytes = 0
+
+    @property
+    def available(self) -> int:
+        """Bytes of audio written and not read yet."""
+        return min(self._ring.write_position - self.position,
+                   self._ring.capacity)
+
+    def read(
+        self, frame_count: int, timeout: float | None = None
+    ) -> memoryview | None:
+        """Wait for the next `frame_count` audio frames and return them, as a
+        view of the ring. Returns None once the ring is closed with fewer
+        than that left to read, or if `timeout` seconds pass first. A reader
+        that's fallen more than the ring's capacity behind skips to the
+        oldest audio still there."""
+        ring = self._ring
+        size = frame_count * ring.frame_size
+        if size > ring.capacity:
+            raise ValueError(
+                f"Can't read {size} bytes from a ring of {ring.capacity}")
+        with ring._changed:
+            if not ring._changed.wait_for(
+                    lambda: (ring.write_position - self.position >= size
+                             or ring.closed),
+                    timeout):
+                return None
+            if ring.write_position - self.position < size:
+                # Closed, with less than a whole read left.
+                return None
+            behind = ring.write_position - self.position
+            if behind > ring.capacity:
+                self.overrun_bytes += behind - ring.capacity
+                self.position = ring.write_position - ring.capacity
+        start = self.position % ring.capacity
+        self.position += size
+        return ring._view[start:start + size]
+
+    def read_frame(
+        self, frame_count: int, sample_rate: int, timeout: float | None = None
+    ) -> AudioFrame | None:
+        """read(), as an AudioFrame that shares the ring's buffer."""
+        data = self.read(frame_count, timeout)
+        if data is None:
+            return None
+        return AudioFrame(data, sample_rate)
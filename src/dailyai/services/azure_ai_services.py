@@ -45,7 +45,14 @@ class AzureTTSService(TTSService):
             "<prosody rate='1.05'>"
             f"{sentence}"
             "</prosody></mstts:express-as></voice></speak> ")
-        result = await asyncio.to_thread(self.speech_synthesizer.speak_ssml, (ssml))
+        result_future = self.speech_synthesizer.speak_ssml_async(ssml)
+        try:
+            result = await asyncio.to_thread(result_future.get)
+        except asyncio.CancelledError:
+            # The thread can't be cancelled, but the synthesis can, which
+            # makes the thread return.
+            self.speech_synthesizer.stop_speaking_async()
+            raise
         self.logger.info("Got azure tts result")
         if result.reason == ResultReason.SynthesizingAudioCompleted:
             self.logger.info("Returning result")
@@ -2,17 +2,14 @@ from abc import abstractmethod
 import asyncio
 import itertools
 import logging
-import numpy as np
-import pyaudio
-import torch
-import queue
 import threading
 import time
 from typing import Any, AsyncGenerator
-from enum import Enum
 from dailyai.pipeline.frame_processor import FrameProcessor
 
 from dailyai.pipeline.frames import (
+    ControlFrame,
+    ReceivedAppMessageFrame,
     SendAppMessageFrame,
     AudioFrame,
     EndFrame,
@@ -22,54 +19,32 @@ from dailyai.pipeline.frames import (
     SpriteFrame,
     StartFrame,
     TextFrame,
+    TranscriptionQueueFrame,
     UserStartedSpeakingFrame,
     UserStoppedSpeakingFrame,
 )
 from dailyai.pipeline.pipeline import Pipeline
+from dailyai.pipeline.queues import (
+    FrameQueue,
+    LoopFrameBridge,
+    OverflowPolicy,
+    PriorityFrameQueue,
+)
+from dailyai.pipeline.tracing import TurnHop, TurnTracer
 from dailyai.services.ai_services import TTSService
-
-torch.set_num_threads(1)
-
-model, utils = torch.hub.load(
-    repo_or_dir="snakers4/silero-vad", model="silero_vad", force_reload=False
+from dailyai.services.audio_input import AudioInputReader, AudioInputRing
+from dailyai.services.output_queue import OutputQueue
+from dailyai.services.presentation import AudioClock, PresentationScheduler
+from dailyai.services.vad import (
+    BatchedVADEngine,
+    VADModel,
+    VADProcessor,
+    VADState,
+    VADStateMachine,
+    default_vad_model,
 )
 
-(get_speech_timestamps, save_audio, read_audio, VADIterator, collect_chunks) = utils
-
-# Taken from utils_vad.py
-
-
-def validate(model, inputs: torch.Tensor):
-    with torch.no_grad():
-        outs = model(inputs)
-    return outs
-
-
-# Provided by Alexander Veysov
-
-
-def int2float(sound):
-    abs_max = np.abs(sound).max()
-    sound = sound.astype("float32")
-    if abs_max > 0:
-        sound *= 1 / 32768
-    sound = sound.squeeze()  # depends on the use case
-    return sound
-
-
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
 SAMPLE_RATE = 16000
-CHUNK = int(SAMPLE_RATE / 10)
-
-audio = pyaudio.PyAudio()
-
-
-class VADState(Enum):
-    QUIET = 1
-    STARTING = 2
-    SPEAKING = 3
-    STOPPING = 4
 
 
 class BaseTransportService:
@@ -90,30 +65,92 @@ class BaseTransportService:
         self._vad_stop_s = kwargs.get("vad_stop_s") or 0.8
         self._context = kwargs.get("context") or []
         self._vad_enabled = kwargs.get("vad_enabled") or False
-
-        if self._vad_enabled and self._speaker_enabled:
-            raise Exception(
-                "Sorry, you can't use speaker_enabled and vad_enabled at the same time. Please set one to False."
-            )
+        # If given, VAD runs in this VADProcessor, on the event loop, over the
+        # audio the transport receives, rather than in a thread of its own.
+        # The processor's own vad_start_s and vad_stop_s apply.
+        self._vad_processor: VADProcessor | None = kwargs.get(
+            "vad_processor") or None
+
+        # With the speaker or VAD enabled, a capture thread reads the
+        # received audio into this ring, once, and the speaker and VAD
+        # threads read it from there, as can any other consumer. It's made
+        # by run(), at the speaker sample rate then.
+        self._audio_input_buffer_s = kwargs.get("audio_input_buffer_s") or 10
+        self.audio_input: AudioInputRing | None = None
 
         self._vad_samples = 1536
         vad_frame_s = self._vad_samples / SAMPLE_RATE
         self._vad_start_frames = round(self._vad_start_s / vad_frame_s)
         self._vad_stop_frames = round(self._vad_stop_s / vad_frame_s)
-        self._vad_starting_count = 0
-        self._vad_stopping_count = 0
-        self._vad_state = VADState.QUIET
+        self._vad_state_machine = VADStateMachine(
+            self._vad_start_frames, self._vad_stop_frames)
+        # If given, a BatchedVADEngine (usually shared with other transports)
+        # runs the VAD model instead of this transport's VAD thread.
+        self._vad_engine: BatchedVADEngine | None = kwargs.get(
+            "vad_engine") or None
+        # Otherwise the VAD thread runs `vad_model`, by default the Silero
+        # model shared by every transport in the process, behind a gate that
+        # skips it while the user is clearly silent. It's only loaded if VAD
+        # is enabled, when the VAD thread starts.
+        self._vad_model: VADModel | None = kwargs.get("vad_model") or None
         self._user_is_speaking = False
 
         duration_minutes = kwargs.get("duration_minutes") or 10
         self._expiration = time.time() + duration_minutes * 60
 
-        self.send_queue = asyncio.Queue()
-        self.receive_queue = asyncio.Queue()
+        # Output goes straight from the pipeline to the frame consumer thread:
+        # audio through a ring buffer that holds up to `max_audio_ahead_s`
+        # seconds of it, which holds up the pipeline once it's full, and
+        # other frames through a side channel that keeps their place relative
+        # to the audio. Only StartFrame skips ahead of queued audio by
+        # default: the other frames (eg. an EndFrame or the TextFrame after a
+        # sentence's audio) have to stay behind the audio they follow.
+        max_audio_ahead_s = kwargs.get("max_audio_ahead_s") or 30
+        for option in ("send_queue_size", "send_queue_overflow_policy"):
+            if kwargs.get(option) is not None:
+                logging.getLogger().warning(
+                    f"{option} is deprecated and ignored: the send queue "
+                    "holds max_audio_ahead_s seconds of audio, and makes "
+                    "the pipeline wait when it's full")
+        self.send_queue = OutputQueue(
+            int(max_audio_ahead_s * self._mic_sample_rate) * 2,
+            kwargs.get("send_priority_frame_types") or (StartFrame,),
+        )
+
+        # Receive queue sizes are in frames; 0 means unbounded. When a bounded
+        # queue is full, its overflow policy decides whether the writer
+        # waits, the oldest media frame is dropped, or adjacent audio frames
+        # are merged. Control frames and VAD events jump ahead of queued
+        # audio.
+        self.receive_queue = PriorityFrameQueue(
+            kwargs.get("receive_queue_size") or 0,
+            kwargs.get("receive_queue_overflow_policy") or OverflowPolicy.BLOCK,
+            kwargs.get("receive_priority_frame_types") or (
+                ControlFrame,
+                UserStartedSpeakingFrame,
+                UserStoppedSpeakingFrame,
+                TranscriptionQueueFrame,
+                ReceivedAppMessageFrame,
+            ),
+        )
+
+        # Nothing reads the completed queue unless there's a post-processor, so
+        # by default a bounded completed queue drops its oldest frames.
+        self.completed_queue = FrameQueue(
+            kwargs.get("completed_queue_size") or 0,
+            kwargs.get("completed_queue_overflow_policy") or OverflowPolicy.DROP_OLDEST,
+        )
 
-        self.completed_queue = asyncio.Queue()
+        # Marks when the user stops speaking and when the response starts
+        # being written to the mic; see TurnTracer.
+        self._turn_tracer: TurnTracer | None = kwargs.get(
+            "turn_tracer") or None
 
-        self._threadsafe_send_queue = queue.Queue()
+        # How much of the audio sent to the mic has been played. Image and
+        # sprite frames wait in the presentation scheduler until it catches up
+        # with them.
+        self.audio_clock = AudioClock(self._mic_sample_rate)
+        self._presentation = PresentationScheduler(self.audio_clock)
 
         self._images = None
 
@@ -122,17 +159,35 @@ class BaseTransportService:
         except RuntimeError:
             self._loop = None
 
+        # The transport's threads hand frames to the receive and completed
+        # queues through these, in batches.
+        self._receive_bridge: LoopFrameBridge | None = None
+        self._completed_bridge: LoopFrameBridge | None = None
+        # The received audio goes through the VAD processor, if there is one.
+        self._vad_input_queue: asyncio.Queue = asyncio.Queue()
+        self._audio_bridge: LoopFrameBridge | None = None
+        if self._loop:
+            self._receive_bridge = LoopFrameBridge(
+                self._loop, self.receive_queue)
+            self._completed_bridge = LoopFrameBridge(
+                self._loop, self.completed_queue)
+            self._audio_bridge = self._receive_bridge
+            if self._vad_enabled and self._vad_processor:
+                self._audio_bridge = LoopFrameBridge(
+                    self._loop, self._vad_input_queue)
+
         self._stop_threads = threading.Event()
         self._is_interrupted = threading.Event()
 
         self._logger: logging.Logger = logging.getLogger()
 
     async def run(self, pipeline: Pipeline | None = None, override_pipeline_source_queue=True):
+        # In case the sample rates were changed after we were constructed.
+        self.audio_clock.sample_rate = self._mic_sample_rate
+        self.audio_input = AudioInputRing(
+            int(self._audio_input_buffer_s * self._speaker_sample_rate) * 2)
         self._prerun()
 
-        async_output_queue_marshal_task = asyncio.create_task(
-            self._marshal_frames())
-
         self._camera_thread = threading.Thread(
             target=self._run_camera, daemon=True)
         self._camera_thread.start()
@@ -142,16 +197,32 @@ class BaseTransportService:
         )
         self._frame_consumer_thread.start()
 
-        if self._speaker_enabled:
+        # The consumers' readers are made before capture starts, so they
+        # don't miss any audio.
+        vad_in_processor = self._vad_enabled and self._vad_processor
+        if self._speaker_enabled or vad_in_processor:
             self._receive_audio_thread = threading.Thread(
-                target=self._receive_audio, daemon=True
+                target=self._receive_audio,
+                args=(self.audio_input.reader(),),
+                daemon=True
             )
             self._receive_audio_thread.start()
 
-        if self._vad_enabled:
-            self._vad_thread = threading.Thread(target=self._vad, daemon=True)
+        vad_task = None
+        if vad_in_processor:
+            vad_task = asyncio.create_task(self._run_vad_processor())
+        elif self._vad_enabled:
+            self._vad_thread = threading.Thread(
+                target=self._vad,
+                args=(self.audio_input.reader(),),
+                daemon=True)
             self._vad_thread.start()
 
+        if self._speaker_enabled or self._vad_enabled:
+            self._capture_audio_thread = threading.Thread(
+                target=self._capture_audio, daemon=True)
+            self._capture_audio_thread.start()
+
         pipeline_task = None
         if pipeline:
             pipeline_task = asyncio.create_task(
@@ -173,15 +244,22 @@ class BaseTransportService:
         if pipeline_task:
             pipeline_task.cancel()
 
-        await self.send_queue.put(EndFrame())
+        # We're stopping, so don't wait for queued output to be sent.
+        self._discard_queued_output()
+        self.send_queue.put_priority_nowait(EndFrame())
 
-        await async_output_queue_marshal_task
         self._frame_consumer_thread.join()
 
-        if self._speaker_enabled:
+        if self._speaker_enabled or self._vad_enabled:
+            self._capture_audio_thread.join()
+
+        if self._speaker_enabled or vad_in_processor:
             self._receive_audio_thread.join()
 
-        if self._vad_enabled:
+        if vad_task:
+            # The audio thread ends the processor's input with an EndFrame.
+            await vad_task
+        elif self._vad_enabled:
             self._vad_thread.join()
 
     async def run_pipeline(self, pipeline: Pipeline, override_pipeline_source_queue=True):
@@ -201,6 +279,9 @@ class BaseTransportService:
         source_queue = asyncio.Queue()
         pipeline.set_source(source_queue)
         pipeline.set_sink(self.send_queue)
+        # The pipeline runs for the whole session. An interruption cancels the
+        # work for the current turn, but the pipeline and its processors
+        # (and their connections) carry on.
         pipeline_task = asyncio.create_task(pipeline.run_pipeline())
 
         async def yield_frame(frame: Frame) -> AsyncGenerator[Frame, None]:
@@ -218,21 +299,21 @@ class BaseTransportService:
                 if isinstance(frame, EndFrame):
                     break
 
+        tasks = [pipeline_task]
         if post_processor:
-            post_process_task = asyncio.create_task(
-                post_process(post_processor))
+            tasks.append(asyncio.create_task(post_process(post_processor)))
 
         started = False
 
         async for frame in self.get_receive_frames():
             if isinstance(frame, UserStartedSpeakingFrame):
-                pipeline_task.cancel()
+                await pipeline.interrupt()
                 self.interrupt()
-                pipeline_task = asyncio.create_task(pipeline.run_pipeline())
                 started = False
 
             if not started:
                 await self.send_queue.put(StartFrame())
+                started = True
 
             if pre_processor:
                 frame_generator = pre_processor.process_frame(frame)
@@ -245,12 +326,11 @@ class BaseTransportService:
             if isinstance(frame, EndFrame):
                 break
 
-        await asyncio.gather(pipeline_task, post_process_task)
+        await asyncio.gather(*tasks)
 
     async def say(self, text: str, tts: TTSService):
         """Say a phrase. Use with caution; this bypasses any running pipelines."""
-        async for frame in tts.process_frame(TextFrame(text)):
-            await self.send_queue.put(frame)
+        await tts.on_frame(TextFrame(text), self.send_queue.put)
 
     def _post_run(self):
         # Note that this function must be idempotent! It can be called multiple times
@@ -266,7 +346,6 @@ class BaseTransportService:
 
     async def _wait_for_send_queue_to_empty(self):
         await self.send_queue.join()
-        self._threadsafe_send_queue.join()
 
     @abstractmethod
     def write_frame_to_camera(self, frame: bytes):
@@ -284,74 +363,72 @@ class BaseTransportService:
     def _prerun(self):
         pass
 
-    def _vad(self):
-        # CB: Starting silero VAD stuff
-        # TODO-CB: Probably need to force virtual speaker creation if we're
-        # going to build this in?
-        # TODO-CB: pyaudio installation
-        while not self._stop_threads.is_set():
-            audio_chunk = self.read_audio_frames(self._vad_samples)
-            audio_int16 = np.frombuffer(audio_chunk, np.int16)
-            audio_float32 = int2float(audio_int16)
-            new_confidence = model(
-                torch.from_numpy(audio_float32), 16000).item()
-            speaking = new_confidence > 0.5
-
-            if speaking:
-                match self._vad_state:
-                    case VADState.QUIET:
-                        self._vad_state = VADState.STARTING
-                        self._vad_starting_count = 1
-                    case VADState.STARTING:
-                        self._vad_starting_count += 1
-                    case VADState.STOPPING:
-                        self._vad_state = VADState.SPEAKING
-                        self._vad_stopping_count = 0
-            else:
-                match self._vad_state:
-                    case VADState.STARTING:
-                        self._vad_state = VADState.QUIET
-                        self._vad_starting_count = 0
-                    case VADState.SPEAKING:
-                        self._vad_state = VADState.STOPPING
-                        self._vad_stopping_count = 1
-                    case VADState.STOPPING:
-                        self._vad_stopping_count += 1
-
-            if (
-                self._vad_state == VADState.STARTING
-                and self._vad_starting_count >= self._vad_start_frames
-            ):
-                if self._loop:
-                    asyncio.run_coroutine_threadsafe(
-                        self.receive_queue.put(
-                            UserStartedSpeakingFrame()), self._loop)
-                # self.interrupt()
-                self._vad_state = VADState.SPEAKING
-                self._vad_starting_count = 0
-            if (
-                self._vad_state == VADState.STOPPING
-                and self._vad_stopping_count >= self._vad_stop_frames
-            ):
-                if self._loop:
-                    asyncio.run_coroutine_threadsafe(
-                        self.receive_queue.put(
-                            UserStoppedSpeakingFrame()), self._loop)
-                self._vad_state = VADState.QUIET
-                self._vad_stopping_count = 0
+    def _vad(self, reader: AudioInputReader):
+        stream = None
+        if self._vad_engine:
+            stream = self._vad_engine.register(self._on_vad_probability)
+        else:
+            model = self._vad_model or default_vad_model()
+            model.load()
+            state = model.initial_state()[None]
+        try:
+            while True:
+                # The chunk is a view of the ring, which is fine as it's
+                # converted to float32 straight away.
+                audio_chunk = reader.read_frame(self._vad_samples, SAMPLE_RATE)
+                if audio_chunk is None:
+                    break
+                if stream:
+                    stream.submit(audio_chunk.as_float32())
+                    continue
+                probabilities, state = model(
+                    audio_chunk.as_float32()[None], state)
+                self._on_vad_probability(float(probabilities[0]))
+        finally:
+            if stream:
+                stream.close()
+
+    async def _run_vad_processor(self):
+        async def emit(frame: Frame):
+            if (isinstance(frame, UserStoppedSpeakingFrame)
+                    and self._turn_tracer):
+                self._turn_tracer.mark(TurnHop.VAD_STOP)
+            # Without the speaker, only the VAD's frames are received.
+            vad_frame_types = (UserStartedSpeakingFrame,
+                               UserStoppedSpeakingFrame)
+            if self._speaker_enabled or isinstance(frame, vad_frame_types):
+                await self.receive_queue.put(frame)
 
-    async def _marshal_frames(self):
-        while True:
-            frame: Frame | list = await self.send_queue.get()
-            self._threadsafe_send_queue.put(frame)
-            self.send_queue.task_done()
-            if isinstance(frame, EndFrame):
-                break
+        try:
+            while True:
+                frame = await self._vad_input_queue.get()
+                await self._vad_processor.on_frame(frame, emit)
+                if isinstance(frame, EndFrame):
+                    break
+        finally:
+            self._vad_processor.close()
+
+    def _on_vad_probability(self, probability: float):
+        """Called with the VAD model's result for each chunk; from the VAD
+        engine's thread if there is one."""
+        frame = self._vad_state_machine.update(probability > 0.5)
+        if isinstance(frame, UserStoppedSpeakingFrame) and self._turn_tracer:
+            self._turn_tracer.mark(TurnHop.VAD_STOP)
+        if frame and self._loop:
+            self._receive_bridge.put(frame)
 
     def interrupt(self):
         self._logger.debug("### Interrupting")
         self._is_interrupted.set()
 
+        # Start a new generation of output. The frame consumer never sees
+        # what was queued before this, however much there was.
+        self._discard_queued_output()
+
+    def _discard_queued_output(self):
+        """Drop everything but control frames from the output queues."""
+        self.send_queue.discard_bulk()
+
     async def get_receive_frames(self) -> AsyncGenerator[Frame, None]:
         while True:
             frame = await self.receive_queue.get()
@@ -359,24 +436,41 @@ class BaseTransportService:
             if isinstance(frame, EndFrame):
                 break
 
-    def _receive_audio(self):
+    def _capture_audio(self):
+        # 20ms at a time, so no consumer waits longer than that for audio.
+        desired_frame_count = self._speaker_sample_rate // 50
+        while not self._stop_threads.is_set():
+            buffer = self.read_audio_frames(desired_frame_count)
+            if len(buffer) > 0:
+                self.audio_input.write(buffer)
+
+        self.audio_input.close()
+
+    def _receive_audio(self, reader: AudioInputReader):
         if not self._loop:
             self._logger.error("No loop available for audio thread")
             return
 
         seconds = 1
         desired_frame_count = self._speaker_sample_rate * seconds
-        while not self._stop_threads.is_set():
-            buffer = self.read_audio_frames(desired_frame_count)
-            if len(buffer) > 0:
-                frame = AudioFrame(buffer)
-                asyncio.run_coroutine_threadsafe(
-                    self.receive_queue.put(frame), self._loop
-                )
-
-        asyncio.run_coroutine_threadsafe(
-            self.receive_queue.put(
-                EndFrame()), self._loop)
+        if self._vad_enabled and self._vad_processor:
+            # Read a VAD chunk at a time, so VAD isn't held up.
+            desired_frame_count = self._vad_samples
+        while True:
+            data = reader.read(desired_frame_count)
+            if data is None:
+                break
+            # The frames live on in the pipeline, so they get their own
+            # copy of the audio.
+            self._audio_bridge.put(
+                AudioFrame(bytes(data), self._speaker_sample_rate))
+
+        # Capture has stopped; send what's left, short of a whole read.
+        rest = reader.available // self.audio_input.frame_size
+        if rest:
+            self._audio_bridge.put(AudioFrame(
+                bytes(reader.read(rest)), self._speaker_sample_rate))
+        self._audio_bridge.put(EndFrame())
 
     def _set_image(self, image: bytes):
         self._images = itertools.cycle([image])
@@ -388,9 +482,35 @@ class BaseTransportService:
         """ Child classes should override this to send a custom message to the room. """
         pass
 
+    def _present(self, frame: Frame):
+        if isinstance(frame, ImageFrame):
+            self._set_image(frame.image)
+        elif isinstance(frame, SpriteFrame):
+            self._set_images(frame.images)
+
+    def _schedule_presentation(self, frame: ImageFrame | SpriteFrame):
+        """Show an image or sprite once the audio clock reaches its pts, or
+        if it has none, once the audio sent before it has played."""
+        if frame.pts is None:
+            position = self.audio_clock.written_samples
+        else:
+            position = round(frame.pts * self.audio_clock.sample_rate)
+        if not len(self._presentation) and (
+                position <= self.audio_clock.played_samples):
+            self._present(frame)
+        else:
+            self._presentation.schedule(position, frame)
+
+    def _write_to_mic(self, audio: bytes):
+        # Mic audio is 16-bit mono.
+        self.audio_clock.write(len(audio) // 2)
+        self.write_frame_to_mic(audio)
+
     def _run_camera(self):
         try:
             while not self._stop_threads.is_set():
+                for frame in self._presentation.due():
+                    self._present(frame)
                 if self._images:
                     this_frame = next(self._images)
                     self.write_frame_to_camera(this_frame)
@@ -402,94 +522,54 @@ class BaseTransportService:
 
     def _frame_consumer(self):
         self._logger.info("🎬 Starting frame consumer thread")
-        b = bytearray()
         smallest_write_size = 3200
         largest_write_size = 8000
+        generation = self.send_queue.generation
         while True:
             try:
-                frames_or_frame: Frame | list[Frame] = self._threadsafe_send_queue.get(
-                )
-                if (
-                    isinstance(frames_or_frame, AudioFrame)
-                    and len(frames_or_frame.data) > largest_write_size
-                ):
-                    # subdivide large audio frames to enable interruption
-                    frames = []
-                    for i in range(0, len(frames_or_frame.data),
-                                   largest_write_size):
-                        frames.append(AudioFrame(
-                            frames_or_frame.data[i: i + largest_write_size]))
-                elif isinstance(frames_or_frame, Frame):
-                    frames: list[Frame] = [frames_or_frame]
-                elif isinstance(frames_or_frame, list):
-                    frames: list[Frame] = frames_or_frame
-                else:
-                    raise Exception("Unknown type in output queue")
-
-                for frame in frames:
-                    if isinstance(frame, EndFrame):
-                        self._logger.info("Stopping frame consumer thread")
-                        self._stop_threads.set()
-                        self._threadsafe_send_queue.task_done()
-                        if self._loop:
-                            asyncio.run_coroutine_threadsafe(
-                                self.completed_queue.put(frame), self._loop
-                            )
-                        return
-
-                    # if interrupted, we just pull frames off the queue and
-                    # discard them
-                    if not self._is_interrupted.is_set():
-                        if frame:
-                            if isinstance(frame, AudioFrame):
-                                chunk = frame.data
-
-                                b.extend(chunk)
-                                truncated_length: int = len(b) - (
-                                    len(b) % smallest_write_size
-                                )
-                                if truncated_length:
-                                    self.write_frame_to_mic(
-                                        bytes(b[:truncated_length]))
-                                    b = b[truncated_length:]
-                            elif isinstance(frame, ImageFrame):
-                                self._set_image(frame.image)
-                            elif isinstance(frame, SpriteFrame):
-                                self._set_images(frame.images)
-                            elif isinstance(frame, SendAppMessageFrame):
-                                self.send_app_message(
-                                    frame.message, frame.participantId)
-                        elif len(b):
-                            self.write_frame_to_mic(bytes(b))
-                            b = bytearray()
-                    else:
-                        # if there are leftover audio bytes, write them now; failing to do so
-                        # can cause static in the audio stream.
-                        if len(b):
-                            truncated_length = len(b) - (len(b) % 160)
-                            self.write_frame_to_mic(
-                                bytes(b[:truncated_length]))
-                            b = bytearray()
-
-                        if isinstance(frame, StartFrame):
-                            self._is_interrupted.clear()
-                            asyncio.run_coroutine_threadsafe(
-                                self.receive_queue.put(PipelineStartedFrame()),
-                                self._loop,
-                            )
+                # Audio comes in chunks of up to largest_write_size bytes, so
+                # an interruption cuts it off quickly.
+                output = self.send_queue.get_output(
+                    smallest_write_size, largest_write_size, flush_after_s=0.05)
+
+                if self.send_queue.generation != generation:
+                    # The output was interrupted. The audio the pending images
+                    # and sprites were waiting for has been cut short, so
+                    # show them now.
+                    generation = self.send_queue.generation
+                    for pending in self._presentation.flush():
+                        self._present(pending)
+
+                if isinstance(output, bytes):
+                    if self._turn_tracer:
+                        self._turn_tracer.mark(TurnHop.MIC_WRITE)
+                    self._write_to_mic(output)
+                    if self._loop:
+                        self._completed_bridge.put(
+                            AudioFrame(output, self._mic_sample_rate))
+                    self.send_queue.done()
+                    continue
 
+                frame = output
+                if isinstance(frame, EndFrame):
+                    self._logger.info("Stopping frame consumer thread")
+                    self._stop_threads.set()
+                    self.send_queue.done()
                     if self._loop:
-                        asyncio.run_coroutine_threadsafe(
-                            self.completed_queue.put(frame), self._loop
-                        )
+                        self._completed_bridge.put(frame)
+                    return
 
-                self._threadsafe_send_queue.task_done()
-            except queue.Empty:
-                if len(b):
-                    self.write_frame_to_mic(bytes(b))
+                if isinstance(frame, (ImageFrame, SpriteFrame)):
+                    self._schedule_presentation(frame)
+                elif isinstance(frame, SendAppMessageFrame):
+                    self.send_app_message(frame.message, frame.participantId)
+                elif isinstance(frame, StartFrame) and self._is_interrupted.is_set():
+                    self._is_interrupted.clear()
+                    self._receive_bridge.put(PipelineStartedFrame())
 
-                b = bytearray()
+                if self._loop:
+                    self._completed_bridge.put(frame)
+                self.send_queue.done()
             except Exception as e:
-                self._logger.error(
-                    f"Exception in frame_consumer: {e}, {len(b)}")
+                self._logger.error(f"Exception in frame_consumer: {e}")
                 raise e
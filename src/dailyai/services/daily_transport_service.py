@@ -12,6 +12,7 @@ from dailyai.pipeline.frames import (
     ReceivedAppMessageFrame,
     TranscriptionQueueFrame,
 )
+from dailyai.pipeline.tracing import TurnHop
 
 from threading import Event
 
@@ -257,9 +258,7 @@ class DailyTransportService(BaseTransportService, EventHandler):
         if self._loop:
             frame = ReceivedAppMessageFrame(message, sender)
             print(frame)
-            asyncio.run_coroutine_threadsafe(
-                self.receive_queue.put(frame), self._loop
-            )
+            self._receive_bridge.put(frame)
 
     def on_transcription_message(self, message: dict):
         if self._loop:
@@ -269,10 +268,11 @@ class DailyTransportService(BaseTransportService, EventHandler):
             elif "session_id" in message:
                 participantId = message["session_id"]
             if self._my_participant_id and participantId != self._my_participant_id:
+                if self._turn_tracer:
+                    self._turn_tracer.mark(TurnHop.TRANSCRIPTION)
                 frame = TranscriptionQueueFrame(
                     message["text"], participantId, message["timestamp"])
-                asyncio.run_coroutine_threadsafe(
-                    self.receive_queue.put(frame), self._loop)
+                self._receive_bridge.put(frame)
 
     def on_transcription_error(self, message):
         self._logger.error(f"Transcription error: {message}")
@@ -5,6 +5,7 @@ import io
 import os
 from PIL import Image
 
+from dailyai.pipeline.cancellation import to_thread_cancellable
 from dailyai.services.ai_services import ImageGenService
 
 
@@ -30,13 +31,16 @@ class FalImageGenService(ImageGenService):
             os.environ["FAL_KEY_SECRET"] = key_secret
 
     async def run_image_gen(self, sentence) -> tuple[str, bytes]:
-        def get_image_url(sentence, size):
+        def get_image_url(sentence, size, cancelled):
             handler = fal.apps.submit(
                 "110602490-fast-sdxl",
                 # "fal-ai/fast-sdxl",
                 arguments={"prompt": sentence},
             )
             for event in handler.iter_events():
+                if cancelled.is_set():
+                    # Nobody's waiting for this image any more.
+                    return None
                 if isinstance(event, fal.apps.InProgress):
                     pass
 
@@ -48,7 +52,8 @@ class FalImageGenService(ImageGenService):
 
             return image_url
 
-        image_url = await asyncio.to_thread(get_image_url, sentence, self.image_size)
+        image_url = await to_thread_cancellable(
+            get_image_url, sentence, self.image_size)
         # Load the image from the url
         async with self._aiohttp_session.get(image_url) as response:
             image_stream = io.BytesIO(await response.content.read())
@@ -1,9 +1,11 @@
-import array
 import io
 import math
 import time
-from typing import AsyncGenerator
 import wave
+
+import numpy as np
+
+from dailyai.pipeline.frame_processor import FrameEmitter
 from dailyai.pipeline.frames import AudioFrame, Frame, TranscriptionQueueFrame
 from dailyai.services.ai_services import STTService
 
@@ -39,18 +41,17 @@ class LocalSTTService(STTService):
         ww.setframerate(self._frame_rate)
         self._wave = ww
 
-    async def process_frame(self, frame: Frame) -> AsyncGenerator[Frame, None]:
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
         """Processes a frame of audio data, either buffering or transcribing it."""
         if not isinstance(frame, AudioFrame):
             return
 
-        data = frame.data
         # Try to filter out empty background noise
         # (Very rudimentary approach, can be improved)
-        rms = self._get_volume(data)
+        rms = self._get_volume(frame)
         if rms >= self._min_rms:
             # If volume is high enough, write new data to wave file
-            self._wave.writeframesraw(data)
+            self._wave.writeframesraw(frame.data)
 
         # If buffer is not empty and we detect a 3-frame pause in speech,
         # transcribe the audio gathered so far.
@@ -60,14 +61,12 @@ class LocalSTTService(STTService):
             self._content.seek(0)
             text = await self.run_stt(self._content)
             self._new_wave()
-            yield TranscriptionQueueFrame(text, '', str(time.time()))
+            await emit(TranscriptionQueueFrame(text, '', str(time.time())))
         # If we get this far, this is a frame of silence
         self._current_silence_frames += 1
 
-    def _get_volume(self, audio: bytes) -> float:
-        # https://docs.python.org/3/library/array.html
-        audio_array = array.array('h', audio)
-        squares = [sample**2 for sample in audio_array]
-        mean = sum(squares) / len(audio_array)
-        rms = math.sqrt(mean)
-        return rms
+    def _get_volume(self, audio: AudioFrame) -> float:
+        samples = audio.as_int16()
+        if not len(samples):
+            return 0.0
+        return math.sqrt(np.mean(np.square(samples, dtype=np.float64)))
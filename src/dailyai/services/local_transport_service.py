@@ -74,7 +74,7 @@ class LocalTransportService(BaseTransportService):
             self._image_label = tk.Label(self._tk_root, image=photo)
             self._image_label.pack()
 
-        if self._speaker_enabled:
+        if self._speaker_enabled or self._vad_enabled:
             self._speaker_stream = self._pyaudio.open(
                 format=self._pyaudio.get_format_from_width(self._sample_width),
                 channels=self._n_channels,
@@ -32,6 +32,8 @@ class BaseOpenAILLMService(LLMService):
     calls from the LLM.
     """
 
+    consumed_frame_types = (OpenAILLMContextFrame, LLMMessagesQueueFrame)
+
     def __init__(self, model: str, api_key=None, base_url=None):
         super().__init__()
         self._model: str = model
@@ -88,33 +90,41 @@ class BaseOpenAILLMService(LLMService):
         chunk_stream: AsyncStream[ChatCompletionChunk] = (
             await self._stream_chat_completions(context)
         )
-        async for chunk in chunk_stream:
-            if len(chunk.choices) == 0:
-                continue
-
-            if chunk.choices[0].delta.tool_calls:
-                # We're streaming the LLM response to enable the fastest response times.
-                # For text, we just yield each chunk as we receive it and count on consumers
-                # to do whatever coalescing they need (eg. to pass full sentences to TTS)
-                #
-                # If the LLM is a function call, we'll do some coalescing here.
-                # If the response contains a function name, we'll yield a frame to tell consumers
-                # that they can start preparing to call the function with that name.
-                # We accumulate all the arguments for the rest of the streamed response, then when
-                # the response is done, we package up all the arguments and the function name and
-                # yield a frame containing the function name and the arguments.
-
-                tool_call = chunk.choices[0].delta.tool_calls[0]
-                if tool_call.function and tool_call.function.name:
-                    function_name += tool_call.function.name
-                    yield LLMFunctionStartFrame(function_name=tool_call.function.name)
-                if tool_call.function and tool_call.function.arguments:
-                    # Keep iterating through the response to collect all the argument fragments and
-                    # yield a complete LLMFunctionCallFrame after run_llm_async
-                    # completes
-                    arguments += tool_call.function.arguments
-            elif chunk.choices[0].delta.content:
-                yield TextFrame(chunk.choices[0].delta.content)
+        # Close the stream however we leave this loop, so that if the turn is
+        # interrupted the connection is dropped and we stop paying for tokens
+        # nobody will hear.
+        try:
+            async for chunk in chunk_stream:
+                if len(chunk.choices) == 0:
+                    continue
+
+                if chunk.choices[0].delta.tool_calls:
+                    # autopep8: off
+                    # We're streaming the LLM response to enable the fastest response times.
+                    # For text, we just yield each chunk as we receive it and count on consumers
+                    # to do whatever coalescing they need (eg. to pass full sentences to TTS)
+                    #
+                    # If the LLM is a function call, we'll do some coalescing here.
+                    # If the response contains a function name, we'll yield a frame to tell consumers
+                    # that they can start preparing to call the function with that name.
+                    # We accumulate all the arguments for the rest of the streamed response, then when
+                    # the response is done, we package up all the arguments and the function name and
+                    # yield a frame containing the function name and the arguments.
+                    # autopep8: on
+
+                    tool_call = chunk.choices[0].delta.tool_calls[0]
+                    if tool_call.function and tool_call.function.name:
+                        function_name += tool_call.function.name
+                        yield LLMFunctionStartFrame(function_name=tool_call.function.name)
+                    if tool_call.function and tool_call.function.arguments:
+                        # Keep iterating through the response to collect all the argument fragments and
+                        # yield a complete LLMFunctionCallFrame after run_llm_async
+                        # completes
+                        arguments += tool_call.function.arguments
+                elif chunk.choices[0].delta.content:
+                    yield TextFrame(chunk.choices[0].delta.content)
+        finally:
+            await chunk_stream.close()
 
         # if we got a function name and arguments, yield the frame with all the info so
         # frame consumers can take action based on the function call.
@@ -0,0 +1,283 @@
+import asyncio
+import collections
+import threading
+from typing import Deque, List, Tuple, Type
+
+from dailyai.pipeline.frames import AudioFrame, ControlFrame, Frame, StartFrame
+
+
+class PCMRingBuffer:
+    """A fixed-size ring of audio bytes, allocated up front. Not thread-safe
+    on its own; OutputQueue guards it.
+
+    Positions count every byte ever written or read, so they keep growing
+    past the end of the buffer; `position % capacity` is where a byte lives.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buffer = bytearray(capacity)
+        self.write_position = 0
+        self.read_position = 0
+
+    @property
+    def available(self) -> int:
+        """Bytes written and not read yet."""
+        return self.write_position - self.read_position
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.available
+
+    def write(self, data: bytes | memoryview) -> int:
+        """Copy as much of `data` as fits, and return how many bytes that
+        was."""
+        count = min(len(data), self.free)
+        start = self.write_position % self.capacity
+        first = min(count, self.capacity - start)
+        self._buffer[start:start + first] = data[:first]
+        if count > first:
+            self._buffer[:count - first] = data[first:count]
+        self.write_position += count
+        return count
+
+    def read(self, count: int) -> bytes:
+        count = min(count, self.available)
+        start = self.read_position % self.capacity
+        first = min(count, self.capacity - start)
+        data = bytes(self._buffer[start:start + first])
+        if count > first:
+            data += self._buffer[:count - first]
+        self.read_position += count
+        return data
+
+    def clear(self):
+        """Drop everything that hasn't been read."""
+        self.read_position = self.write_position
+
+
+class OutputQueue:
+    """Where a transport's output goes: the sink of the pipeline that feeds
+    the transport, and the source of the thread that writes to the devices.
+
+    The audio of each AudioFrame put here is copied straight into a
+    PCMRingBuffer, and the output thread reads it from there in chunks of
+    the size it writes to the mic. Any other frame goes on a side channel,
+    tagged with the position in the audio it was put at, and the output
+    thread gets it once the audio before it has been read, so frames keep
+    their place relative to the audio. Frames of `priority_frame_types`
+    don't wait for any audio.
+
+    The ring holds `capacity` bytes. put() waits for room when an AudioFrame
+    doesn't fit, which holds up the pipeline until the audio has been
+    played; put_nowait() raises asyncio.QueueFull instead.
+
+    Everything put here belongs to the current generation. discard_bulk()
+    starts a new one, eg. when the user interrupts the bot, and the output
+    thread never gets the audio or frames of older generations, except for
+    ControlFrames.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        priority_frame_types: Tuple[Type[Frame], ...] = (StartFrame,),
+    ):
+        self._ring = PCMRingBuffer(capacity)
+        self._priority_frame_types = priority_frame_types
+        self.generation = 0
+        # (ring write position, generation, frame)
+        self._side: Deque[Tuple[int, int, Frame]] = collections.deque()
+        self._priority: Deque[Frame] = collections.deque()
+        # Whether the output thread is still handling what it got last.
+        self._busy = False
+        self._changed = threading.Condition()
+
+        # The event loop side, woken by the output thread through
+        # call_soon_threadsafe when the ring has room or everything's been
+        # handled.
+        self._room_waiters: List[Tuple[asyncio.AbstractEventLoop,
+                                       asyncio.Event, int]] = []
+        self._join_waiters: List[Tuple[asyncio.AbstractEventLoop,
+                                       asyncio.Event]] = []
+
+    @property
+    def capacity(self) -> int:
+        return self._ring.capacity
+
+    def qsize(self) -> int:
+        """How many frames are waiting on the side channel. Audio waiting in
+        the ring is counted as one frame."""
+        with self._changed:
+            return (len(self._side) + len(self._priority)
+                    + (1 if self._ring.available else 0))
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def audio_bytes(self) -> int:
+        """How many bytes of audio are waiting in the ring."""
+        with self._changed:
+            return self._ring.available
+
+    async def put(self, item: Frame | List[Frame]) -> None:
+        if isinstance(item, list):
+            for frame in item:
+                await self.put(frame)
+        elif isinstance(item, AudioFrame):
+            # Write the frame in one go if it'll fit, so the audio of frames
+            # put at the same time from different tasks doesn't interleave.
+            generation = self.generation
+            data = item.data
+            if not isinstance(data, memoryview):
+                data = memoryview(data)
+            while len(data):
+                needed = min(len(data), self.capacity)
+                await self._wait_for_room(needed)
+                with self._changed:
+                    if self.generation != generation:
+                        # The rest of the frame has been discarded.
+                        return
+                    written = self._ring.write(data[:needed])
+                    self._changed.notify()
+                data = data[written:]
+        else:
+            self.put_nowait(item)
+
+    def put_nowait(self, item: Frame | List[Frame]) -> None:
+        if isinstance(item, list):
+            for frame in item:
+                self.put_nowait(frame)
+        elif isinstance(item, AudioFrame):
+            with self._changed:
+                if len(item.data) > self._ring.free:
+                    raise asyncio.QueueFull
+                self._ring.write(item.data)
+                self._changed.notify()
+        elif isinstance(item, self._priority_frame_types):
+            self.put_priority_nowait(item)
+        else:
+            with self._changed:
+                self._side.append(
+                    (self._ring.write_position, self.generation, item))
+                self._changed.notify()
+
+    def put_priority_nowait(self, item: Frame) -> None:
+        """Send a frame ahead of all the queued output, whatever its type."""
+        with self._changed:
+            self._priority.append(item)
+            self._changed.notify()
+
+    async def _wait_for_room(self, needed: int):
+        while True:
+            event = asyncio.Event()
+            with self._changed:
+                if self._ring.free >= needed:
+                    return
+                self._room_waiters.append(
+                    (asyncio.get_running_loop(), event, needed))
+            await event.wait()
+
+    def discard_bulk(self) -> None:
+        """Drop the queued audio and frames, except ControlFrames, by
+        starting a new generation. This takes the same time however much is
+        queued: the ring's read position jumps to its write position, and
+        the output thread skips the frames of older generations on the side
+        channel as it comes to them."""
+        with self._changed:
+            self.generation += 1
+            self._ring.clear()
+            self._changed.notify()
+            self._wake_waiters()
+
+    async def join(self) -> None:
+        """Wait until the output thread has handled everything put here."""
+        loop = asyncio.get_running_loop()
+        while True:
+            event = asyncio.Event()
+            with self._changed:
+                if self._is_drained():
+                    return
+                self._join_waiters.append((loop, event))
+            await event.wait()
+
+    def _is_drained(self) -> bool:
+        return not (self._busy or self._side or self._priority
+                    or self._ring.available)
+
+    def get_output(
+        self,
+        write_size: int,
+        max_write_size: int,
+        flush_after_s: float | None = None,
+    ) -> Frame | bytes:
+        """Called by the output thread: wait for the next thing to send,
+        either a frame or a chunk of audio. Chunks are multiples of
+        `write_size` bytes, at most `max_write_size`, except when there's a
+        frame waiting after less audio than that, or no more audio has come
+        for `flush_after_s` seconds; then the audio up to there is sent as
+        it is.
+
+        Call done() once the frame or audio has been handled."""
+        with self._changed:
+            self._busy = False
+            self._wake_waiters()
+            timed_out = False
+            while True:
+                if self._priority:
+                    self._busy = True
+                    return self._priority.popleft()
+
+                available = self._ring.available
+                if self._side:
+                    position, generation, frame = self._side[0]
+                    if generation != self.generation and not isinstance(
+                            frame, ControlFrame):
+                        self._side.popleft()
+                        continue
+                    before_frame = position - self._ring.read_position
+                    if before_frame <= 0:
+                        self._side.popleft()
+                        self._busy = True
+                        return frame
+                    if available >= before_frame:
+                        # Send the audio before the frame, however much it
+                        # is.
+                        return self._read(min(before_frame, max_write_size))
+
+                count = min(available, max_write_size)
+                if not timed_out:
+                    count -= count % write_size
+                if count:
+                    return self._read(count)
+
+                # If this times out, no more audio is coming for now, so send
+                # what's there.
+                timed_out = not self._changed.wait(flush_after_s)
+
+    def _read(self, count: int) -> bytes:
+        self._busy = True
+        data = self._ring.read(count)
+        self._wake_waiters()
+        return data
+
+    def done(self) -> None:
+        """Called by the output thread when it's handled what get_output()
+        returned."""
+        with self._changed:
+            self._busy = False
+            self._wake_waiters()
+
+    def _wake_waiters(self):
+        if self._room_waiters:
+            waiting = []
+            for loop, event, needed in self._room_waiters:
+                if self._ring.free >= needed:
+                    loop.call_soon_threadsafe(event.set)
+                else:
+                    waiting.append((loop, event, needed))
+            self._room_waiters = waiting
+        if self._join_waiters and self._is_drained():
+            for loop, event in self._join_waiters:
+                loop.call_soon_threadsafe(event.set)
+            self._join_waiters = []
@@ -0,0 +1,98 @@
+"""Line up changes to a transport's video output with the audio it has sent.
+
+Output devices buffer the audio written to them, so a transport is usually
+well ahead of what the user hears. An AudioClock estimates how much of the
+written audio has actually played, and a PresentationScheduler holds image
+and sprite frames until the clock reaches them.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, List, Tuple
+
+from dailyai.pipeline.frames import Frame
+
+
+class AudioClock:
+    """Counts the samples written to an audio output and estimates how many
+    of them have been played, assuming the device plays at `sample_rate` from
+    the moment audio is written, and plays silence whenever it runs out.
+
+    Call write() just before each write to the device, so the estimate is
+    right whether or not the write blocks until the audio is played. It's
+    safe to call from one thread while another reads the clock.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        time_fn: Callable[[], float] = time.monotonic,
+    ):
+        self.sample_rate = sample_rate
+        self._time_fn = time_fn
+        self._lock = threading.Lock()
+        self._written = 0
+        # When the audio written so far will have finished playing.
+        self._end_time = 0.0
+
+    def write(self, samples: int) -> None:
+        with self._lock:
+            now = self._time_fn()
+            self._end_time = max(self._end_time, now) + \
+                samples / self.sample_rate
+            self._written += samples
+
+    @property
+    def written_samples(self) -> int:
+        return self._written
+
+    @property
+    def played_samples(self) -> int:
+        with self._lock:
+            unplayed_s = max(self._end_time - self._time_fn(), 0.0)
+            return max(self._written - round(unplayed_s * self.sample_rate), 0)
+
+    @property
+    def played_s(self) -> float:
+        return self.played_samples / self.sample_rate
+
+
+class PresentationScheduler:
+    """Frames waiting to be presented, each at a position on an AudioClock, in
+    samples. Frames due at the same position come out in the order they were
+    scheduled."""
+
+    def __init__(self, clock: AudioClock):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._frames: List[Tuple[int, int, Frame]] = []
+        self._order = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def schedule(self, position: int, frame: Frame) -> None:
+        with self._lock:
+            heapq.heappush(
+                self._frames, (position, next(self._order), frame))
+
+    def due(self) -> List[Frame]:
+        """Remove and return the frames the clock has reached."""
+        if not self._frames:
+            return []
+        played = self.clock.played_samples
+        frames = []
+        with self._lock:
+            while self._frames and self._frames[0][0] <= played:
+                frames.append(heapq.heappop(self._frames)[2])
+        return frames
+
+    def flush(self) -> List[Frame]:
+        """Remove and return every waiting frame, due or not."""
+        with self._lock:
+            frames = [
+                heapq.heappop(self._frames)[2]
+                for _ in range(len(self._frames))]
+        return frames
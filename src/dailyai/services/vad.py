@@ -0,0 +1,646 @@
+"""Voice activity detection.
+
+A VAD model gives the probability that a chunk of audio is speech. A
+VADStateMachine turns those into UserStartedSpeakingFrame and
+UserStoppedSpeakingFrame, once speech (or silence) has lasted long enough.
+
+The model is a VADModel: the Silero model run with torch (the default) or
+with ONNX Runtime, or a plain loudness threshold. A GatedVADModel in front
+of a model only runs it on chunks that might be speech; the default is
+Silero behind one. Models load lazily, so nothing here imports torch or
+onnxruntime until a model is first run:
+
+    transport = DailyTransportService(
+        ..., vad_enabled=True,
+        vad_model=SileroOnnxVADModel("/models/silero_vad.onnx"))
+
+Each transport with `vad_enabled` runs the model in its own thread, one
+chunk at a time. With many bots in one process, share a BatchedVADEngine
+between their transports instead: it runs the model on the waiting chunks of
+every stream at once, in one thread.
+
+    engine = BatchedVADEngine.shared()
+    transport = DailyTransportService(..., vad_enabled=True, vad_engine=engine)
+
+VAD can also run in a pipeline, on AudioFrames from anywhere (a recording,
+one participant's audio, the output of a noise filter), with a VADProcessor.
+A transport given one as `vad_processor` runs it on the audio it receives,
+instead of running a VAD thread.
+"""
+
+import asyncio
+import collections
+import functools
+import logging
+import threading
+import time
+from abc import abstractmethod
+from enum import Enum
+from typing import Callable, Deque, Dict, List, Tuple
+
+import numpy as np
+
+from dailyai.pipeline.frame_processor import FrameEmitter, PushFrameProcessor
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    Frame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+
+logger = logging.getLogger("dailyai")
+
+
+class VADState(Enum):
+    QUIET = 1
+    STARTING = 2
+    SPEAKING = 3
+    STOPPING = 4
+
+
+class VADStateMachine:
+    """Decides when the user starts and stops speaking, from whether each
+    chunk of audio is speech. The user has started speaking after
+    `start_frames` chunks of speech in a row, and stopped after `stop_frames`
+    chunks without any."""
+
+    def __init__(self, start_frames: int, stop_frames: int):
+        self.start_frames = start_frames
+        self.stop_frames = stop_frames
+        self.state = VADState.QUIET
+        self._starting_count = 0
+        self._stopping_count = 0
+
+    def update(self, speaking: bool) -> Frame | None:
+        """Take the decision for the next chunk. Returns a
+        UserStartedSpeakingFrame or UserStoppedSpeakingFrame if the user has
+        just started or stopped speaking."""
+        if speaking:
+            match self.state:
+                case VADState.QUIET:
+                    self.state = VADState.STARTING
+                    self._starting_count = 1
+                case VADState.STARTING:
+                    self._starting_count += 1
+                case VADState.STOPPING:
+                    self.state = VADState.SPEAKING
+                    self._stopping_count = 0
+        else:
+            match self.state:
+                case VADState.STARTING:
+                    self.state = VADState.QUIET
+                    self._starting_count = 0
+                case VADState.SPEAKING:
+                    self.state = VADState.STOPPING
+                    self._stopping_count = 1
+                case VADState.STOPPING:
+                    self._stopping_count += 1
+
+        if (
+            self.state == VADState.STARTING
+            and self._starting_count >= self.start_frames
+        ):
+            self.state = VADState.SPEAKING
+            self._starting_count = 0
+            return UserStartedSpeakingFrame()
+        if (
+            self.state == VADState.STOPPING
+            and self._stopping_count >= self.stop_frames
+        ):
+            self.state = VADState.QUIET
+            self._stopping_count = 0
+            return UserStoppedSpeakingFrame()
+        return None
+
+
+class VADModel:
+    """A voice activity detection model, run on a batch of chunks from
+    different streams.
+
+    Models are recurrent, or at least may be. Each stream's state is kept
+    outside the model, as an array from initial_state(), and passed in with
+    every batch, so streams don't share state and can come and go between
+    batches.
+
+    Creating a model is cheap: whatever it needs (a library, a model file) is
+    loaded by load(), or on first use.
+    """
+
+    sample_rate = 16000
+
+    def load(self) -> None:
+        pass
+
+    def initial_state(self) -> np.ndarray:
+        return np.zeros(0, dtype=np.float32)
+
+    @abstractmethod
+    def __call__(
+        self, chunks: np.ndarray, states: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Run the model on `chunks`, an (n, samples) float32 array, with the
+        streams' `states`, stacked to (n, *initial_state().shape). Returns
+        each chunk's speech probability, and the streams' new states."""
+        pass
+
+
+# SileroVADModel swaps each stream's state in and out of the model's LSTM
+# through these attributes, which only v4 of the model has; v5 keeps its
+# state differently, and takes 512-sample chunks.
+SILERO_HUB_REPO = "snakers4/silero-vad:v4.0"
+_SILERO_STATE_ATTRIBUTES = ("_h", "_c", "_last_batch_size", "_last_sr")
+
+
+def _check_silero_model(model):
+    missing = [name for name in _SILERO_STATE_ATTRIBUTES
+               if not hasattr(model, name)]
+    if missing:
+        raise ValueError(
+            f"The Silero VAD model has no {', '.join(missing)}; "
+            f"SileroVADModel needs v4 of the model ({SILERO_HUB_REPO})")
+
+
+@functools.cache
+def _load_silero_torch():
+    import torch
+    torch.set_num_threads(1)
+    model, _ = torch.hub.load(
+        repo_or_dir=SILERO_HUB_REPO,
+        model="silero_vad",
+        force_reload=False)
+    _check_silero_model(model)
+    return model
+
+
+class SileroVADModel(VADModel):
+    """The Silero VAD model, run with torch. The model is loaded from the
+    torch hub cache (or downloaded) once per process, and shared by every
+    SileroVADModel that isn't given one. A model that's given has to be v4,
+    like the one loaded."""
+
+    def __init__(self, model=None):
+        if model is not None:
+            _check_silero_model(model)
+        self._model = model
+        # The model keeps its state in itself, so calls take turns.
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        if self._model is None:
+            self._model = _load_silero_torch()
+
+    def initial_state(self) -> np.ndarray:
+        # The LSTM's h and c, each 2 layers of 64.
+        return np.zeros((2, 2, 64), dtype=np.float32)
+
+    def __call__(
+        self, chunks: np.ndarray, states: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        import torch
+        self.load()
+        model = self._model
+        batch_size = len(chunks)
+        with self._lock, torch.no_grad():
+            # The model resets its state if the batch size or sample rate
+            # changes; they're ours to manage.
+            model._h = torch.from_numpy(
+                np.ascontiguousarray(states[:, 0].transpose(1, 0, 2)))
+            model._c = torch.from_numpy(
+                np.ascontiguousarray(states[:, 1].transpose(1, 0, 2)))
+            model._last_batch_size = batch_size
+            model._last_sr = self.sample_rate
+            probabilities = model(torch.from_numpy(chunks), self.sample_rate)
+            h = model._h.numpy().transpose(1, 0, 2)
+            c = model._c.numpy().transpose(1, 0, 2)
+        return (
+            probabilities.numpy().reshape(batch_size),
+            np.stack([h, c], axis=1),
+        )
+
+
+class SileroOnnxVADModel(VADModel):
+    """The Silero VAD model, run with ONNX Runtime from a local copy of
+    `silero_vad.onnx` (v4, with `h` and `c` inputs), so it needs neither
+    torch nor the network. Runs are thread-safe, as the state is passed in
+    each time."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._session = None
+
+    def load(self) -> None:
+        if self._session is None:
+            import onnxruntime
+            options = onnxruntime.SessionOptions()
+            options.inter_op_num_threads = 1
+            options.intra_op_num_threads = 1
+            self._session = onnxruntime.InferenceSession(
+                self.path,
+                sess_options=options,
+                providers=["CPUExecutionProvider"])
+
+    def initial_state(self) -> np.ndarray:
+        return np.zeros((2, 2, 64), dtype=np.float32)
+
+    def __call__(
+        self, chunks: np.ndarray, states: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        self.load()
+        probabilities, h, c = self._session.run(None, {
+            "input": chunks,
+            "h": np.ascontiguousarray(states[:, 0].transpose(1, 0, 2)),
+            "c": np.ascontiguousarray(states[:, 1].transpose(1, 0, 2)),
+            "sr": np.array(self.sample_rate, dtype=np.int64),
+        })
+        return (
+            probabilities.reshape(len(chunks)),
+            np.stack([h.transpose(1, 0, 2), c.transpose(1, 0, 2)], axis=1),
+        )
+
+
+class EnergyVADModel(VADModel):
+    """Not really a model: a chunk is speech if it's louder than
+    `threshold_db` (dBFS). It costs next to nothing and needs no
+    dependencies, but any loud enough noise counts as speech."""
+
+    def __init__(self, threshold_db: float = -40.0):
+        self.threshold_db = threshold_db
+
+    def __call__(
+        self, chunks: np.ndarray, states: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        rms = np.sqrt(np.mean(np.square(chunks), axis=1))
+        level_db = 20 * np.log10(np.maximum(rms, 1e-10))
+        # 0.5 at the threshold, rising to 1 within a few dB above it.
+        probabilities = 1 / (
+            1 + np.exp(np.clip(self.threshold_db - level_db, -50, 50)))
+        return probabilities.astype(np.float32), states
+
+
+class GatedVADModel(VADModel):
+    """Runs `model` only on chunks that might be speech, and says the rest
+    aren't.
+
+    The gate is a cheap test of each chunk: it opens on a chunk that's at
+    least `open_margin_db` louder than the noise floor, unless its
+    zero-crossing rate is above `max_zcr`, as it is for hiss and other
+    broadband noise. Once open, it stays open for `hangover_chunks` more
+    chunks, so the model hears the pauses and quiet endings of speech and
+    decides when it's stopped. While the gate's closed, which is most of the
+    time in a call, the model isn't run at all.
+
+    Each stream's noise floor starts at the level of its first chunk, and
+    then follows its level, falling quickly and rising slowly (by
+    `floor_rise` of the difference per chunk), so steady noise raises the
+    floor until it no longer opens the gate. The floor is never below
+    `min_floor_db`.
+    """
+
+    def __init__(
+        self,
+        model: VADModel,
+        open_margin_db: float = 9.0,
+        max_zcr: float = 0.4,
+        hangover_chunks: int = 8,
+        min_floor_db: float = -70.0,
+        floor_rise: float = 0.02,
+        floor_fall: float = 0.5,
+    ):
+        self.model = model
+        self.sample_rate = model.sample_rate
+        self.open_margin_db = open_margin_db
+        self.max_zcr = max_zcr
+        self.hangover_chunks = hangover_chunks
+        self.min_floor_db = min_floor_db
+        self.floor_rise = floor_rise
+        self.floor_fall = floor_fall
+        self._model_initial_state = model.initial_state()
+        # How many chunks have been through the gate, and how many of those
+        # the model ran on.
+        self.chunks = 0
+        self.model_chunks = 0
+
+    def load(self) -> None:
+        self.model.load()
+
+    def initial_state(self) -> np.ndarray:
+        # The noise floor (NaN until the first chunk), the chunks of
+        # hangover left, and the model's state, flattened.
+        return np.concatenate([
+            np.array([np.nan, 0], dtype=np.float32),
+            self._model_initial_state.ravel(),
+        ])
+
+    def __call__(
+        self, chunks: np.ndarray, states: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        batch_size = len(chunks)
+        hangover = states[:, 1]
+        model_states = states[:, 2:].reshape(
+            (batch_size,) + self._model_initial_state.shape).copy()
+
+        rms = np.sqrt(np.mean(np.square(chunks), axis=1))
+        level_db = 20 * np.log10(np.maximum(rms, 1e-10))
+        signs = np.signbit(chunks)
+        zcr = np.count_nonzero(
+            signs[:, 1:] != signs[:, :-1], axis=1) / (chunks.shape[1] - 1)
+        floor = np.maximum(
+            np.where(np.isnan(states[:, 0]), level_db, states[:, 0]),
+            self.min_floor_db)
+
+        loud = (level_db > floor + self.open_margin_db) & (zcr < self.max_zcr)
+        is_open = loud | (hangover > 0)
+        new_hangover = np.where(
+            loud, self.hangover_chunks, np.maximum(hangover - 1, 0))
+        rate = np.where(level_db < floor, self.floor_fall, self.floor_rise)
+        new_floor = np.maximum(
+            floor + rate * (level_db - floor), self.min_floor_db)
+
+        probabilities = np.zeros(batch_size, dtype=np.float32)
+        if is_open.any():
+            indices = np.flatnonzero(is_open)
+            run_states = model_states[indices]
+            # The model's state is stale after a spell with the gate closed,
+            # so it starts again.
+            run_states[hangover[indices] == 0] = self._model_initial_state
+            probabilities[indices], model_states[indices] = self.model(
+                chunks[indices], run_states)
+            self.model_chunks += len(indices)
+        self.chunks += batch_size
+
+        return probabilities, np.concatenate([
+            new_floor[:, None],
+            new_hangover[:, None],
+            model_states.reshape(batch_size, -1),
+        ], axis=1).astype(np.float32)
+
+
+_default_model: VADModel | None = None
+_default_model_lock = threading.Lock()
+
+
+def default_vad_model() -> VADModel:
+    """The process-wide SileroVADModel, behind a GatedVADModel, used by
+    transports and engines that aren't given a model. Getting it doesn't
+    load it."""
+    global _default_model
+    with _default_model_lock:
+        if _default_model is None:
+            _default_model = GatedVADModel(SileroVADModel())
+        return _default_model
+
+
+class VADStream:
+    """A stream of audio chunks registered with a BatchedVADEngine. Get one
+    from BatchedVADEngine.register()."""
+
+    def __init__(
+        self,
+        engine: "BatchedVADEngine",
+        on_probability: Callable[[float], None],
+        state: np.ndarray,
+    ):
+        self._engine = engine
+        self.on_probability = on_probability
+        self.state = state
+        self.pending: List[np.ndarray] = []
+
+    def submit(self, chunk: np.ndarray) -> None:
+        """Queue a chunk of float32 audio; every stream's chunks must be the
+        same length. Once the engine has run the model on it, it calls
+        `on_probability` with the result, from its own thread, or with 0.0
+        if the model failed. A stream's chunks are run in the order they
+        were submitted."""
+        self._engine._submit(self, chunk)
+
+    def close(self) -> None:
+        self._engine._unregister(self)
+
+
+class BatchedVADEngine:
+    """Runs a VAD model for many audio streams, in one thread.
+
+    Each pass takes the oldest waiting chunk of every stream that has one,
+    up to `max_batch_size` of them, and runs the model on them all at once.
+    Once a chunk arrives, the engine waits up to `max_wait_s` for the other
+    streams' chunks, so streams that aren't in step still share passes.
+    """
+
+    _shared: "BatchedVADEngine | None" = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        model: VADModel | None = None,
+        max_batch_size: int = 64,
+        max_wait_s: float = 0.005,
+    ):
+        self.model = model or default_vad_model()
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_s
+        self._streams: Dict[int, VADStream] = {}
+        self._changed = threading.Condition()
+        self._thread: threading.Thread | None = None
+        # How many passes the engine has made, and how many chunks they ran.
+        self.batches = 0
+        self.chunks = 0
+
+    @classmethod
+    def shared(cls) -> "BatchedVADEngine":
+        """The process-wide engine, running the default model."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def register(self, on_probability: Callable[[float], None]) -> VADStream:
+        stream = VADStream(self, on_probability, self.model.initial_state())
+        with self._changed:
+            self._streams[id(stream)] = stream
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="vad-engine", daemon=True)
+                self._thread.start()
+        return stream
+
+    def _unregister(self, stream: VADStream):
+        with self._changed:
+            self._streams.pop(id(stream), None)
+
+    def _submit(self, stream: VADStream, chunk: np.ndarray):
+        with self._changed:
+            stream.pending.append(chunk)
+            self._changed.notify()
+
+    def _next_batch(self) -> List[Tuple[VADStream, np.ndarray]]:
+        with self._changed:
+            while not any(s.pending for s in self._streams.values()):
+                self._changed.wait()
+
+            deadline = time.monotonic() + self.max_wait_s
+            while True:
+                ready = [s for s in self._streams.values() if s.pending]
+                remaining = deadline - time.monotonic()
+                if (len(ready) >= min(len(self._streams), self.max_batch_size)
+                        or remaining <= 0):
+                    break
+                self._changed.wait(remaining)
+
+            return [(s, s.pending.pop(0)) for s in ready[:self.max_batch_size]]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            chunks = np.stack([chunk for _, chunk in batch])
+            states = np.stack([stream.state for stream, _ in batch])
+            try:
+                probabilities, states = self.model(chunks, states)
+            except Exception:
+                logger.exception("Error running the VAD model")
+                # Every chunk still gets a result, so streams waiting on
+                # their chunks in order don't get stuck or out of step. The
+                # chunks count as silence, and the states stay as they were.
+                probabilities = np.zeros(len(batch), dtype=np.float32)
+            self.batches += 1
+            self.chunks += len(batch)
+            for (stream, _), probability, state in zip(
+                    batch, probabilities, states):
+                stream.state = state
+                stream.on_probability(float(probability))
+
+
+class VADProcessor(PushFrameProcessor):
+    """Detects when the speaker in a stream of AudioFrames starts and stops
+    speaking, and emits a UserStartedSpeakingFrame or
+    UserStoppedSpeakingFrame after the AudioFrame it happened in.
+
+    The frames can be any size: their audio is split into chunks of
+    `chunk_samples` for the model, and what's left over waits for the next
+    frame. As with the transport's VAD, the user has started speaking after
+    `vad_start_s` of speech, and stopped after `vad_stop_s` without any.
+    AudioFrames are passed on unchanged; the audio has to be at the model's
+    sample rate, and only the first channel is used.
+
+    The model runs in a worker thread, or if `engine` is given, in the
+    engine with other streams' chunks.
+    """
+
+    consumed_frame_types = (AudioFrame,)
+
+    def __init__(
+        self,
+        model: VADModel | None = None,
+        engine: BatchedVADEngine | None = None,
+        vad_start_s: float = 0.2,
+        vad_stop_s: float = 0.8,
+        chunk_samples: int = 1536,
+    ):
+        self._engine = engine
+        if engine:
+            model = engine.model
+        self._model = model or default_vad_model()
+        self._chunk_samples = chunk_samples
+        chunk_s = chunk_samples / self._model.sample_rate
+        self._state_machine = VADStateMachine(
+            round(vad_start_s / chunk_s), round(vad_stop_s / chunk_s))
+        self._model_state = self._model.initial_state()[None]
+        # The model's last run in a worker thread.
+        self._model_call: asyncio.Future | None = None
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._stream: VADStream | None = None
+        self._waiting: Deque[asyncio.Future] = collections.deque()
+        self._warned_sample_rate = False
+
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
+        await emit(frame)
+        if not isinstance(frame, AudioFrame):
+            return
+        if frame.sample_rate != self._model.sample_rate:
+            if not self._warned_sample_rate:
+                logger.warning(
+                    f"VAD needs audio at {self._model.sample_rate}Hz, "
+                    f"not {frame.sample_rate}Hz; ignoring it")
+                self._warned_sample_rate = True
+            return
+
+        samples = frame.as_float32()
+        if frame.channels > 1:
+            samples = samples[::frame.channels]
+        if len(self._pending):
+            samples = np.concatenate([self._pending, samples])
+        count = len(samples) // self._chunk_samples
+        self._pending = samples[count * self._chunk_samples:].copy()
+        if not count:
+            return
+
+        chunks = samples[:count * self._chunk_samples].reshape(
+            count, self._chunk_samples)
+        if self._engine:
+            probabilities = await self._run_engine(chunks)
+        else:
+            probabilities = await self._run_in_thread(chunks)
+        for probability in probabilities:
+            vad_frame = self._state_machine.update(probability > 0.5)
+            if vad_frame:
+                await emit(vad_frame)
+
+    async def _run_in_thread(self, chunks: np.ndarray) -> List[float]:
+        # A run that's cancelled (eg. by an interruption) carries on in its
+        # thread, and the model isn't thread-safe, so the next run waits for
+        # it. Only runs that are waited for to the end keep their state.
+        if self._model_call is not None:
+            await asyncio.wait([self._model_call])
+        self._model_call = asyncio.ensure_future(asyncio.to_thread(
+            self._run_model, chunks, self._model_state))
+        probabilities, self._model_state = await asyncio.shield(
+            self._model_call)
+        return probabilities
+
+    def _run_model(
+        self, chunks: np.ndarray, state: np.ndarray
+    ) -> Tuple[List[float], np.ndarray]:
+        # Each chunk needs the state the one before left, so they're run one
+        # at a time.
+        probabilities = []
+        for chunk in chunks:
+            p, state = self._model(chunk[None], state)
+            probabilities.append(float(p[0]))
+        return probabilities, state
+
+    async def _run_engine(self, chunks: np.ndarray) -> List[float]:
+        loop = asyncio.get_running_loop()
+        if self._stream is None:
+            self._stream = self._engine.register(
+                lambda probability: self._on_probability(loop, probability))
+        futures = []
+        for chunk in chunks:
+            futures.append(loop.create_future())
+            self._waiting.append(futures[-1])
+            self._stream.submit(chunk)
+        return await asyncio.gather(*futures)
+
+    def _on_probability(self, loop: asyncio.AbstractEventLoop, probability):
+        # From the engine's thread, which returns a stream's results in
+        # order.
+        future = self._waiting.popleft()
+        loop.call_soon_threadsafe(_set_result, future, probability)
+
+    def close(self) -> None:
+        """Stop using the engine, if there is one."""
+        if self._stream:
+            self._stream.close()
+            self._stream = None
+
+    async def interrupted(self) -> None:
+        # The interrupted frame's audio may have been only partly run, so
+        # start afresh with the next frame's.
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._state_machine = VADStateMachine(
+            self._state_machine.start_frames, self._state_machine.stop_frames)
+        if not self._engine:
+            self._model_state = self._model.initial_state()[None]
+
+
+def _set_result(future: asyncio.Future, result):
+    if not future.done():
+        future.set_result(result)
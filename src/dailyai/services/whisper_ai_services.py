@@ -1,9 +1,10 @@
 """This module implements Whisper transcription with a locally-downloaded model."""
-import asyncio
 from enum import Enum
 import logging
+import threading
 from typing import BinaryIO
 from faster_whisper import WhisperModel
+from dailyai.pipeline.cancellation import to_thread_cancellable
 from dailyai.services.local_stt_service import LocalSTTService
 
 
@@ -46,10 +47,18 @@ class WhisperSTTService(LocalSTTService):
             compute_type=self._compute_type)
         self._model = model
 
-    async def run_stt(self, audio: BinaryIO) -> str:
-        """Transcribes given audio using Whisper"""
-        segments, _ = await asyncio.to_thread(self._model.transcribe, audio)
+    def _transcribe(self, audio: BinaryIO, cancelled: threading.Event) -> str:
+        """Runs on a worker thread. transcribe() returns a lazy generator, and
+        the decoding happens as we iterate over it, so stop early if the turn
+        has been cancelled."""
+        segments, _ = self._model.transcribe(audio)
         res: str = ""
         for segment in segments:
+            if cancelled.is_set():
+                break
             res += f"{segment.text} "
         return res
+
+    async def run_stt(self, audio: BinaryIO) -> str:
+        """Transcribes given audio using Whisper"""
+        return await to_thread_cancellable(self._transcribe, audio)
@@ -3,16 +3,21 @@ import doctest
 import functools
 import unittest
 
+from dailyai.bench.fakes import FakeLLMService, FakeTiming
 from dailyai.pipeline.aggregators import (
+    FrameRouter,
     GatedAggregator,
     ParallelPipeline,
     SentenceAggregator,
     StatelessTextTransformer,
+    StreamingParallelPipeline,
 )
+from dailyai.pipeline.frame_processor import FrameProcessor
 from dailyai.pipeline.frames import (
     AudioFrame,
     EndFrame,
     ImageFrame,
+    LLMMessagesQueueFrame,
     LLMResponseEndFrame,
     LLMResponseStartFrame,
     Frame,
@@ -121,6 +126,124 @@ class TestDailyFrameAggregators(unittest.IsolatedAsyncioTestCase):
             frame = await sink.get()
             self.assertEqual(frame, expected_output_frames.pop(0))
 
+    async def test_parallel_pipeline_llm_branches(self):
+        # Each branch's response frames are its own, so none are lost when
+        # the branches' output is de-duped.
+        parallel = ParallelPipeline([
+            [FakeLLMService(FakeTiming(), response_words=2, seed=seed)]
+            for seed in range(2)
+        ])
+        output = [frame async for frame in parallel.process_frame(
+            LLMMessagesQueueFrame([]))]
+        self.assertEqual(
+            [type(frame) for frame in output].count(LLMResponseStartFrame), 2)
+        self.assertEqual(
+            [type(frame) for frame in output].count(LLMResponseEndFrame), 2)
+        self.assertEqual(
+            [type(frame) for frame in output].count(TextFrame), 4)
+
+    async def test_streaming_parallel_pipeline(self):
+
+        async def slow_add(sleep_time: float, name: str, x: str):
+            await asyncio.sleep(sleep_time)
+            return ":".join([x, name])
+
+        fast = StatelessTextTransformer(
+            functools.partial(slow_add, 0.01, 'fast'))
+        slow = StatelessTextTransformer(
+            functools.partial(slow_add, 0.1, 'slow'))
+        sentence_aggregator = SentenceAggregator()
+
+        pipeline = Pipeline(
+            [
+                StreamingParallelPipeline(
+                    [[fast], [sentence_aggregator, slow]]
+                ),
+            ]
+        )
+
+        received: list[tuple[float, Frame]] = []
+
+        async def collect():
+            while True:
+                frame = await pipeline.sink.get()
+                received.append((asyncio.get_running_loop().time(), frame))
+                if isinstance(frame, EndFrame):
+                    break
+
+        await pipeline.queue_frames([
+            TextFrame("Hello, "),
+            TextFrame("world."),
+            EndFrame()
+        ])
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(pipeline.run_pipeline(), collect())
+
+        self.assertEqual([frame for _, frame in received], [
+            TextFrame("Hello, :fast"),
+            TextFrame("world.:fast"),
+            TextFrame("Hello, world.:slow"),
+            EndFrame(),
+        ])
+        # The fast branch's output arrives before the slow branch finishes.
+        self.assertLess(received[1][0] - start, 0.1)
+
+    async def test_streaming_parallel_pipeline_raises_branch_errors(self):
+        def fail(text):
+            raise ValueError(text)
+
+        parallel = StreamingParallelPipeline(
+            [[StatelessTextTransformer(lambda x: x)], [StatelessTextTransformer(fail)]])
+        with self.assertRaises(ValueError):
+            async for _ in parallel.process_frame(TextFrame("oops")):
+                pass
+        self.assertEqual(parallel._branch_tasks, [])
+
+    async def test_frame_router(self):
+        seen: dict[str, list[Frame]] = {"text": [], "image": []}
+
+        class Recorder(FrameProcessor):
+            def __init__(self, name):
+                self.name = name
+
+            async def process_frame(self, frame):
+                seen[self.name].append(frame)
+                if isinstance(frame, ImageFrame):
+                    yield TextFrame("an image")
+                yield frame
+
+        router = FrameRouter([
+            (TextFrame, [Recorder("text")]),
+            (ImageFrame, [Recorder("image")]),
+        ])
+        pipeline = Pipeline([router])
+
+        frames = [
+            TextFrame("hello"),
+            AudioFrame(b"audio"),
+            ImageFrame(None, b"image"),
+            EndFrame(),
+        ]
+        await pipeline.queue_frames(frames)
+        await pipeline.run_pipeline()
+
+        self.assertEqual(seen["text"], [TextFrame("hello"), EndFrame()])
+        self.assertEqual(
+            seen["image"], [
+                ImageFrame(
+                    None, b"image"), EndFrame()])
+
+        output = []
+        while not pipeline.sink.empty():
+            output.append(await pipeline.sink.get())
+        self.assertEqual(output, [
+            TextFrame("hello"),
+            AudioFrame(b"audio"),
+            TextFrame("an image"),
+            ImageFrame(None, b"image"),
+            EndFrame(),
+        ])
+
 
 def load_tests(loader, tests, ignore):
     """ Run doctests on the aggregators module. """
@@ -1,9 +1,11 @@
+import asyncio
 import unittest
 
 from typing import AsyncGenerator, Generator
 
-from dailyai.services.ai_services import AIService
-from dailyai.pipeline.frames import EndFrame, Frame, TextFrame
+from dailyai.services.ai_services import AIService, TTSService
+from dailyai.pipeline.frames import AudioFrame, EndFrame, Frame, TextFrame
+from dailyai.pipeline.pipeline import Pipeline
 
 
 class SimpleAIService(AIService):
@@ -28,5 +30,35 @@ class TestBaseAIService(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(input_frames, output_frames)
 
 
+class OneChunkTTSService(TTSService):
+    """Sends a chunk of audio, then takes its time finishing the sentence."""
+
+    def __init__(self):
+        super().__init__()
+        self.finish = asyncio.Event()
+
+    async def run_tts(self, text) -> AsyncGenerator[bytes, None]:
+        yield b"\x01\x00"
+        await self.finish.wait()
+        yield b"\x02\x00"
+
+
+class TestTTSService(unittest.IsolatedAsyncioTestCase):
+    async def test_audio_streams_through_pipeline(self):
+        tts = OneChunkTTSService()
+        pipeline = Pipeline([tts])
+        await pipeline.queue_frames([TextFrame("Hello."), EndFrame()])
+        task = asyncio.create_task(pipeline.run_pipeline())
+
+        # The first chunk is passed on before run_tts is done.
+        first = await asyncio.wait_for(pipeline.sink.get(), 1)
+        self.assertEqual(first, AudioFrame(b"\x01\x00"))
+        tts.finish.set()
+        await asyncio.wait_for(task, 1)
+        self.assertEqual(await pipeline.sink.get(), AudioFrame(b"\x02\x00"))
+        self.assertEqual(await pipeline.sink.get(), TextFrame("Hello."))
+        self.assertIsInstance(await pipeline.sink.get(), EndFrame)
+
+
 if __name__ == "__main__":
     unittest.main()
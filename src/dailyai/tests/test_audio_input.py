@@ -0,0 +1,94 @@
+import threading
+import unittest
+
+from dailyai.bench.audio_fanout import MODES, measure
+from dailyai.services.audio_input import AudioInputRing
+
+
+class TestAudioInputRing(unittest.TestCase):
+
+    def test_readers_read_their_own_chunks(self):
+        ring = AudioInputRing(10)
+        first = ring.reader()
+        ring.write(b"abcd")
+        second = ring.reader()
+        ring.write(b"efgh")
+
+        self.assertEqual(bytes(first.read(3)), b"abcdef")
+        self.assertEqual(bytes(second.read(1)), b"ef")
+        # Across the end of the buffer, still in one piece.
+        ring.write(b"ijkl")
+        self.assertEqual(bytes(first.read(3)), b"ghijkl")
+        self.assertEqual(bytes(second.read(2)), b"ghij")
+        self.assertEqual(second.available, 2)
+
+    def test_reads_are_views(self):
+        ring = AudioInputRing(8)
+        reader = ring.reader()
+        ring.write(b"abcd")
+        data = reader.read(2)
+        self.assertIsInstance(data, memoryview)
+        self.assertIs(data.obj, ring._buffer)
+
+    def test_overrun(self):
+        ring = AudioInputRing(8)
+        reader = ring.reader()
+        ring.write(b"abcdefgh")
+        ring.write(b"ijkl")
+        # The oldest audio was overwritten, so the reader skips it.
+        self.assertEqual(bytes(reader.read(2)), b"efgh")
+        self.assertEqual(reader.overrun_bytes, 4)
+
+        # A write bigger than the ring keeps the newest audio.
+        ring.write(b"0123456789")
+        self.assertEqual(bytes(reader.read(4)), b"23456789")
+        with self.assertRaises(ValueError):
+            reader.read(5)
+
+    def test_reads_what_is_left_after_close(self):
+        ring = AudioInputRing(100)
+        reader = ring.reader()
+        ring.write(b"abcdefghij")
+        ring.close()
+        self.assertEqual(bytes(reader.read(2)), b"abcd")
+        self.assertEqual(bytes(reader.read(2)), b"efgh")
+        # Not enough left for a whole read.
+        self.assertIsNone(reader.read(2))
+        self.assertEqual(bytes(reader.read(1)), b"ij")
+        self.assertIsNone(reader.read(1))
+
+    def test_waits_for_audio(self):
+        ring = AudioInputRing(100)
+        reader = ring.reader()
+        self.assertIsNone(reader.read(1, timeout=0.01))
+
+        chunks = []
+
+        def consume():
+            while True:
+                frame = reader.read_frame(4, 16000)
+                if frame is None:
+                    break
+                chunks.append(frame.tobytes())
+
+        thread = threading.Thread(target=consume)
+        thread.start()
+        for i in range(4):
+            ring.write(bytes([i]) * 6)
+        while reader.available:
+            pass
+        ring.close()
+        thread.join(5)
+        self.assertEqual(b"".join(chunks),
+                         b"\x00" * 6 + b"\x01" * 6 + b"\x02" * 6 + b"\x03" * 6)
+        self.assertEqual(len(chunks), 3)
+
+    def test_benchmark(self):
+        for mode in MODES:
+            with self.subTest(mode=mode):
+                result = measure(mode, consumers=3, seconds=1)
+                self.assertGreater(result.capture_cpu, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
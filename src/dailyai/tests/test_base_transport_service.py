@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from dailyai.pipeline.concurrent_pipeline import ConcurrentPipeline
+from dailyai.pipeline.frame_processor import FrameEmitter, PushFrameProcessor
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    EndFrame,
+    Frame,
+    StartFrame,
+    TextFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from dailyai.pipeline.pipeline import Pipeline
+from dailyai.pipeline.queues import OverflowPolicy
+from dailyai.services.base_transport_service import BaseTransportService
+from dailyai.services.vad import BatchedVADEngine, EnergyVADModel, VADProcessor
+
+SAMPLE_RATE = 16000
+# Devices run this many times faster than real time.
+SPEEDUP = 10
+
+
+def _speech_then_silence() -> bytes:
+    """Half a second of silence, a second of speech, then silence."""
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    speech = np.sin(2 * np.pi * 150 * t) * 0.3 * 32767
+    samples = np.concatenate(
+        [np.zeros(SAMPLE_RATE // 2), speech]).astype(np.int16)
+    return samples.tobytes()
+
+
+class FakeTransport(BaseTransportService):
+    """Reads the received audio from a buffer, faster than real time, and
+    writes the mic audio to a list, in real time."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.audio_in = _speech_then_silence()
+        self.written = []
+        self.write_lock = threading.Lock()
+
+    def read_audio_frames(self, desired_frame_count):
+        time.sleep(desired_frame_count / SAMPLE_RATE / SPEEDUP)
+        size = desired_frame_count * 2
+        data = self.audio_in[:size]
+        self.audio_in = self.audio_in[size:]
+        return data + bytes(size - len(data))
+
+    def write_frame_to_mic(self, frame: bytes):
+        with self.write_lock:
+            self.written.append(bytes(frame))
+        time.sleep(len(frame) / 2 / SAMPLE_RATE)
+
+    def write_frame_to_camera(self, frame: bytes):
+        pass
+
+    def _prerun(self):
+        pass
+
+    def bytes_written(self, sample: bytes) -> int:
+        with self.write_lock:
+            return sum(w.count(sample) for w in self.written) * 2
+
+
+class FakeTTS(PushFrameProcessor):
+    """Says "stall" as two seconds of 0x0001 samples and then waits for the
+    turn to be interrupted; says anything else as 0.1s of 0x0002 samples."""
+
+    def __init__(self):
+        self.closed = []
+
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
+        if not isinstance(frame, TextFrame):
+            await emit(frame)
+        elif frame.text == "stall":
+            await emit(AudioFrame(b"\x01\x00" * 32000))
+            try:
+                await asyncio.Event().wait()
+            finally:
+                self.closed.append(frame.text)
+        else:
+            await emit(AudioFrame(b"\x02\x00" * 1600))
+
+
+class TestBaseTransportService(unittest.IsolatedAsyncioTestCase):
+
+    async def wait_until(self, condition):
+        async def poll():
+            while not condition():
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(poll(), 5)
+
+    async def run_session(self, **vad_kwargs):
+        transport = FakeTransport(
+            mic_enabled=True,
+            speaker_enabled=True,
+            vad_enabled=True,
+            duration_minutes=1,
+            **vad_kwargs)
+        run = asyncio.create_task(transport.run())
+
+        # The received audio and the VAD's frames come in together.
+        received = []
+        while not any(isinstance(f, UserStoppedSpeakingFrame)
+                      for f in received):
+            received.append(await asyncio.wait_for(
+                transport.receive_queue.get(), 5))
+        vad_frames = [type(f) for f in received
+                      if not isinstance(f, AudioFrame)]
+        self.assertEqual(
+            vad_frames, [UserStartedSpeakingFrame, UserStoppedSpeakingFrame])
+        audio = b"".join(f.tobytes() for f in received
+                         if isinstance(f, AudioFrame))
+        self.assertGreater(len(audio), 0)
+        self.assertTrue(_speech_then_silence().startswith(audio[:32000]))
+
+        # Two seconds of output, interrupted once it's started playing.
+        await transport.send_queue.put(AudioFrame(b"\x01\x00" * 32000))
+        await self.wait_until(lambda: transport.bytes_written(b"\x01\x00"))
+        transport.interrupt()
+        await transport.send_queue.put(StartFrame())
+        await transport.send_queue.put(AudioFrame(b"\x02\x00" * 1600))
+        await asyncio.wait_for(transport.send_queue.join(), 5)
+        # Less than half of it played.
+        self.assertLess(transport.bytes_written(b"\x01\x00"), 32000)
+        self.assertEqual(transport.bytes_written(b"\x02\x00"), 3200)
+
+        transport.stop()
+        await asyncio.wait_for(run, 5)
+
+    async def test_vad_thread(self):
+        await self.run_session(vad_model=EnergyVADModel())
+
+    async def test_vad_engine(self):
+        await self.run_session(
+            vad_engine=BatchedVADEngine(EnergyVADModel()))
+
+    async def test_vad_processor(self):
+        await self.run_session(
+            vad_processor=VADProcessor(EnergyVADModel()))
+
+    async def test_interruptible_pipeline(self):
+        for pipeline_class in [Pipeline, ConcurrentPipeline]:
+            with self.subTest(pipeline=pipeline_class.__name__):
+                transport = FakeTransport(mic_enabled=True, duration_minutes=1)
+                run = asyncio.create_task(transport.run())
+                tts = FakeTTS()
+                session = asyncio.create_task(
+                    transport.run_interruptible_pipeline(
+                        pipeline_class([tts])))
+
+                await transport.receive_queue.put(TextFrame("stall"))
+                await self.wait_until(
+                    lambda: transport.bytes_written(b"\x01\x00"))
+                # The user talks over the response.
+                await transport.receive_queue.put(UserStartedSpeakingFrame())
+                await transport.receive_queue.put(TextFrame("next turn"))
+                await self.wait_until(
+                    lambda: transport.bytes_written(b"\x02\x00") == 3200)
+                self.assertEqual(tts.closed, ["stall"])
+                self.assertLess(transport.bytes_written(b"\x01\x00"), 32000)
+
+                await transport.receive_queue.put(EndFrame())
+                await asyncio.wait_for(session, 5)
+                transport.stop()
+                await asyncio.wait_for(run, 5)
+
+    def test_send_queue_options_deprecated(self):
+        for option, value in [("send_queue_size", 10),
+                              ("send_queue_overflow_policy",
+                               OverflowPolicy.DROP_OLDEST)]:
+            with self.subTest(option=option):
+                with self.assertLogs(level="WARNING") as logs:
+                    FakeTransport(**{option: value})
+                self.assertIn(f"{option} is deprecated", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from dailyai.bench.scenarios import SCENARIOS, ScenarioConfig, run_scenario
+from dailyai.pipeline.concurrent_pipeline import ConcurrentPipeline
+from dailyai.pipeline.pipeline import Pipeline
+
+
+class TestBenchScenarios(unittest.IsolatedAsyncioTestCase):
+
+    async def test_scenarios_run(self):
+        for pipeline_class in (Pipeline, ConcurrentPipeline):
+            for name in SCENARIOS:
+                config = ScenarioConfig(
+                    turns=3,
+                    time_scale=0.01,
+                    pipeline_class=pipeline_class,
+                    measure_memory=False)
+                with self.subTest(scenario=name, pipeline=pipeline_class.__name__):
+                    result = await run_scenario(name, config)
+                    self.assertGreater(result.frames, 0)
+                    self.assertIn("mic_write", result.hop_percentiles)
+
+    async def test_peak_memory(self):
+        config = ScenarioConfig(turns=1, time_scale=0)
+        result = await run_scenario("single-turn", config)
+        self.assertGreater(result.peak_memory_bytes, 0)
+
+    async def test_repeatable(self):
+        config = ScenarioConfig(turns=5, time_scale=0, measure_memory=False)
+        first = await run_scenario("interruptions", config)
+        second = await run_scenario("interruptions", config)
+        self.assertEqual(first.frames, second.frames)
+        self.assertEqual(first.interrupted_turns, second.interrupted_turns)
@@ -0,0 +1,147 @@
+import unittest
+from dataclasses import dataclass
+
+from dailyai.bench.frame_codec import CODECS, measure, sample_frames
+from dailyai.pipeline.codec import (
+    FIRST_APP_TYPE_ID,
+    FrameCodec,
+    FrameCodecError,
+)
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    BotStartedSpeakingFrame,
+    EndFrame,
+    Frame,
+    ImageFrame,
+    LLMFunctionCallFrame,
+    LLMMessagesQueueFrame,
+    LLMResponseStartFrame,
+    OpenAILLMContextFrame,
+    ReceivedAppMessageFrame,
+    SendAppMessageFrame,
+    SpriteFrame,
+    TextFrame,
+    TranscriptionQueueFrame,
+)
+from dailyai.services.openai_llm_context import OpenAILLMContext
+
+
+class PageFrame(TextFrame):
+    __slots__ = ()
+
+
+@dataclass(slots=True)
+class ScoreFrame(Frame):
+    player: str
+    points: int
+    bonus: float | None = None
+
+
+class LegacyFrame(Frame):
+    def __init__(self, value: str):
+        self.value = value
+
+
+class TestFrameCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.codec = FrameCodec()
+
+    def round_trip(self, frame: Frame) -> Frame:
+        return self.codec.decode(self.codec.encode(frame))
+
+    def test_builtin_frames(self):
+        frames = [
+            EndFrame(),
+            LLMResponseStartFrame.shared(),
+            AudioFrame(b"\x01\x02" * 160, 24000, 1),
+            ImageFrame("https://example.com/image.png", b"\x00\xff" * 8),
+            ImageFrame(None, b"", pts=1.25),
+            SpriteFrame([b"one", b"two"]),
+            TextFrame("Hello, wörld"),
+            TranscriptionQueueFrame("hi", "participant", "123.4"),
+            LLMMessagesQueueFrame(
+                [{"role": "user", "content": "hi", "extra": [1, 2.5, None, True]}]),
+            ReceivedAppMessageFrame({"nested": {"list": [1, 2]}}, "sender"),
+            SendAppMessageFrame("message", None),
+            LLMFunctionCallFrame("get_weather", '{"city": "Paris"}'),
+        ]
+        for frame in frames:
+            with self.subTest(frame=str(frame)):
+                self.assertEqual(self.round_trip(frame), frame)
+
+        frame = self.round_trip(BotStartedSpeakingFrame())
+        self.assertIs(frame.__class__, BotStartedSpeakingFrame)
+
+    def test_openai_context(self):
+        context = OpenAILLMContext(
+            [{"role": "user", "content": "hi"}],
+            tools=[{"type": "function", "function": {"name": "f"}}],
+        )
+        context.set_tool_choice("auto")
+        decoded = self.round_trip(OpenAILLMContextFrame(context)).context
+        self.assertEqual(decoded.messages, context.messages)
+        self.assertEqual(decoded.tools, context.tools)
+        self.assertEqual(decoded.tool_choice, "auto")
+
+        decoded = self.round_trip(
+            OpenAILLMContextFrame(OpenAILLMContext())).context
+        self.assertEqual(decoded.messages, [])
+        self.assertEqual(decoded.tools, OpenAILLMContext().tools)
+
+    def test_audio_is_raw(self):
+        samples = bytes(range(256)) * 3
+        encoded = self.codec.encode(AudioFrame(samples, 48000, 2))
+        self.assertEqual(len(encoded), len(samples) + 9)
+        self.assertEqual(encoded[-len(samples):], samples)
+
+        frame = self.codec.decode(encoded)
+        self.assertIsInstance(frame.data, memoryview)
+        self.assertIs(frame.data.obj, encoded)
+        self.assertEqual((frame.sample_rate, frame.channels), (48000, 2))
+
+    def test_app_frames(self):
+        with self.assertRaises(FrameCodecError):
+            self.codec.encode(PageFrame("page"))
+
+        self.codec.register(PageFrame, FIRST_APP_TYPE_ID)
+        self.codec.register(ScoreFrame, FIRST_APP_TYPE_ID + 1)
+        self.codec.register(
+            LegacyFrame,
+            FIRST_APP_TYPE_ID + 2,
+            lambda frame: frame.value.encode(),
+            lambda payload: LegacyFrame(bytes(payload).decode()),
+        )
+
+        page = self.round_trip(PageFrame("page one"))
+        self.assertIs(page.__class__, PageFrame)
+        self.assertEqual(page.text, "page one")
+        score = ScoreFrame("ana", 3, 0.5)
+        self.assertEqual(self.round_trip(score), score)
+        self.assertEqual(self.round_trip(LegacyFrame("x")).value, "x")
+
+        with self.assertRaises(ValueError):
+            self.codec.register(TextFrame, 19)
+        with self.assertRaises(ValueError):
+            self.codec.register(LegacyFrame, FIRST_APP_TYPE_ID)
+
+    def test_bad_input(self):
+        encoded = self.codec.encode(TextFrame("hello"))
+        with self.assertRaisesRegex(FrameCodecError, "version"):
+            self.codec.decode(b"\x63" + encoded[1:])
+        with self.assertRaisesRegex(FrameCodecError, "truncated"):
+            self.codec.decode(encoded[:-2])
+        with self.assertRaisesRegex(FrameCodecError, "type id"):
+            self.codec.decode(b"\x01\xff\xff")
+        with self.assertRaises(FrameCodecError):
+            self.codec.encode(ReceivedAppMessageFrame(object(), "sender"))
+
+    def test_benchmark(self):
+        for name, frame in sample_frames().items():
+            with self.subTest(frame=name):
+                size, encode_s, decode_s = measure(CODECS["codec"], frame, 10)
+                self.assertGreater(size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
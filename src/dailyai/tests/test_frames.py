@@ -0,0 +1,130 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from dailyai.bench.frame_allocation import measure
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    ControlFrame,
+    EndFrame,
+    Frame,
+    LLMResponseEndFrame,
+    LLMResponseStartFrame,
+    TextFrame,
+    TranscriptionQueueFrame,
+    UserStoppedSpeakingFrame,
+)
+
+
+class TestFrames(unittest.IsolatedAsyncioTestCase):
+
+    def test_no_instance_dict(self):
+        for frame in [
+            TextFrame("hello"),
+            TranscriptionQueueFrame("hello", "user", "2024-01-01"),
+            AudioFrame(b"\x00\x00"),
+            EndFrame(),
+            UserStoppedSpeakingFrame(),
+        ]:
+            with self.subTest(frame=str(frame)):
+                self.assertFalse(hasattr(frame, "__dict__"))
+                with self.assertRaises(AttributeError):
+                    frame.not_a_field = 1
+
+    def test_equality(self):
+        self.assertEqual(TextFrame("a"), TextFrame("a"))
+        self.assertNotEqual(TextFrame("a"), TextFrame("b"))
+        self.assertNotEqual(
+            TextFrame("a"), TranscriptionQueueFrame("a", "user", ""))
+        self.assertEqual(EndFrame(), EndFrame())
+        self.assertEqual(EndFrame(), EndFrame.shared())
+        self.assertNotEqual(LLMResponseStartFrame(), LLMResponseEndFrame())
+
+    def test_shared_control_frames(self):
+        frame = LLMResponseStartFrame.shared()
+        self.assertIs(frame, LLMResponseStartFrame.shared())
+        self.assertIsInstance(frame, LLMResponseStartFrame)
+        self.assertIsInstance(frame, ControlFrame)
+        self.assertIsNot(frame, LLMResponseEndFrame.shared())
+        self.assertIsInstance(
+            LLMResponseEndFrame.shared(),
+            LLMResponseEndFrame)
+
+    def test_subclasses_without_slots(self):
+        class PageFrame(TextFrame):
+            pass
+
+        frame = PageFrame("page one")
+        frame.page = 1
+        self.assertIsInstance(frame, TextFrame)
+        self.assertEqual(frame.text, "page one")
+        self.assertEqual(frame, PageFrame("page one"))
+
+    def test_pickle(self):
+        for frame in [
+            TranscriptionQueueFrame("hello", "user", "2024-01-01"),
+            AudioFrame(b"\x01\x02"),
+            LLMResponseEndFrame.shared(),
+        ]:
+            with self.subTest(frame=str(frame)):
+                copy = pickle.loads(pickle.dumps(frame))
+                self.assertIs(copy.__class__, frame.__class__)
+                self.assertEqual(copy, frame)
+
+    def test_audio_frame_views(self):
+        buffer = np.arange(8, dtype=np.int16).tobytes()
+        frame = AudioFrame(buffer, sample_rate=8000)
+        self.assertEqual(frame.num_frames, 8)
+        self.assertEqual(frame.duration_s, 0.001)
+
+        piece = frame.slice(2, 5)
+        self.assertIs(piece.data.obj, buffer)
+        self.assertEqual(piece.sample_rate, 8000)
+        self.assertEqual(piece.as_int16().tolist(), [2, 3, 4])
+        self.assertEqual(frame.slice(6).as_int16().tolist(), [6, 7])
+        self.assertEqual(piece, AudioFrame(buffer[4:10], sample_rate=8000))
+
+        samples = frame.as_int16()
+        self.assertIs(samples, frame.as_int16())
+        self.assertTrue(
+            np.shares_memory(
+                samples,
+                np.frombuffer(
+                    buffer,
+                    np.int16)))
+        self.assertFalse(samples.flags.writeable)
+        self.assertAlmostEqual(frame.as_float32()[4], 4 / 32768)
+
+    def test_audio_frame_from_numpy(self):
+        samples = np.array([[1, -1], [2, -2]], dtype=np.int16)
+        frame = AudioFrame(samples, channels=2)
+        self.assertEqual(len(frame.data), 8)
+        self.assertEqual(frame.num_frames, 2)
+        self.assertEqual(frame.as_int16().tolist(), [1, -1, 2, -2])
+
+    def test_audio_frame_concat(self):
+        frame = AudioFrame(b"\x01\x00\x02\x00")
+        self.assertIs(AudioFrame.concat([frame]), frame)
+        joined = AudioFrame.concat([frame.slice(1), frame])
+        self.assertEqual(joined.as_int16().tolist(), [2, 1, 2])
+        with self.assertRaises(ValueError):
+            AudioFrame.concat([frame, AudioFrame(b"\x00\x00", 24000)])
+
+    def test_audio_frame_pickle(self):
+        frame = AudioFrame(b"\x01\x00\x02\x00", 24000).slice(1)
+        frame.as_int16()
+        copy = pickle.loads(pickle.dumps(frame))
+        self.assertEqual(copy, frame)
+        self.assertEqual(copy.sample_rate, 24000)
+        self.assertEqual(copy.as_int16().tolist(), [2])
+
+    async def test_allocation_benchmark(self):
+        slots = await measure("slots", turns=5)
+        with_dict = await measure("dict", turns=5)
+        self.assertEqual(slots.frames, with_dict.frames)
+        self.assertLess(slots.peak_memory_bytes, with_dict.peak_memory_bytes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import unittest
+
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    EndFrame,
+    ImageFrame,
+    StartFrame,
+    TextFrame,
+)
+from dailyai.services.output_queue import OutputQueue, PCMRingBuffer
+
+
+class TestPCMRingBuffer(unittest.TestCase):
+
+    def test_wraps_around(self):
+        ring = PCMRingBuffer(10)
+        self.assertEqual(ring.write(b"abcdefgh"), 8)
+        self.assertEqual(ring.read(6), b"abcdef")
+        self.assertEqual(ring.write(b"123456789"), 8)
+        self.assertEqual(ring.free, 0)
+        self.assertEqual(ring.read(100), b"gh12345678")
+        self.assertEqual((ring.write_position, ring.read_position), (16, 16))
+
+        ring.write(memoryview(b"xyz"))
+        ring.clear()
+        self.assertEqual(ring.available, 0)
+        self.assertEqual(ring.read(3), b"")
+
+
+class TestOutputQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def test_frames_keep_their_place(self):
+        queue = OutputQueue(100)
+        await queue.put(AudioFrame(b"a" * 25))
+        await queue.put(ImageFrame(None, b"image"))
+        await queue.put([AudioFrame(b"b" * 10), TextFrame("text")])
+        await queue.put(StartFrame())
+
+        self.assertIsInstance(queue.get_output(10, 20), StartFrame)
+        self.assertEqual(queue.get_output(10, 20), b"a" * 20)
+        # Less than a chunk, but the image is waiting for it.
+        self.assertEqual(queue.get_output(10, 20), b"a" * 5)
+        self.assertIsInstance(queue.get_output(10, 20), ImageFrame)
+        self.assertEqual(queue.get_output(10, 20), b"b" * 10)
+        self.assertEqual(queue.get_output(10, 20), TextFrame("text"))
+        queue.done()
+        self.assertTrue(queue.empty())
+
+    async def test_flushes_when_audio_stops(self):
+        queue = OutputQueue(100)
+        await queue.put(AudioFrame(b"a" * 15))
+        self.assertEqual(
+            queue.get_output(
+                10,
+                20,
+                flush_after_s=0.01),
+            b"a" * 10)
+        self.assertEqual(
+            queue.get_output(
+                10,
+                20,
+                flush_after_s=0.01),
+            b"a" * 5)
+
+    async def test_put_waits_for_room(self):
+        queue = OutputQueue(10)
+        await queue.put(AudioFrame(b"a" * 8))
+        with self.assertRaises(asyncio.QueueFull):
+            queue.put_nowait(AudioFrame(b"b" * 4))
+
+        put = asyncio.create_task(queue.put(AudioFrame(b"b" * 4)))
+        await asyncio.sleep(0.01)
+        self.assertFalse(put.done())
+        self.assertEqual(queue.get_output(4, 4), b"a" * 4)
+        await asyncio.wait_for(put, 1)
+        self.assertEqual(queue.audio_bytes(), 8)
+
+        # A frame bigger than the ring goes in as there's room.
+        queue.discard_bulk()
+        put = asyncio.create_task(queue.put(AudioFrame(b"c" * 25)))
+        chunks = []
+        while sum(len(c) for c in chunks) < 25:
+            await asyncio.sleep(0.01)
+            chunks.append(queue.get_output(5, 10, flush_after_s=0.01))
+        await asyncio.wait_for(put, 1)
+        self.assertEqual(b"".join(chunks), b"c" * 25)
+
+    async def test_discard_bulk(self):
+        queue = OutputQueue(100)
+        await queue.put(AudioFrame(b"a" * 40))
+        await queue.put(TextFrame("old"))
+        await queue.put(EndFrame())
+        queue.discard_bulk()
+        self.assertEqual(queue.generation, 1)
+        self.assertEqual(queue.audio_bytes(), 0)
+
+        # Output from the new generation comes after the old generation's
+        # control frames, and the rest of the old generation is skipped.
+        await queue.put(AudioFrame(b"b" * 10))
+        await queue.put(TextFrame("new"))
+        self.assertIsInstance(queue.get_output(10, 20), EndFrame)
+        self.assertEqual(queue.get_output(10, 20), b"b" * 10)
+        self.assertEqual(queue.get_output(10, 20), TextFrame("new"))
+        queue.done()
+        self.assertTrue(queue.empty())
+
+    async def test_discard_bulk_stops_a_waiting_put(self):
+        queue = OutputQueue(10)
+        put = asyncio.create_task(queue.put(AudioFrame(b"a" * 30)))
+        await asyncio.sleep(0.01)
+        self.assertEqual(queue.audio_bytes(), 10)
+        queue.discard_bulk()
+        # The rest of the frame is from the old generation, so it's dropped.
+        await asyncio.wait_for(put, 1)
+        self.assertEqual(queue.audio_bytes(), 0)
+
+    async def test_join(self):
+        queue = OutputQueue(100)
+        await queue.join()
+
+        handled = []
+
+        def output_thread():
+            while True:
+                output = queue.get_output(10, 10, flush_after_s=0.01)
+                handled.append(output)
+                queue.done()
+                if isinstance(output, EndFrame):
+                    break
+
+        await queue.put(AudioFrame(b"a" * 30))
+        await queue.put(EndFrame())
+        thread = threading.Thread(target=output_thread)
+        thread.start()
+        await asyncio.wait_for(queue.join(), 1)
+        thread.join()
+        self.assertEqual(handled[:3], [b"a" * 10] * 3)
+        self.assertIsInstance(handled[3], EndFrame)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,14 @@
 import asyncio
+import doctest
+import threading
+import time
 import unittest
 from dailyai.pipeline.aggregators import SentenceAggregator, StatelessTextTransformer
-from dailyai.pipeline.frames import EndFrame, TextFrame
+from dailyai.pipeline.cancellation import TurnScope, to_thread_cancellable
+from dailyai.pipeline.concurrent_pipeline import ConcurrentPipeline
+from dailyai.pipeline.frame_processor import FrameEmitter, PushFrameProcessor
+from dailyai.pipeline.frames import AudioFrame, EndFrame, Frame, TextFrame
+from dailyai.pipeline.instrumentation import PipelineMetrics
 
 from dailyai.pipeline.pipeline import Pipeline
 
@@ -57,3 +64,317 @@ class TestDailyPipeline(unittest.IsolatedAsyncioTestCase):
             TextFrame(" "),
         )
         self.assertIsInstance(await outgoing_queue.get(), EndFrame)
+
+    async def test_pipeline_push_processors(self):
+        class WordSplitter(PushFrameProcessor):
+            async def on_frame(self, frame: Frame, emit: FrameEmitter):
+                if isinstance(frame, TextFrame):
+                    for word in frame.text.split(" "):
+                        await emit(TextFrame(word + " "))
+                else:
+                    await emit(frame)
+
+        splitter = WordSplitter()
+        to_upper = StatelessTextTransformer(lambda x: x.upper())
+        pipeline = Pipeline([splitter, to_upper, SentenceAggregator()])
+
+        await pipeline.queue_frames(
+            [TextFrame("Hello, world. Bye now."), EndFrame()])
+        await pipeline.run_pipeline()
+
+        self.assertEqual(await pipeline.sink.get(), TextFrame("HELLO, WORLD."))
+        self.assertEqual(await pipeline.sink.get(), TextFrame(" BYE NOW."))
+        self.assertEqual(await pipeline.sink.get(), TextFrame(" "))
+        self.assertIsInstance(await pipeline.sink.get(), EndFrame)
+
+        # process_frame still works on a push-style processor
+        output = [f async for f in splitter.process_frame(TextFrame("a b"))]
+        self.assertEqual(output, [TextFrame("a "), TextFrame("b ")])
+
+    async def test_pipeline_skips_unconsumed_frame_types(self):
+        seen = []
+
+        class TextRecorder(StatelessTextTransformer):
+            async def interrupted(self):
+                pass
+
+        def record(text):
+            seen.append(text)
+            return text.upper()
+
+        class CountingRecorder(TextRecorder):
+            async def process_frame(self, frame: Frame):
+                seen.append(frame.__class__.__name__)
+                async for f in super().process_frame(frame):
+                    yield f
+
+        frames = [
+            TextFrame("a"),
+            AudioFrame(b"1234"),
+            TextFrame("b"),
+            EndFrame(),
+        ]
+
+        for pipeline_class in [Pipeline, ConcurrentPipeline]:
+            seen.clear()
+            pipeline = pipeline_class([TextRecorder(record)])
+            await pipeline.queue_frames(frames)
+            await pipeline.run_pipeline()
+
+            self.assertEqual(seen, ["a", "b"])
+            self.assertEqual(await pipeline.sink.get(), TextFrame("A"))
+            self.assertEqual(await pipeline.sink.get(), AudioFrame(b"1234"))
+            self.assertEqual(await pipeline.sink.get(), TextFrame("B"))
+            self.assertIsInstance(await pipeline.sink.get(), EndFrame)
+
+        # A subclass that overrides process_frame without declaring its
+        # own frame types gets every frame.
+        seen.clear()
+        pipeline = Pipeline([CountingRecorder(record)])
+        await pipeline.queue_frames(frames)
+        await pipeline.run_pipeline()
+        self.assertEqual(
+            seen,
+            ["TextFrame", "a", "AudioFrame", "TextFrame", "b", "EndFrame"])
+
+
+class TestPipelineMetrics(unittest.IsolatedAsyncioTestCase):
+
+    async def run_sentences(self, pipeline):
+        for word in ["Hello, ", "world.", " Bye", "."]:
+            await pipeline.queue_frames([TextFrame(word)])
+        await pipeline.queue_frames([EndFrame()])
+        await pipeline.run_pipeline()
+
+    async def test_pipeline_metrics(self):
+        metrics = PipelineMetrics()
+        pipeline = Pipeline(
+            [StatelessTextTransformer(lambda x: x.upper()), SentenceAggregator()],
+            metrics=metrics)
+        await self.run_sentences(pipeline)
+
+        upper = metrics.get(0, TextFrame)
+        self.assertEqual((upper.frames_in, upper.frames_out), (4, 4))
+        self.assertEqual(upper.process_time.count, 4)
+        self.assertEqual(upper.yield_gap.count, 4)
+
+        aggregated = metrics.get(1, TextFrame)
+        self.assertEqual((aggregated.frames_in, aggregated.frames_out), (4, 2))
+        self.assertEqual(metrics.get(1, EndFrame).frames_out, 1)
+        # StatelessTextTransformer doesn't consume EndFrames.
+        self.assertIsNone(metrics.get(0, EndFrame))
+
+        text = metrics.to_prometheus()
+        self.assertIn(
+            'dailyai_processor_frames_out_total{position="1",'
+            'processor="SentenceAggregator",frame_type="TextFrame"} 2\n',
+            text)
+        self.assertIn(
+            'dailyai_processor_process_time_seconds_count{position="0",'
+            'processor="StatelessTextTransformer",frame_type="TextFrame"} 4\n',
+            text)
+
+    async def test_concurrent_pipeline_queue_wait(self):
+        async def slow_upper(text: str):
+            await asyncio.sleep(0.01)
+            return text.upper()
+
+        metrics = PipelineMetrics()
+        pipeline = ConcurrentPipeline(
+            [StatelessTextTransformer(slow_upper), SentenceAggregator()],
+            metrics=metrics)
+        await self.run_sentences(pipeline)
+
+        upper = metrics.get(0, TextFrame)
+        self.assertEqual(upper.queue_wait.count, 4)
+        # Frames queued up behind the slow transformer.
+        self.assertGreater(upper.queue_wait.max, 0.02)
+        self.assertEqual(metrics.get(1, TextFrame).queue_wait.count, 4)
+        self.assertEqual(pipeline._enqueue_times, [{}, {}])
+
+
+class StallingProcessor(PushFrameProcessor):
+    """Emits each TextFrame, except "stall", which never finishes unless the
+    turn is interrupted."""
+
+    def __init__(self):
+        self.closed = []
+        self.interruptions = 0
+
+    async def on_frame(self, frame: Frame, emit: FrameEmitter) -> None:
+        if isinstance(frame, TextFrame) and frame.text == "stall":
+            try:
+                await asyncio.Event().wait()
+            finally:
+                self.closed.append(frame.text)
+        await emit(frame)
+
+    async def interrupted(self):
+        self.interruptions += 1
+
+
+class TestInterruption(unittest.IsolatedAsyncioTestCase):
+
+    async def run_interrupted_turn(self, pipeline, processor):
+        task = asyncio.create_task(pipeline.run_pipeline())
+        await pipeline.queue_frames([TextFrame("stall")])
+        await asyncio.sleep(0.01)
+
+        await pipeline.interrupt()
+        await pipeline.queue_frames([TextFrame("next turn"), EndFrame()])
+        await asyncio.wait_for(task, 1)
+
+        self.assertEqual(processor.closed, ["stall"])
+        self.assertEqual(processor.interruptions, 1)
+        self.assertEqual(await pipeline.sink.get(), TextFrame("next turn"))
+        self.assertIsInstance(await pipeline.sink.get(), EndFrame)
+        self.assertTrue(pipeline.sink.empty())
+
+    async def test_pipeline_interrupt(self):
+        processor = StallingProcessor()
+        await self.run_interrupted_turn(Pipeline([processor]), processor)
+
+    async def test_concurrent_pipeline_interrupt(self):
+        processor = StallingProcessor()
+        pipeline = ConcurrentPipeline([processor, SentenceAggregator()])
+        await self.run_interrupted_turn(pipeline, processor)
+
+    async def test_concurrent_pipeline_interrupt_drops_source_frames(self):
+        processor = StallingProcessor()
+        pipeline = ConcurrentPipeline([processor], stage_queue_size=1)
+        task = asyncio.create_task(pipeline.run_pipeline())
+        # "stall" is in the processor, the first "old turn" in its queue, and
+        # the second waiting for room there.
+        await pipeline.queue_frames(
+            [TextFrame("stall"), TextFrame("old turn"), TextFrame("old turn")])
+        await asyncio.sleep(0.01)
+        self.assertTrue(pipeline.source.empty())
+
+        await pipeline.interrupt()
+        await pipeline.queue_frames([TextFrame("next turn"), EndFrame()])
+        await asyncio.wait_for(task, 1)
+
+        self.assertEqual(await pipeline.sink.get(), TextFrame("next turn"))
+        self.assertIsInstance(await pipeline.sink.get(), EndFrame)
+        self.assertTrue(pipeline.sink.empty())
+
+    async def test_outside_cancellation_propagates(self):
+        scope = TurnScope()
+
+        async def turn():
+            async with scope.enter():
+                await asyncio.Event().wait()
+
+        task = asyncio.create_task(turn())
+        await asyncio.sleep(0)
+        scope.cancel()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+    async def test_to_thread_cancellable(self):
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def work(cancelled: threading.Event):
+            started.set()
+            cancelled.wait(5)
+            stopped.set()
+
+        task = asyncio.create_task(to_thread_cancellable(work))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertTrue(await asyncio.to_thread(stopped.wait, 5))
+
+
+class TestConcurrentPipeline(unittest.IsolatedAsyncioTestCase):
+
+    async def test_same_output_as_pipeline(self):
+        sentence_aggregator = SentenceAggregator()
+        to_upper = StatelessTextTransformer(lambda x: x.upper())
+        add_space = StatelessTextTransformer(lambda x: x + " ")
+
+        outgoing_queue = asyncio.Queue()
+        incoming_queue = asyncio.Queue()
+        pipeline = ConcurrentPipeline(
+            [add_space, sentence_aggregator, to_upper],
+            incoming_queue,
+            outgoing_queue,
+            stage_queue_size=2,
+        )
+
+        sentence = "Hello, world. It's me, a pipeline."
+        for c in sentence:
+            await incoming_queue.put(TextFrame(c))
+        await incoming_queue.put(EndFrame())
+
+        await pipeline.run_pipeline()
+
+        self.assertEqual(
+            await outgoing_queue.get(), TextFrame("H E L L O ,   W O R L D .")
+        )
+        self.assertEqual(
+            await outgoing_queue.get(),
+            TextFrame("   I T ' S   M E ,   A   P I P E L I N E ."),
+        )
+        self.assertEqual(await outgoing_queue.get(), TextFrame(" "))
+        self.assertIsInstance(await outgoing_queue.get(), EndFrame)
+        self.assertTrue(outgoing_queue.empty())
+
+    async def test_stages_overlap(self):
+        async def slow_upper(text: str):
+            await asyncio.sleep(0.05)
+            return text.upper()
+
+        async def slow_reverse(text: str):
+            await asyncio.sleep(0.05)
+            return text[::-1]
+
+        to_upper = StatelessTextTransformer(slow_upper)
+        reverse = StatelessTextTransformer(slow_reverse)
+        pipeline = ConcurrentPipeline([to_upper, reverse])
+
+        words = ["one", "two", "three", "four", "five"]
+        await pipeline.queue_frames([TextFrame(w) for w in words] + [EndFrame()])
+
+        start = time.time()
+        await pipeline.run_pipeline()
+        elapsed = time.time() - start
+
+        # Run one frame after the other, this would take 10 * 0.05s.
+        self.assertLess(elapsed, 0.45)
+        for word in words:
+            self.assertEqual(await pipeline.sink.get(), TextFrame(word.upper()[::-1]))
+        self.assertIsInstance(await pipeline.sink.get(), EndFrame)
+
+    async def test_cancel_interrupts_processors(self):
+        interrupted = []
+
+        class Waiter(StatelessTextTransformer):
+            async def interrupted(self):
+                interrupted.append(self)
+
+        async def wait_forever(text: str):
+            await asyncio.Event().wait()
+            return text
+
+        waiter = Waiter(wait_forever)
+        pipeline = ConcurrentPipeline([waiter])
+        await pipeline.queue_frames([TextFrame("hello")])
+
+        task = asyncio.create_task(pipeline.run_pipeline())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await task
+
+        self.assertEqual(interrupted, [waiter])
+
+
+def load_tests(loader, tests, ignore):
+    """ Run doctests on the cancellation and instrumentation modules. """
+    from dailyai.pipeline import cancellation, instrumentation
+    tests.addTests(doctest.DocTestSuite(cancellation))
+    tests.addTests(doctest.DocTestSuite(instrumentation))
+    return tests
@@ -0,0 +1,80 @@
+import unittest
+
+from dailyai.pipeline.frames import ImageFrame, SpriteFrame
+from dailyai.services.presentation import AudioClock, PresentationScheduler
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAudioClock(unittest.TestCase):
+
+    def test_played_samples(self):
+        time = FakeTime()
+        clock = AudioClock(16000, time)
+        self.assertEqual(clock.played_samples, 0)
+
+        # A second of audio written at once plays out over a second.
+        clock.write(16000)
+        self.assertEqual(clock.played_samples, 0)
+        time.now += 0.25
+        self.assertEqual(clock.played_samples, 4000)
+
+        # More audio queues up behind what's still playing.
+        clock.write(8000)
+        time.now += 1.0
+        self.assertEqual(clock.played_samples, 20000)
+        self.assertEqual(clock.written_samples, 24000)
+
+        # The device runs dry, and plays new audio as soon as it's written.
+        time.now += 10.0
+        self.assertEqual(clock.played_samples, 24000)
+        clock.write(1600)
+        time.now += 0.05
+        self.assertEqual(clock.played_samples, 24800)
+        self.assertAlmostEqual(clock.played_s, 1.55)
+
+
+class TestPresentationScheduler(unittest.TestCase):
+
+    def test_due_in_order(self):
+        time = FakeTime()
+        clock = AudioClock(16000, time)
+        scheduler = PresentationScheduler(clock)
+        speaking = ImageFrame(None, b"speaking")
+        waiting = ImageFrame(None, b"waiting")
+        sprite = SpriteFrame([b"1", b"2"], pts=0.5)
+
+        scheduler.schedule(0, speaking)
+        clock.write(16000)
+        scheduler.schedule(16000, waiting)
+        scheduler.schedule(round(sprite.pts * 16000), sprite)
+
+        self.assertEqual(scheduler.due(), [speaking])
+        time.now += 0.4
+        self.assertEqual(scheduler.due(), [])
+        time.now += 0.2
+        self.assertEqual(scheduler.due(), [sprite])
+        self.assertEqual(len(scheduler), 1)
+        time.now += 0.5
+        self.assertEqual(scheduler.due(), [waiting])
+
+    def test_flush(self):
+        clock = AudioClock(16000, FakeTime())
+        scheduler = PresentationScheduler(clock)
+        first = ImageFrame(None, b"1", pts=2.0)
+        second = ImageFrame(None, b"2", pts=2.0)
+        scheduler.schedule(32000, first)
+        scheduler.schedule(32000, second)
+        self.assertEqual(scheduler.due(), [])
+        self.assertEqual(scheduler.flush(), [first, second])
+        self.assertEqual(len(scheduler), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from dailyai.bench.thread_bridge import MODES, measure
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    EndFrame,
+    ImageFrame,
+    LLMResponseEndFrame,
+    StartFrame,
+    TextFrame,
+    UserStartedSpeakingFrame,
+)
+from dailyai.pipeline.queues import (
+    FrameQueue,
+    LoopFrameBridge,
+    OverflowPolicy,
+    PriorityFrameQueue,
+)
+
+
+class TestFrameQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def test_block(self):
+        queue = FrameQueue(2)
+        await queue.put(TextFrame("a"))
+        await queue.put(TextFrame("b"))
+        with self.assertRaises(asyncio.QueueFull):
+            queue.put_nowait(TextFrame("c"))
+
+        put = asyncio.create_task(queue.put(TextFrame("c")))
+        await asyncio.sleep(0)
+        self.assertFalse(put.done())
+        self.assertEqual(await queue.get(), TextFrame("a"))
+        await put
+        self.assertEqual(queue.qsize(), 2)
+
+    async def test_drop_oldest_keeps_control_frames(self):
+        queue = FrameQueue(2, OverflowPolicy.DROP_OLDEST)
+        await queue.put(EndFrame())
+        await queue.put(AudioFrame(b"1"))
+        await queue.put(AudioFrame(b"2"))
+        queue.put_nowait(AudioFrame(b"3"))
+
+        self.assertEqual(await queue.get(), EndFrame())
+        self.assertEqual(await queue.get(), AudioFrame(b"3"))
+        self.assertTrue(queue.empty())
+
+        # Dropped frames don't hold up join()
+        queue.task_done()
+        queue.task_done()
+        await asyncio.wait_for(queue.join(), 1)
+
+    async def test_coalesce_audio(self):
+        queue = FrameQueue(2, OverflowPolicy.COALESCE_AUDIO)
+        first = AudioFrame(b"12")
+        await queue.put(TextFrame("a"))
+        await queue.put(first)
+        await queue.put(AudioFrame(b"34"))
+        queue.put_nowait(AudioFrame(b"56"))
+
+        self.assertEqual(queue.qsize(), 2)
+        self.assertEqual(await queue.get(), TextFrame("a"))
+        self.assertEqual(await queue.get(), AudioFrame(b"123456"))
+        # the queued frame object wasn't modified
+        self.assertEqual(first, AudioFrame(b"12"))
+
+        await queue.put(TextFrame("b"))
+        await queue.put(TextFrame("c"))
+        with self.assertRaises(asyncio.QueueFull):
+            queue.put_nowait(AudioFrame(b"78"))
+
+
+class TestPriorityFrameQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def test_priority_frames_jump_ahead(self):
+        queue = PriorityFrameQueue(
+            priority_frame_types=(StartFrame, UserStartedSpeakingFrame))
+        await queue.put(AudioFrame(b"1"))
+        await queue.put(ImageFrame(None, b""))
+        await queue.put(StartFrame())
+        await queue.put(AudioFrame(b"2"))
+        await queue.put(UserStartedSpeakingFrame())
+
+        self.assertEqual(queue.qsize(), 5)
+        self.assertIsInstance(await queue.get(), StartFrame)
+        self.assertIsInstance(await queue.get(), UserStartedSpeakingFrame)
+        self.assertEqual(await queue.get(), AudioFrame(b"1"))
+        self.assertEqual(await queue.get(), ImageFrame(None, b""))
+        self.assertEqual(await queue.get(), AudioFrame(b"2"))
+        self.assertTrue(queue.empty())
+
+    async def test_priority_frames_skip_a_full_queue(self):
+        queue = PriorityFrameQueue(1)
+        await queue.put(AudioFrame(b"1"))
+        await asyncio.wait_for(queue.put(EndFrame()), 1)
+        self.assertIsInstance(await queue.get(), EndFrame)
+
+        getter = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+        self.assertEqual(await getter, AudioFrame(b"1"))
+
+        # wakes up a waiting getter
+        getter = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+        queue.put_priority_nowait(TextFrame("urgent"))
+        self.assertEqual(await asyncio.wait_for(getter, 1), TextFrame("urgent"))
+
+    async def test_discard_bulk(self):
+        queue = PriorityFrameQueue(
+            2, priority_frame_types=(StartFrame,))
+        await queue.put(AudioFrame(b"1"))
+        await queue.put(LLMResponseEndFrame())
+        blocked_put = asyncio.create_task(queue.put(AudioFrame(b"2")))
+        await asyncio.sleep(0)
+
+        self.assertEqual(queue.discard_bulk(), [AudioFrame(b"1")])
+        await asyncio.wait_for(blocked_put, 1)
+        self.assertIsInstance(await queue.get(), LLMResponseEndFrame)
+        self.assertEqual(await queue.get(), AudioFrame(b"2"))
+
+
+class TestLoopFrameBridge(unittest.IsolatedAsyncioTestCase):
+
+    async def test_batches(self):
+        loop = asyncio.get_running_loop()
+        queue = FrameQueue()
+        bridge = LoopFrameBridge(loop, queue)
+
+        def put_frames(start):
+            for i in range(start, start + 100):
+                bridge.put(TextFrame(str(i)))
+
+        with mock.patch.object(
+                loop, "call_soon_threadsafe",
+                wraps=loop.call_soon_threadsafe) as call_soon_threadsafe:
+            # The loop is busy until both threads are done, so it's woken
+            # once for all of their frames.
+            threads = [
+                threading.Thread(target=put_frames, args=(start,))
+                for start in (0, 100)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(bridge), 200)
+            await asyncio.sleep(0)
+            self.assertEqual(call_soon_threadsafe.call_count, 1)
+
+        # Each thread's frames arrive in the order it put them.
+        numbers = [int(queue.get_nowait().text) for _ in range(200)]
+        self.assertEqual([n for n in numbers if n < 100], list(range(100)))
+        self.assertEqual(
+            [n for n in numbers if n >= 100], list(range(100, 200)))
+
+        # The next frame starts a new batch.
+        thread = threading.Thread(target=bridge.put, args=(EndFrame(),))
+        thread.start()
+        thread.join()
+        self.assertIsInstance(
+            await asyncio.wait_for(queue.get(), 1), EndFrame)
+
+    async def test_full_queue(self):
+        queue = PriorityFrameQueue(1, priority_frame_types=(StartFrame,))
+        bridge = LoopFrameBridge(asyncio.get_running_loop(), queue)
+        for frame in [AudioFrame(b"1"), AudioFrame(b"2"), StartFrame(),
+                      AudioFrame(b"3")]:
+            bridge.put(frame)
+        await asyncio.sleep(0)
+
+        # The audio waits for room, but the StartFrame doesn't wait for it.
+        self.assertEqual(len(bridge), 2)
+        self.assertIsInstance(await queue.get(), StartFrame)
+        self.assertEqual(await queue.get(), AudioFrame(b"1"))
+        self.assertEqual(await queue.get(), AudioFrame(b"2"))
+        self.assertEqual(await queue.get(), AudioFrame(b"3"))
+        self.assertEqual(len(bridge), 0)
+
+    async def test_benchmark(self):
+        for mode in MODES:
+            with self.subTest(mode=mode):
+                result = await measure(mode, threads=2, frames=50)
+                self.assertGreater(result.frames_per_second, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
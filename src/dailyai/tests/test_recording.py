@@ -0,0 +1,92 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from dailyai.pipeline.aggregators import SentenceAggregator
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    EndFrame,
+    ImageFrame,
+    LLMMessagesQueueFrame,
+    TextFrame,
+)
+from dailyai.pipeline.pipeline import Pipeline
+from dailyai.pipeline.recording import (
+    FrameLogError,
+    FrameRecorder,
+    FrameReplayer,
+    read_frame_log,
+)
+
+
+class TestFrameRecording(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "frames.log")
+
+    async def record(self, frames, delay=0.0):
+        recorder = FrameRecorder(self.path)
+        pipeline = Pipeline([recorder, SentenceAggregator()])
+        task = asyncio.create_task(pipeline.run_pipeline())
+        for frame in frames:
+            await pipeline.source.put(frame)
+            await asyncio.sleep(delay)
+        await task
+        recorder.close()
+        return pipeline
+
+    async def test_record_and_replay(self):
+        frames = [
+            TextFrame("Hello, "),
+            AudioFrame(b"\x01\x02" * 100),
+            ImageFrame("url", b"\x00" * 30),
+            LLMMessagesQueueFrame([{"role": "user", "content": "hi"}]),
+            TextFrame("world."),
+            EndFrame(),
+        ]
+        recorded = await self.record(frames)
+
+        self.assertEqual([f for _, f in read_frame_log(self.path)], frames)
+
+        replayed = Pipeline([SentenceAggregator()])
+        await FrameReplayer(self.path, realtime=False).replay(replayed)
+        await replayed.run_pipeline()
+
+        while not recorded.sink.empty():
+            self.assertEqual(await replayed.sink.get(), await recorded.sink.get())
+        self.assertTrue(replayed.sink.empty())
+
+    async def test_realtime_replay(self):
+        await self.record([TextFrame("a"), TextFrame("b."), EndFrame()], 0.05)
+
+        timestamps = [t for t, _ in read_frame_log(self.path)]
+        self.assertGreaterEqual(timestamps[2] - timestamps[0], 0.1e9)
+
+        start = time.monotonic()
+        frames = [f async for f in FrameReplayer(self.path).frames()]
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual(len(frames), 3)
+
+        start = time.monotonic()
+        frames = [f async for f in FrameReplayer(self.path, speed=4).frames()]
+        self.assertLess(time.monotonic() - start, 0.09)
+
+    async def test_append_and_truncated_record(self):
+        await self.record([TextFrame("one."), EndFrame()])
+        await self.record([TextFrame("two."), EndFrame()])
+        with open(self.path, "ab") as f:
+            f.write(b"\x00\x01\x02")
+
+        self.assertEqual(
+            [f for _, f in read_frame_log(self.path)],
+            [TextFrame("one."), EndFrame(), TextFrame("two."), EndFrame()])
+
+    def test_not_a_frame_log(self):
+        with open(self.path, "wb") as f:
+            f.write(b"something else entirely")
+        with self.assertRaises(FrameLogError):
+            list(read_frame_log(self.path))
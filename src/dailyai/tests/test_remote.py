@@ -0,0 +1,271 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from typing import AsyncGenerator
+
+from dailyai.pipeline.codec import FIRST_APP_TYPE_ID, FrameCodec
+from dailyai.pipeline.frame_processor import FrameProcessor
+from dailyai.pipeline.frames import EndFrame, Frame, TextFrame
+from dailyai.pipeline.pipeline import Pipeline
+from dailyai.pipeline.remote import (
+    RemoteConnection,
+    RemoteProcessorError,
+    RemoteProcessorServer,
+)
+
+
+class Shout(FrameProcessor):
+    consumed_frame_types = (TextFrame,)
+
+    async def process_frame(
+            self, frame: Frame) -> AsyncGenerator[Frame, None]:
+        for word in frame.text.split():
+            yield TextFrame(word.upper())
+
+
+class Count(FrameProcessor):
+    def __init__(self):
+        self.count = 0
+
+    async def process_frame(
+            self, frame: Frame) -> AsyncGenerator[Frame, None]:
+        self.count += 1
+        yield TextFrame(str(self.count))
+
+
+class Stream(FrameProcessor):
+    """Emits a frame for every character of the text, and records how many
+    it's got out."""
+    sent = 0
+    started = None
+    cancelled = None
+    interruptions = 0
+
+    async def process_frame(
+            self, frame: Frame) -> AsyncGenerator[Frame, None]:
+        if not isinstance(frame, TextFrame):
+            yield frame
+            return
+        Stream.started.set()
+        try:
+            for character in frame.text:
+                if character == "-":
+                    await asyncio.sleep(10)
+                yield TextFrame(character)
+                Stream.sent += 1
+        except asyncio.CancelledError:
+            Stream.cancelled.set()
+            raise
+
+    async def interrupted(self) -> None:
+        Stream.interruptions += 1
+
+
+class Fail(FrameProcessor):
+    async def process_frame(
+            self, frame: Frame) -> AsyncGenerator[Frame, None]:
+        raise ValueError("no thanks")
+        yield frame
+
+
+class PrivateFrame(TextFrame):
+    """Only registered with the codec on one end of the connection."""
+    pass
+
+
+def private_codec() -> FrameCodec:
+    codec = FrameCodec()
+    codec.register(
+        PrivateFrame,
+        FIRST_APP_TYPE_ID,
+        lambda frame: frame.text.encode(),
+        lambda data: PrivateFrame(bytes(data).decode()))
+    return codec
+
+
+class Whisper(FrameProcessor):
+    async def process_frame(
+            self, frame: Frame) -> AsyncGenerator[Frame, None]:
+        yield PrivateFrame(frame.text)
+
+
+class TestRemoteProcessor(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        Stream.sent = 0
+        Stream.started = asyncio.Event()
+        Stream.cancelled = asyncio.Event()
+        Stream.interruptions = 0
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, "remote.sock")
+        self.server = await RemoteProcessorServer({
+            "shout": Shout,
+            "count": Count,
+            "stream": Stream,
+            "fail": Fail,
+        }).serve_unix(self.path)
+        self.addCleanup(self.tempdir.cleanup)
+        self.addAsyncCleanup(self.server.wait_closed)
+        self.addCleanup(self.server.close)
+
+    async def connect(self, **kwargs) -> RemoteConnection:
+        connection = await RemoteConnection.open_unix(self.path, **kwargs)
+        self.addAsyncCleanup(connection.close)
+        return connection
+
+    async def test_pipeline(self):
+        connection = await self.connect()
+        pipeline = Pipeline(
+            [connection.processor("shout", consumed_frame_types=(TextFrame,))])
+        await pipeline.queue_frames(
+            [TextFrame("hello remote world"), EndFrame()])
+        await pipeline.run_pipeline()
+
+        frames = []
+        while not pipeline.sink.empty():
+            frames.append(pipeline.sink.get_nowait())
+        self.assertEqual([frame.text for frame in frames[:-1]],
+                         ["HELLO", "REMOTE", "WORLD"])
+        self.assertIsInstance(frames[-1], EndFrame)
+
+    async def test_tcp_and_sessions(self):
+        server = await RemoteProcessorServer({"count": Count}).serve_tcp(
+            "127.0.0.1", 0)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        port = server.sockets[0].getsockname()[1]
+        connection = await RemoteConnection.open_tcp("127.0.0.1", port)
+        self.addAsyncCleanup(connection.close)
+
+        # Each processor has its own session, and its own hosted processor.
+        first = connection.processor("count")
+        second = connection.processor("count")
+
+        async def counts(processor, n):
+            return [
+                [frame.text async for frame in processor.process_frame(TextFrame(""))]
+                for _ in range(n)
+            ]
+
+        self.assertEqual(
+            await asyncio.gather(counts(first, 3), counts(second, 2)),
+            [[["1"], ["2"], ["3"]], [["1"], ["2"]]])
+
+    async def test_interrupt(self):
+        connection = await self.connect()
+        pipeline = Pipeline([connection.processor("stream")])
+        task = asyncio.create_task(pipeline.run_pipeline())
+        await pipeline.queue_frames([TextFrame("ab-c")])
+        await asyncio.wait_for(Stream.started.wait(), 1)
+        while pipeline.sink.qsize() < 2:
+            await asyncio.sleep(0.01)
+
+        await pipeline.interrupt()
+        await asyncio.wait_for(Stream.cancelled.wait(), 1)
+
+        # The pipeline and the session both carry on with the next frame.
+        await pipeline.queue_frames([TextFrame("de"), EndFrame()])
+        await asyncio.wait_for(task, 1)
+        texts = []
+        while not pipeline.sink.empty():
+            frame = pipeline.sink.get_nowait()
+            if isinstance(frame, TextFrame):
+                texts.append(frame.text)
+        self.assertEqual(texts, ["a", "b", "d", "e"])
+        self.assertEqual(Stream.interruptions, 1)
+
+    async def test_backpressure(self):
+        connection = await self.connect(window=4)
+        processor = connection.processor("stream")
+        release = asyncio.Event()
+        received = []
+
+        async def slow_emit(frame: Frame):
+            received.append(frame.text)
+            await release.wait()
+
+        task = asyncio.create_task(
+            processor.on_frame(TextFrame("x" * 20), slow_emit))
+        await asyncio.sleep(0.1)
+        # The server stops once it's used up its window.
+        self.assertEqual(Stream.sent, 4)
+        self.assertEqual(received, ["x"])
+
+        release.set()
+        await asyncio.wait_for(task, 1)
+        self.assertEqual(received, ["x"] * 20)
+
+    async def test_errors(self):
+        connection = await self.connect()
+        processor = connection.processor("fail")
+        with self.assertRaisesRegex(RemoteProcessorError, "no thanks"):
+            await processor.on_frame(TextFrame("hi"), None)
+
+        processor = connection.processor("missing")
+        with self.assertRaisesRegex(RemoteProcessorError, "missing"):
+            await processor.on_frame(TextFrame("hi"), None)
+        with self.assertRaisesRegex(RemoteProcessorError, "missing"):
+            await processor.on_frame(TextFrame("hi"), None)
+
+    async def test_connection_lost(self):
+        connection = await self.connect()
+        processor = connection.processor("stream")
+        task = asyncio.create_task(
+            processor.on_frame(TextFrame("-"), None))
+        await asyncio.wait_for(Stream.started.wait(), 1)
+        self.server.close()
+        await connection.close()
+        with self.assertRaises(ConnectionError):
+            await asyncio.wait_for(task, 1)
+
+    async def test_undecodable_frame_sent(self):
+        connection = await self.connect(codec=private_codec())
+        stream = connection.processor("stream")
+        streaming = asyncio.create_task(
+            stream.on_frame(TextFrame("-"), None))
+        await asyncio.wait_for(Stream.started.wait(), 1)
+
+        processor = connection.processor("shout")
+        with self.assertRaisesRegex(RemoteProcessorError, "Unknown frame type"):
+            await processor.on_frame(PrivateFrame("hi"), None)
+
+        # The session, and the other one on the connection, are still there.
+        received = []
+
+        async def collect(frame: Frame):
+            received.append(frame.text)
+
+        await processor.on_frame(TextFrame("still here"), collect)
+        self.assertEqual(received, ["STILL", "HERE"])
+        self.assertFalse(streaming.done())
+        self.assertFalse(Stream.cancelled.is_set())
+        streaming.cancel()
+        await asyncio.gather(streaming, return_exceptions=True)
+
+    async def test_undecodable_frame_received(self):
+        path = os.path.join(self.tempdir.name, "private.sock")
+        server = await RemoteProcessorServer(
+            {"shout": Shout, "whisper": Whisper},
+            codec=private_codec()).serve_unix(path)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        connection = await RemoteConnection.open_unix(path)
+        self.addAsyncCleanup(connection.close)
+
+        processor = connection.processor("whisper")
+        with self.assertRaisesRegex(RemoteProcessorError, "Couldn't decode"):
+            await processor.on_frame(TextFrame("psst"), None)
+
+        received = []
+
+        async def collect(frame: Frame):
+            received.append(frame.text)
+
+        await connection.processor("shout").on_frame(
+            TextFrame("still here"), collect)
+        self.assertEqual(received, ["STILL", "HERE"])
+
+
+if __name__ == "__main__":
+    unittest.main()
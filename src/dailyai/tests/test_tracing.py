@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import unittest
+from typing import AsyncGenerator
+
+from dailyai.pipeline.frame_processor import FrameProcessor
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    EndFrame,
+    Frame,
+    LLMMessagesQueueFrame,
+    TextFrame,
+    TranscriptionQueueFrame,
+)
+from dailyai.pipeline.pipeline import Pipeline
+from dailyai.pipeline.tracing import TurnHop, TurnTracer
+
+
+class FakeLLM(FrameProcessor):
+    consumed_frame_types = (LLMMessagesQueueFrame,)
+
+    async def process_frame(self, frame: Frame) -> AsyncGenerator[Frame, None]:
+        for token in ["Hi", " there", "."]:
+            await asyncio.sleep(0.001)
+            yield TextFrame(token)
+
+
+class FakeTTS(FrameProcessor):
+    consumed_frame_types = (TextFrame,)
+
+    async def process_frame(self, frame: Frame) -> AsyncGenerator[Frame, None]:
+        yield AudioFrame(b"\x00" * 320)
+        yield frame
+
+
+class FakeTransport:
+    """Stands in for a transport: a "VAD" thread marks the end of each user
+    utterance and sends a transcription, and a "mic" thread marks each audio
+    write."""
+
+    def __init__(self, tracer: TurnTracer, loop: asyncio.AbstractEventLoop):
+        self.tracer = tracer
+        self.loop = loop
+        self.receive_queue: asyncio.Queue = asyncio.Queue()
+        self.send_queue: asyncio.Queue = asyncio.Queue()
+        self.audio_frames_written = 0
+
+    def user_spoke(self, text: str):
+        def vad():
+            self.tracer.mark(TurnHop.VAD_STOP)
+            self.loop.call_soon_threadsafe(
+                self.receive_queue.put_nowait,
+                TranscriptionQueueFrame(text, "user", ""))
+
+        thread = threading.Thread(target=vad)
+        thread.start()
+        thread.join()
+
+    async def write_audio(self):
+        while True:
+            frame = await self.send_queue.get()
+            if isinstance(frame, EndFrame):
+                break
+            if isinstance(frame, AudioFrame):
+                await asyncio.to_thread(self.tracer.mark, TurnHop.MIC_WRITE)
+                self.audio_frames_written += 1
+
+
+class TestTurnTracer(unittest.IsolatedAsyncioTestCase):
+
+    def test_turn_boundaries(self):
+        tracer = TurnTracer()
+        ms = 1_000_000
+        marks = [
+            (TurnHop.TRANSCRIPTION, 0),
+            (TurnHop.VAD_STOP, 20),
+            (TurnHop.LLM_FIRST_TOKEN, 300),
+            (TurnHop.LLM_FIRST_TOKEN, 310),
+            (TurnHop.MIC_WRITE, 500),
+            (TurnHop.LLM_FIRST_TOKEN, 520),
+            (TurnHop.MIC_WRITE, 540),
+            # The user speaks twice before the bot answers.
+            (TurnHop.VAD_STOP, 1000),
+            (TurnHop.VAD_STOP, 2000),
+            (TurnHop.MIC_WRITE, 2400),
+        ]
+        for hop, time_ms in marks:
+            tracer.mark(hop, time_ms * ms)
+
+        turns = tracer.turns
+        self.assertEqual(len(turns), 3)
+        self.assertEqual(
+            turns[0].timeline(),
+            [
+                (TurnHop.TRANSCRIPTION, -0.02),
+                (TurnHop.VAD_STOP, 0.0),
+                (TurnHop.LLM_FIRST_TOKEN, 0.28),
+                (TurnHop.MIC_WRITE, 0.48),
+            ],
+        )
+        self.assertIsNone(turns[1].latency)
+        self.assertAlmostEqual(turns[2].latency, 0.4)
+
+        histograms = tracer.histograms()
+        self.assertEqual(histograms[TurnHop.MIC_WRITE].count, 2)
+        self.assertAlmostEqual(
+            histograms[TurnHop.MIC_WRITE].percentile(50), 0.4, delta=0.01)
+        self.assertIn("2 completed turns of 3", tracer.report())
+
+    async def test_fake_transport(self):
+        tracer = TurnTracer()
+        transport = FakeTransport(tracer, asyncio.get_running_loop())
+
+        class ToMessages(FrameProcessor):
+            consumed_frame_types = (TranscriptionQueueFrame,)
+
+            async def process_frame(self, frame):
+                yield LLMMessagesQueueFrame([{"role": "user", "content": frame.text}])
+
+        pipeline = Pipeline(
+            [
+                tracer.tap(TurnHop.TRANSCRIPTION, (TranscriptionQueueFrame,)),
+                ToMessages(),
+                tracer.tap(TurnHop.AGGREGATOR, (LLMMessagesQueueFrame,)),
+                FakeLLM(),
+                tracer.tap(TurnHop.LLM_FIRST_TOKEN, (TextFrame,)),
+                FakeTTS(),
+                tracer.tap(TurnHop.TTS_FIRST_BYTE, (AudioFrame,)),
+            ],
+            transport.receive_queue,
+            transport.send_queue,
+        )
+        writer = asyncio.create_task(transport.write_audio())
+        pipeline_task = asyncio.create_task(pipeline.run_pipeline())
+
+        for turn in range(2):
+            transport.user_spoke("hello")
+            # Let the whole response play out before the user speaks again.
+            while transport.audio_frames_written < (turn + 1) * 3:
+                await asyncio.sleep(0.001)
+
+        await transport.receive_queue.put(EndFrame())
+        await asyncio.wait_for(asyncio.gather(pipeline_task, writer), 1)
+
+        self.assertEqual(len(tracer.turns), 2)
+        for turn in tracer.turns:
+            hops = [hop for hop, _ in turn.timeline()]
+            self.assertEqual(
+                hops, [
+                    hop for hop in TurnHop if hop != TurnHop.FIRST_SENTENCE])
+            self.assertGreater(turn.latency, 0)
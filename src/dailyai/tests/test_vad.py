@@ -0,0 +1,355 @@
+import asyncio
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from dailyai.bench import vad_backends, vad_gate
+from dailyai.bench.vad_batching import MODES, measure
+from dailyai.pipeline.frames import (
+    AudioFrame,
+    TextFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from dailyai.services.vad import (
+    BatchedVADEngine,
+    EnergyVADModel,
+    GatedVADModel,
+    SileroVADModel,
+    VADModel,
+    VADProcessor,
+    VADState,
+    VADStateMachine,
+)
+
+
+class LoudnessModel(VADModel):
+    """Stands in for Silero: the probability of speech is the chunk's peak
+    level, and each stream's state counts the chunks it's seen."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def initial_state(self) -> np.ndarray:
+        return np.zeros(1, dtype=np.float32)
+
+    def __call__(self, chunks, states):
+        self.batch_sizes.append(len(chunks))
+        return np.abs(chunks).max(axis=1), states + 1
+
+
+class TestVADStateMachine(unittest.TestCase):
+
+    def test_start_and_stop(self):
+        machine = VADStateMachine(start_frames=2, stop_frames=3)
+        # A single chunk of speech isn't enough.
+        self.assertEqual(
+            [machine.update(s) for s in [True, False, True]], [None] * 3)
+        self.assertIsInstance(machine.update(True), UserStartedSpeakingFrame)
+        self.assertEqual(machine.state, VADState.SPEAKING)
+
+        # Nor is a short pause.
+        self.assertEqual(
+            [machine.update(s) for s in [False, False, True, False, False]],
+            [None] * 5)
+        self.assertIsInstance(machine.update(False), UserStoppedSpeakingFrame)
+        self.assertEqual(machine.state, VADState.QUIET)
+
+
+class TestEnergyVADModel(unittest.TestCase):
+
+    def test_threshold(self):
+        model = EnergyVADModel(threshold_db=-40.0)
+        # Full-scale sines have an RMS of -3dBFS.
+        t = np.arange(1536) / 16000
+        sine = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+        chunks = np.stack([sine * 10 ** (db / 20) for db in (-60, -40, -30)]
+                          + [np.zeros(1536, np.float32)])
+        state = np.stack([model.initial_state()] * 4)
+        probabilities, states = model(chunks, state)
+        self.assertEqual((probabilities > 0.5).tolist(),
+                         [False, False, True, False])
+        self.assertEqual(states.shape, (4, 0))
+
+    def test_benchmark(self):
+        # Measured in another interpreter, which imports the transport
+        # without torch.
+        result = vad_backends.measure("energy", chunks=5)
+        self.assertGreater(result.chunk_s, 0)
+        with self.assertRaises(RuntimeError):
+            vad_backends.measure("silero-onnx", chunks=5)
+
+
+class TestSileroVADModel(unittest.TestCase):
+
+    def test_needs_v4(self):
+        class SileroV4:
+            _h = _c = _last_batch_size = _last_sr = None
+
+        class SileroV5:
+            _state = None
+
+        SileroVADModel(SileroV4())
+        with self.assertRaisesRegex(ValueError, "_h, _c"):
+            SileroVADModel(SileroV5())
+
+
+class TestGatedVADModel(unittest.TestCase):
+
+    def test_runs_model_near_speech(self):
+        model = LoudnessModel()
+        gated = GatedVADModel(model, hangover_chunks=2)
+        rng = np.random.default_rng(0)
+        noise = rng.standard_normal((10, 1, 1536)).astype(np.float32) * 0.001
+        t = np.arange(1536) / 16000
+        voice = (np.sin(2 * np.pi * 150 * t) * 0.3).astype(np.float32)
+
+        chunks = list(noise[:5]) + [noise[5] + voice] + list(noise[6:])
+        state = gated.initial_state()[None]
+        probabilities = []
+        for chunk in chunks:
+            p, state = gated(chunk, state)
+            probabilities.append(round(float(p[0]), 2))
+
+        # The model ran on the loud chunk and the two after it.
+        self.assertEqual(model.batch_sizes, [1, 1, 1])
+        self.assertEqual(probabilities[:5], [0] * 5)
+        self.assertGreaterEqual(probabilities[5], 0.3)
+        self.assertEqual(probabilities[8:], [0] * 2)
+        self.assertEqual((gated.chunks, gated.model_chunks), (10, 3))
+        # The model's state started afresh when the gate opened.
+        self.assertEqual(state[0, 2:].tolist(), [3])
+
+    def test_ignores_hiss(self):
+        model = LoudnessModel()
+        gated = GatedVADModel(model)
+        rng = np.random.default_rng(0)
+        quiet = rng.standard_normal((1, 1536)).astype(np.float32) * 0.001
+        hiss = rng.standard_normal((1, 1536)).astype(np.float32) * 0.3
+        state = gated.initial_state()[None]
+        _, state = gated(quiet, state)
+        _, state = gated(hiss, state)
+        self.assertEqual(model.batch_sizes, [])
+
+    def test_benchmark(self):
+        for mode in vad_gate.MODES:
+            with self.subTest(mode=mode):
+                result = vad_gate.measure(
+                    mode, idle_seconds=2, model=EnergyVADModel())
+                self.assertEqual(result.missed, 0)
+
+
+class TestBatchedVADEngine(unittest.TestCase):
+
+    def test_batches_streams(self):
+        model = LoudnessModel()
+        engine = BatchedVADEngine(model, max_wait_s=1.0)
+        results = {}
+        done = threading.Event()
+
+        def on_probability(name):
+            def record(probability):
+                results.setdefault(name, []).append(probability)
+                if sum(len(r) for r in results.values()) == 6:
+                    done.set()
+            return record
+
+        streams = {
+            name: engine.register(on_probability(name))
+            for name in ("quiet", "medium", "loud")
+        }
+        for level, name in [(0.1, "quiet"), (0.5, "medium"), (0.9, "loud")]:
+            streams[name].submit(np.full(4, level, np.float32))
+            streams[name].submit(np.full(4, level / 2, np.float32))
+        self.assertTrue(done.wait(5))
+
+        # Each stream's chunks were run in order, with its own state.
+        self.assertEqual(
+            {name: [round(p, 2) for p in r] for name, r in results.items()},
+            {"quiet": [0.1, 0.05], "medium": [0.5, 0.25], "loud": [0.9, 0.45]})
+        self.assertEqual(model.batch_sizes, [3, 3])
+        for stream in streams.values():
+            self.assertEqual(stream.state.tolist(), [2])
+
+        streams["quiet"].close()
+        self.assertEqual(len(engine._streams), 2)
+
+    def test_model_error(self):
+        class FailingModel(LoudnessModel):
+            def __call__(self, chunks, states):
+                if len(self.batch_sizes) == 1:
+                    self.batch_sizes.append(len(chunks))
+                    raise RuntimeError("model failed")
+                return super().__call__(chunks, states)
+
+        engine = BatchedVADEngine(FailingModel(), max_wait_s=1.0)
+        results = {}
+        done = threading.Event()
+
+        def on_probability(name):
+            def record(probability):
+                results.setdefault(name, []).append(probability)
+                if sum(len(r) for r in results.values()) == 6:
+                    done.set()
+            return record
+
+        streams = {name: engine.register(on_probability(name))
+                   for name in ("a", "b")}
+        for level in (0.1, 0.2, 0.3):
+            streams["a"].submit(np.full(4, level, np.float32))
+            streams["b"].submit(np.full(4, level * 2, np.float32))
+        self.assertTrue(done.wait(5))
+
+        # The failed batch's chunks counted as silence, and the streams
+        # kept their state and their place.
+        self.assertEqual(
+            {name: [round(p, 2) for p in r] for name, r in results.items()},
+            {"a": [0.1, 0.0, 0.3], "b": [0.2, 0.0, 0.6]})
+        for stream in streams.values():
+            self.assertEqual(stream.state.tolist(), [2])
+
+    def test_benchmark(self):
+        for mode in MODES:
+            with self.subTest(mode=mode):
+                result = measure(mode, sessions=3, chunks=5,
+                                 model=LoudnessModel())
+                self.assertGreater(result.chunks_per_second, 0)
+
+
+class TestVADProcessor(unittest.IsolatedAsyncioTestCase):
+
+    async def run_processor(self, processor):
+        # A second of silence, a second of speech and two of silence, in
+        # frames that don't line up with the model's chunks.
+        samples = np.zeros(64000, dtype=np.int16)
+        samples[16000:32000] = 20000
+        frames = [AudioFrame(samples[i:i + 1000].tobytes())
+                  for i in range(0, len(samples), 1000)]
+        output = []
+
+        async def emit(frame):
+            output.append(frame)
+
+        await processor.on_frame(TextFrame("hi"), emit)
+        for frame in frames:
+            await processor.on_frame(frame, emit)
+        return frames, output
+
+    def assert_detected(self, frames, output):
+        def after(frame):
+            # Frames of the same audio are equal, so find this one by
+            # identity.
+            return [id(f) for f in output].index(id(frame)) + 1
+
+        self.assertEqual(output[0], TextFrame("hi"))
+        self.assertEqual([f for f in output if isinstance(f, AudioFrame)],
+                         frames)
+        # vad_start_s of 0.2s is two chunks: the one the speech starts in
+        # (the 11th), and the next, which ends in the 19th frame.
+        self.assertIsInstance(
+            output[after(frames[18])], UserStartedSpeakingFrame)
+        # vad_stop_s of 0.8s is eight silent chunks after the one the
+        # speech ends in (the 21st); the 29th chunk ends in the 45th frame.
+        self.assertIsInstance(
+            output[after(frames[44])], UserStoppedSpeakingFrame)
+        self.assertEqual(len(output), len(frames) + 3)
+
+    async def test_rechunks_frames(self):
+        model = LoudnessModel()
+        frames, output = await self.run_processor(VADProcessor(model))
+        self.assert_detected(frames, output)
+        self.assertEqual(len(model.batch_sizes), 64000 // 1536)
+
+    async def wait_for_model(self, model):
+        while not model.batch_sizes:
+            await asyncio.sleep(0.001)
+
+    async def test_cancelled_model_run(self):
+        class SlowModel(LoudnessModel):
+            active = 0
+            most_active = 0
+
+            def __call__(self, chunks, states):
+                SlowModel.active += 1
+                SlowModel.most_active = max(
+                    SlowModel.most_active, SlowModel.active)
+                time.sleep(0.01)
+                SlowModel.active -= 1
+                return super().__call__(chunks, states)
+
+        model = SlowModel()
+        processor = VADProcessor(model)
+        output = []
+
+        async def emit(frame):
+            output.append(frame)
+
+        loud = AudioFrame(np.full(1536 * 10, 20000, np.int16).tobytes())
+        task = asyncio.create_task(processor.on_frame(loud, emit))
+        await asyncio.wait_for(self.wait_for_model(model), 1)
+        # Interrupted part way through the frame, while the model's still
+        # running in its thread.
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await processor.interrupted()
+
+        output.clear()
+        await processor.on_frame(loud, emit)
+        # The next run waited for the cancelled one.
+        self.assertEqual(SlowModel.most_active, 1)
+        self.assertEqual(len(model.batch_sizes), 20)
+        # And its state didn't carry over.
+        self.assertEqual(processor._model_state[0, 0], 10)
+        self.assertIsInstance(output[1], UserStartedSpeakingFrame)
+
+    async def test_interrupted(self):
+        processor = VADProcessor(LoudnessModel())
+        output = []
+
+        async def emit(frame):
+            output.append(frame)
+
+        # Speech, then part of a chunk that'd be quiet.
+        speech = np.full(1536 * 3, 20000, np.int16)
+        await processor.on_frame(AudioFrame(speech.tobytes()), emit)
+        await processor.on_frame(AudioFrame(bytes(1000)), emit)
+        self.assertEqual(processor._state_machine.state, VADState.SPEAKING)
+
+        await processor.interrupted()
+        self.assertEqual(processor._state_machine.state, VADState.QUIET)
+        self.assertEqual(len(processor._pending), 0)
+        # The leftover quiet samples don't go in with the next frame's.
+        await processor.on_frame(AudioFrame(speech[:1536].tobytes()), emit)
+        self.assertEqual(processor._model_state[0, 0], 1)
+
+    async def test_engine_model_error(self):
+        class FailingModel(LoudnessModel):
+            def __call__(self, chunks, states):
+                self.batch_sizes.append(len(chunks))
+                if len(self.batch_sizes) == 12:
+                    raise RuntimeError("model failed")
+                return np.abs(chunks).max(axis=1), states + 1
+
+        engine = BatchedVADEngine(FailingModel())
+        processor = VADProcessor(engine=engine)
+        # A failed chunk in the middle of the speech doesn't stop the
+        # processor, or put its results out of step.
+        frames, output = await asyncio.wait_for(
+            self.run_processor(processor), 5)
+        self.assertEqual(len(output), len(frames) + 3)
+        processor.close()
+
+    async def test_engine(self):
+        engine = BatchedVADEngine(LoudnessModel())
+        processor = VADProcessor(engine=engine)
+        frames, output = await self.run_processor(processor)
+        self.assert_detected(frames, output)
+        self.assertEqual(engine.chunks, 64000 // 1536)
+        processor.close()
+        self.assertEqual(len(engine._streams), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,7 +36,7 @@ logger = logging.getLogger("dailyai")
 logger.setLevel(logging.DEBUG)
 
 
-@dataclass
+@dataclass(slots=True)
 class MonthFrame(Frame):
     month: str
 
@@ -73,15 +73,15 @@ for file in image_files:
 
 
 class StoryStartFrame(TextFrame):
-    pass
+    __slots__ = ()
 
 
 class StoryPageFrame(TextFrame):
-    pass
+    __slots__ = ()
 
 
 class StoryPromptFrame(TextFrame):
-    pass
+    __slots__ = ()
 
 
 class StoryProcessor(FrameProcessor):